@@ -0,0 +1,65 @@
+"""Per-row Faker vs pooled sampling for customer generation.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_faker_pool --sizes 10000 1000000 10000000
+
+Per-row Faker is measured directly up to --max-per-row customers; above that
+it is timed on a --max-per-row sample and extrapolated linearly (marked "~").
+"""
+import argparse
+import time
+
+import numpy as np
+
+import faker_pool
+import sales
+
+
+def time_per_row(n):
+    started = time.perf_counter()
+    sales.generate_customers(n)
+    return time.perf_counter() - started
+
+
+def time_pooled(n, pools, chunk_size, unique):
+    rng = np.random.default_rng(42)
+    started = time.perf_counter()
+    for first in range(0, n, chunk_size):
+        sales.generate_customers_pooled(min(chunk_size, n - first), pools, rng, first_customer_id=first + 1,
+                                        unique_emails=unique, unique_phones=unique)
+    return time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 1000000, 10000000])
+    parser.add_argument('--pool-size', type=int, default=faker_pool.DEFAULT_POOL_SIZE)
+    parser.add_argument('--max-per-row', type=int, default=100000,
+                        help="largest customer count timed with real per-row Faker calls (default: 100000)")
+    parser.add_argument('--chunk-size', type=int, default=1000000)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    pools = faker_pool.load_pools(['name', 'email', 'phone_number'], args.pool_size, cache_dir=None)
+    build_seconds = time.perf_counter() - started
+    print(f"Pool build: {args.pool_size:,} values x 3 fields in {build_seconds:.2f}s (uncached)")
+
+    sample_seconds = None
+    print(f"\n{'customers':>12} {'per-row (s)':>14} {'pooled (s)':>11} {'unique (s)':>11} {'speedup':>9}")
+    for n in args.sizes:
+        if n <= args.max_per_row:
+            per_row_seconds = time_per_row(n)
+            per_row = f"{per_row_seconds:.2f}"
+        else:
+            if sample_seconds is None:
+                sample_seconds = time_per_row(args.max_per_row)
+            per_row_seconds = sample_seconds * n / args.max_per_row
+            per_row = f"~{per_row_seconds:.1f}"
+        pooled = time_pooled(n, pools, args.chunk_size, unique=False)
+        unique = time_pooled(n, pools, args.chunk_size, unique=True)
+        print(f"{n:>12,} {per_row:>14} {pooled:>11.2f} {unique:>11.2f} {per_row_seconds / pooled:>8.0f}x")
+
+
+if __name__ == '__main__':
+    main()
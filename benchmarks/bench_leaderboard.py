@@ -0,0 +1,116 @@
+"""Incremental leaderboards vs the notebook's groupby + sort: equivalence and cost.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_leaderboard
+    python -m benchmarks.bench_leaderboard --data-dir /tmp/sales_1m --batch-size 20000
+
+orders.csv and order_items.csv are fed to OrderLeaderboards in batches. After
+every --check-every batches the top --top customers and products are compared
+with the notebook's groupby/sort over all rows ingested so far (ties broken by
+id); a final batch of refunds (negative amounts) exercises the full re-rank.
+The script exits non-zero on any mismatch, then reports the per-batch cost of
+ingesting vs recomputing the ranking from scratch, and of reading the top N.
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from leaderboard import OrderLeaderboards
+
+
+def notebook_customers(orders):
+    stats = orders.groupby('customer_id').agg({'order_id': 'count', 'total_amount': 'sum'}).reset_index()
+    stats.columns = ['customer_id', 'order_count', 'total_spent']
+    return stats.sort_values(['total_spent', 'customer_id'], ascending=[False, True])
+
+
+def notebook_products(order_items):
+    stats = order_items.groupby('product_id').agg(
+        {'quantity': 'sum', 'total_price': 'sum', 'order_item_id': 'count'}).reset_index()
+    stats.columns = ['product_id', 'total_quantity', 'total_revenue', 'order_count']
+    return stats.sort_values(['total_revenue', 'product_id'], ascending=[False, True])
+
+
+def same_top(board, expected, n):
+    actual = board.top(n)
+    expected = expected.head(n)[actual.columns]
+    return (np.array_equal(actual.iloc[:, 0].to_numpy(), expected.iloc[:, 0].to_numpy())
+            and np.allclose(actual.to_numpy(dtype=float), expected.to_numpy(dtype=float), rtol=1e-9))
+
+
+def batches(frame, size):
+    return [frame.iloc[start:start + size] for start in range(0, len(frame), size)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data-dir', default='.', help="directory with orders.csv and order_items.csv")
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--check-every', type=int, default=5)
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('-k', type=int, default=100)
+    args = parser.parse_args(argv)
+
+    orders = pd.read_csv(f'{args.data_dir}/orders.csv')
+    items = pd.read_csv(f'{args.data_dir}/order_items.csv')
+    boards = OrderLeaderboards(args.k)
+    order_batches, item_batches = batches(orders, args.batch_size), batches(items, args.batch_size * 3)
+    failures, checks = [], 0
+    ingest_seconds = []
+    for index in range(max(len(order_batches), len(item_batches))):
+        order_batch = order_batches[index] if index < len(order_batches) else None
+        item_batch = item_batches[index] if index < len(item_batches) else None
+        started = time.perf_counter()
+        boards.ingest(order_batch, item_batch)
+        ingest_seconds.append(time.perf_counter() - started)
+        last = index == max(len(order_batches), len(item_batches)) - 1
+        if index % args.check_every == 0 or last:
+            checks += 1
+            seen_orders = orders.iloc[:min((index + 1) * args.batch_size, len(orders))]
+            seen_items = items.iloc[:min((index + 1) * args.batch_size * 3, len(items))]
+            if not same_top(boards.customers, notebook_customers(seen_orders), args.top):
+                failures.append(f"customers after batch {index}")
+            if not same_top(boards.products, notebook_products(seen_items), args.top):
+                failures.append(f"products after batch {index}")
+
+    # refund half of the current top customers' spending: leaders lose ground
+    leaders = boards.customers.top(args.top)
+    refunds = pd.DataFrame({'order_id': 0, 'customer_id': leaders['customer_id'].to_numpy()[::2],
+                            'total_amount': -leaders['total_spent'].to_numpy()[::2] / 2})
+    boards.customers.ingest(refunds)
+    refunded = pd.concat([orders, refunds], ignore_index=True)
+    expected = notebook_customers(refunded)
+    # refund rows are not orders; the notebook counts them, so compare totals only
+    checks += 1
+    actual = boards.customers.top(args.top)
+    if not (np.array_equal(actual['customer_id'].to_numpy(), expected['customer_id'].head(args.top).to_numpy())
+            and np.allclose(actual['total_spent'], expected['total_spent'].head(args.top), rtol=1e-9)):
+        failures.append("customers after refunds")
+
+    started = time.perf_counter()
+    notebook_customers(orders).head(args.top)
+    notebook_products(items).head(args.top)
+    recompute = time.perf_counter() - started
+    started = time.perf_counter()
+    for _ in range(1000):
+        boards.customers.top(args.top)
+    read = (time.perf_counter() - started) / 1000
+
+    print(f"{len(orders):,} orders and {len(items):,} order items in {len(ingest_seconds)} batches; "
+          f"{checks} checks, {len(failures)} mismatches, "
+          f"{boards.customers.full_reranks + boards.products.full_reranks} full re-rank(s)\n")
+    print(f"{'ingest one batch (median)':<34} {np.median(ingest_seconds) * 1000:>9.3f} ms")
+    print(f"{'notebook groupby + sort, all rows':<34} {recompute * 1000:>9.3f} ms")
+    print(f"{'read top ' + str(args.top):<34} {read * 1000:>9.3f} ms")
+    for failure in failures:
+        print(f"  FAIL {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""Order analytics: notebook-style loading vs the cached fact table, cold and warm.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_order_analytics
+    python -m benchmarks.bench_order_analytics --data-dir /tmp/sales_1m --repeat 3
+
+Three ways of producing the notebook's tables are timed:
+
+- notebook: read the CSVs with default dtypes and run the notebook's groupbys
+- cold: build the typed fact and orders tables from CSV, write the cache, run the analyses
+- warm: load the cached tables and run the analyses
+
+The results of order_analytics are first checked against the notebook code,
+on the data and on a copy in which every tenth order has no items; the
+script exits non-zero if any table differs. The cache is written to a
+temporary directory, never next to the data.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import order_analytics
+
+
+def notebook_load(data_dir):
+    """The loading cell of orderanalysis.ipynb"""
+    orders_df = pd.read_csv(f'{data_dir}/orders.csv')
+    order_items_df = pd.read_csv(f'{data_dir}/order_items.csv')
+    products_df = pd.read_csv(f'{data_dir}/products.csv')
+    orders_df['order_date'] = pd.to_datetime(orders_df['order_date'])
+    return orders_df, order_items_df, products_df
+
+
+def notebook_analyses(orders_df, order_items_df, products_df):
+    """The groupby cells of orderanalysis.ipynb"""
+    orders_df = orders_df.copy()
+    results = {'status_counts': orders_df['order_status'].value_counts()}
+    revenue_by_status = orders_df.groupby('order_status')['total_amount'].agg(['sum', 'mean', 'count'])
+    revenue_by_status.columns = ['Total Revenue', 'Average Order Value', 'Order Count']
+    results['revenue_by_status'] = revenue_by_status
+
+    orders_df['year_month'] = orders_df['order_date'].dt.to_period('M')
+    orders_df['year'] = orders_df['order_date'].dt.year
+    monthly_orders = orders_df.groupby('year_month').agg({'order_id': 'count', 'total_amount': 'sum'}).reset_index()
+    monthly_orders.columns = ['year_month', 'order_count', 'total_revenue']
+    results['monthly_orders'] = monthly_orders
+
+    customer_stats = orders_df.groupby('customer_id').agg({'order_id': 'count', 'total_amount': 'sum'}).reset_index()
+    customer_stats.columns = ['customer_id', 'order_count', 'total_spent']
+    results['customer_stats'] = customer_stats.sort_values('total_spent', ascending=False)
+
+    product_stats = order_items_df.groupby('product_id').agg(
+        {'quantity': 'sum', 'total_price': 'sum', 'order_item_id': 'count'}).reset_index()
+    product_stats.columns = ['product_id', 'total_quantity', 'total_revenue', 'order_count']
+    results['product_stats'] = product_stats.sort_values('total_revenue', ascending=False)
+
+    results['items_per_order'] = order_items_df.groupby('order_id').size().reset_index(name='item_count')
+
+    orders_df['quarter'] = orders_df['order_date'].dt.quarter
+    yearly_stats = orders_df.groupby('year').agg({'order_id': 'count', 'total_amount': 'sum'}).reset_index()
+    yearly_stats.columns = ['year', 'order_count', 'total_revenue']
+    results['yearly_stats'] = yearly_stats
+    quarterly_stats = orders_df.groupby(['year', 'quarter']).agg(
+        {'order_id': 'count', 'total_amount': 'sum'}).reset_index()
+    quarterly_stats.columns = ['year', 'quarter', 'order_count', 'total_revenue']
+    results['quarterly_stats'] = quarterly_stats
+    return results
+
+
+def _same(expected, actual):
+    if isinstance(expected, pd.Series):
+        expected, actual = expected.to_frame(), actual.to_frame()
+    if expected.shape != actual.shape:
+        return False
+    for column in expected.columns:
+        left = expected[column].to_numpy()
+        right = actual[column].to_numpy()
+        if np.issubdtype(np.asarray(left).dtype, np.number):
+            if not np.allclose(left.astype(float), right.astype(float), rtol=1e-9):
+                return False
+        elif not (pd.Series(left).astype(str).to_numpy() == pd.Series(right).astype(str).to_numpy()).all():
+            return False
+    return True
+
+
+def check_equivalence(data_dir, cache_dir):
+    expected = notebook_analyses(*notebook_load(data_dir))
+    fact, orders, _ = order_analytics.load_tables(data_dir, cache_dir, rebuild=True)
+    failures = []
+    for name, table in expected.items():
+        if name in order_analytics.ORDER_ANALYSES:
+            actual = order_analytics.ANALYSES[name](fact, orders)
+        else:
+            actual = order_analytics.ANALYSES[name](fact)
+        if name in ('status_counts', 'revenue_by_status'):
+            # category order differs from value_counts/groupby order; compare by label
+            actual.index = actual.index.astype(str)
+            actual = actual.reindex(table.index)
+        else:
+            actual = actual[[column for column in table.columns]] if hasattr(table, 'columns') else actual
+        if not _same(table, actual):
+            failures.append(name)
+    return failures
+
+
+def drop_items(data_dir, scratch, every=10):
+    """Copy the data to scratch with the items of every `every`-th order removed"""
+    for file_name in order_analytics.SOURCES.values():
+        shutil.copy(os.path.join(data_dir, file_name), scratch)
+    items = pd.read_csv(os.path.join(data_dir, 'order_items.csv'))
+    items[items['order_id'] % every != 0].to_csv(os.path.join(scratch, 'order_items.csv'), index=False)
+    return scratch
+
+
+def time_variant(load, analyse, repeat):
+    """Best (load, analyses) seconds over `repeat` runs"""
+    best = (float('inf'), float('inf'))
+    for _ in range(repeat):
+        started = time.perf_counter()
+        tables = load()
+        loaded = time.perf_counter()
+        analyse(tables)
+        finished = time.perf_counter()
+        if finished - started < sum(best):
+            best = (loaded - started, finished - loaded)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data-dir', default='.', help="directory with orders.csv, order_items.csv, products.csv")
+    parser.add_argument('--repeat', type=int, default=5, help="runs per variant; the best time is reported")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as cache_dir, tempfile.TemporaryDirectory() as scratch:
+        failures = check_equivalence(args.data_dir, cache_dir)
+        failures += [f"{name} (orders without items)" for name in
+                     check_equivalence(drop_items(args.data_dir, scratch), os.path.join(scratch, 'cache'))]
+        for failure in failures:
+            print(f"  FAIL {failure} differs from the notebook")
+
+        def cold_load():
+            return order_analytics.load_tables(args.data_dir, cache_dir, rebuild=True)[:2]
+
+        def warm_load():
+            fact, orders, cached = order_analytics.load_tables(args.data_dir, cache_dir)
+            assert cached, "the order tables cache should be current"
+            return fact, orders
+
+        timings = {
+            'notebook': time_variant(lambda: notebook_load(args.data_dir),
+                                     lambda tables: notebook_analyses(*tables), args.repeat),
+            'cold': time_variant(cold_load, lambda tables: order_analytics.run_all(*tables), args.repeat),
+            'warm': time_variant(warm_load, lambda tables: order_analytics.run_all(*tables), args.repeat),
+        }
+        fact, orders, _ = order_analytics.load_tables(args.data_dir, cache_dir)
+        fact_mb = (fact.memory_usage(deep=True).sum() + orders.memory_usage(deep=True).sum()) / 1e6
+
+    raw_mb = sum(pd.read_csv(f'{args.data_dir}/{name}').memory_usage(deep=True).sum()
+                 for name in order_analytics.SOURCES.values()) / 1e6
+    print(f"{len(fact):,} order items; default-dtype tables {raw_mb:.1f} MB, typed order tables {fact_mb:.1f} MB\n")
+    print(f"{'variant':<10} {'load (s)':>9} {'analyses (s)':>13} {'total (s)':>10} {'vs notebook':>12}")
+    notebook_total = sum(timings['notebook'])
+    for name, (load, analyses) in timings.items():
+        total = load + analyses
+        print(f"{name:<10} {load:>9.3f} {analyses:>13.3f} {total:>10.3f} {notebook_total / total:>11.1f}x")
+    print("\n(the module runs all ANALYSES, a superset of the notebook's groupbys)")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""Order rollup cube: answers vs the raw fact table, and query latency.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_order_cube
+    python -m benchmarks.bench_order_cube --data-dir /tmp/sales_1m --queries 500
+
+Random queries (1-3 group-by dimensions, 0-2 filters) are answered by
+OrderCube.query and by OrderCube.raw_query on the fact table; every answer must
+match. Queries that leave category out are also checked against a plain
+groupby over orders.csv, which catches orders the fact table misses. Both
+checks run on the data and on a copy in which every tenth order has no items.
+The script exits non-zero on any mismatch. Latency percentiles are reported
+for both sources.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import order_analytics
+from benchmarks.bench_order_analytics import drop_items
+from order_cube import DIMENSIONS, OrderCube
+
+ORDER_DIMENSIONS = [dim for dim in DIMENSIONS if dim != 'category']
+
+
+def random_queries(cube, n_queries, rng):
+    queries = []
+    while len(queries) < n_queries:
+        dims = rng.permutation(DIMENSIONS)
+        by = sorted(dims[:rng.integers(0, 4)].tolist(), key=DIMENSIONS.index)
+        where = {}
+        for dim in dims[len(by):len(by) + rng.integers(0, 3)].tolist():
+            labels = cube.labels[dim]
+            picked = rng.choice(labels, size=min(len(labels), rng.integers(1, 3)), replace=False).tolist()
+            where[dim] = picked[0] if len(picked) == 1 else picked
+        if cube.answerable(by, where):
+            queries.append((by, where))
+    return queries
+
+
+def read_orders_csv(data_dir):
+    """orders.csv with the cube's order-level dimensions derived by plain pandas"""
+    orders = pd.read_csv(os.path.join(data_dir, 'orders.csv'), parse_dates=['order_date'])
+    dates = orders['order_date']
+    return orders.assign(year=dates.dt.year, quarter=dates.dt.quarter, month=dates.dt.month,
+                         day_of_week=dates.dt.day_name())
+
+
+def orders_csv_answer(orders, by, where):
+    """(order_count, total_amount) per group label tuple, straight from orders.csv"""
+    for dim, values in where.items():
+        orders = orders[orders[dim].isin(values if isinstance(values, list) else [values])]
+    if not by:
+        return {(): (len(orders), orders['total_amount'].sum())}
+    grouped = orders.groupby(by)['total_amount'].agg(['count', 'sum'])
+    return {tuple(str(label) for label in (key if isinstance(key, tuple) else (key,))): (count, total)
+            for key, (count, total) in grouped.iterrows()}
+
+
+def cube_answer(answer, by):
+    if not by:
+        return {(): tuple(answer.iloc[0][['order_count', 'total_amount']])}
+    return {tuple(str(label) for label in (key if isinstance(key, tuple) else (key,))):
+            (row['order_count'], row['total_amount']) for key, row in answer.iterrows()}
+
+
+def same_answers(left, right):
+    return left.keys() == right.keys() and all(
+        left[key][0] == right[key][0] and np.isclose(left[key][1], right[key][1], rtol=1e-9) for key in left)
+
+
+def check_cube(cube, queries, orders):
+    """Mismatch descriptions of the cube against raw_query and, without category, against orders.csv"""
+    failures = []
+    for by, where in queries:
+        answer, expected = cube.query(by, where), cube.raw_query(by, where)
+        same = (list(answer.index) == list(expected.index)
+                and np.allclose(answer.to_numpy(dtype=float), expected.to_numpy(dtype=float), rtol=1e-9))
+        if not same:
+            failures.append(f"by={by} where={where} (raw_query)")
+        if set(by) | set(where) <= set(ORDER_DIMENSIONS):
+            if not same_answers(cube_answer(answer, by), orders_csv_answer(orders, by, where)):
+                failures.append(f"by={by} where={where} (orders.csv)")
+    return failures
+
+
+def latency(function, queries):
+    timings = []
+    for by, where in queries:
+        started = time.perf_counter()
+        function(by, where)
+        timings.append(time.perf_counter() - started)
+    return np.percentile(np.array(timings) * 1000, [50, 99])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data-dir', default='.', help="directory with orders.csv, order_items.csv, products.csv")
+    parser.add_argument('--queries', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args(argv)
+
+    fact, orders, _ = order_analytics.load_tables(args.data_dir)
+    started = time.perf_counter()
+    cube = OrderCube(fact, orders)
+    print(f"Cube: {len(cube):,} cells from {len(fact):,} order items, built in {time.perf_counter() - started:.3f}s")
+
+    queries = random_queries(cube, args.queries, np.random.default_rng(args.seed))
+    failures = check_cube(cube, queries, read_orders_csv(args.data_dir))
+    with tempfile.TemporaryDirectory() as scratch:
+        drop_items(args.data_dir, scratch)
+        sparse_fact, sparse_orders, _ = order_analytics.load_tables(scratch, os.path.join(scratch, 'cache'))
+        sparse = OrderCube(sparse_fact, sparse_orders)
+        sparse_queries = random_queries(sparse, args.queries, np.random.default_rng(args.seed))
+        failures += [f"{failure}, orders without items" for failure in
+                     check_cube(sparse, sparse_queries, read_orders_csv(scratch))]
+
+    cube_p50, cube_p99 = latency(cube.query, queries)
+    raw_p50, raw_p99 = latency(cube.raw_query, queries)
+    print(f"{len(queries)} random queries on each dataset, {len(failures)} mismatches\n")
+    print(f"{'source':<8} {'p50 ms':>9} {'p99 ms':>9}")
+    print(f"{'cube':<8} {cube_p50:>9.3f} {cube_p99:>9.3f}")
+    print(f"{'raw':<8} {raw_p50:>9.3f} {raw_p99:>9.3f}")
+    print(f"\nMedian speedup: {raw_p50 / cube_p50:.0f}x")
+    for failure in failures[:20]:
+        print(f"  FAIL {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+"""Rolling-window KPIs: the incremental engine vs pandas rolling(), and the cost of a daily append.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_rolling_kpis
+    python -m benchmarks.bench_rolling_kpis --sub-regions 100 --append-days 30
+
+Two datasets are checked:
+
+- numpy: every region every day, with --sub-regions regions per region.
+- loop: one random region per day, so regions have gaps in their history.
+
+Each one goes through RollingKpis in random-sized chunks, and every KPI per
+region (and across all regions) on every day with data is compared with
+``groupby(...).rolling('7D'/'28D').sum()`` in pandas.
+
+The numpy dataset is then written to a CSV minus its last --append-days days.
+Those days are appended one at a time, each followed by update_rolling on the
+persisted state. The final state must match pandas and a from-scratch rebuild.
+The script exits non-zero on any mismatch. It then reports the time per
+append next to re-reading the CSV and recomputing with pandas.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# the KPI project keeps its modules in kpiproject/ and imports them as top-level names
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'kpiproject'))
+import generate_kpi_data  # noqa: E402
+from rolling_kpis import (ALL_REGIONS, KPIS, MEASURES, WINDOWS, RollingKpis, update_rolling,  # noqa: E402
+                          window_kpis)
+
+
+def pandas_rolling(df, window):
+    """KPIs per (Region, Date) and per Date across regions, from pandas rolling() over calendar days"""
+    data = pd.DataFrame({
+        'Date': pd.to_datetime(df['Date']),
+        'Region': df['Region'],
+        'revenue': df['Revenue'],
+        'orders': df['Orders'],
+        'visitors': df['Website_Visitors'],
+        'spend': df['Marketing_Spend'],
+        'new_customers': df['Marketing_Spend'] / df['Customer_Acquisition_Cost'],
+    })
+    sums = ['revenue', 'orders', 'visitors', 'spend', 'new_customers']
+    daily = data.groupby(['Region', 'Date'])[sums].sum().reset_index()
+    regional = daily.set_index('Date').groupby('Region')[sums].rolling(f'{window}D').sum()
+    overall = data.groupby('Date')[sums].sum().rolling(f'{window}D').sum()
+    overall.index = pd.MultiIndex.from_product([[ALL_REGIONS], overall.index], names=['Region', 'Date'])
+    rolled = pd.concat([overall, regional])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return pd.DataFrame({
+            'revenue': rolled['revenue'],
+            'orders': rolled['orders'],
+            'conversion': rolled['orders'] / rolled['visitors'],
+            'aov': rolled['revenue'] / rolled['orders'],
+            'cac': rolled['spend'] / rolled['new_customers'],
+        })
+
+
+def engine_rolling(df, rng):
+    """The same table from RollingKpis snapshots, fed in random-sized chunks"""
+    engine = RollingKpis(WINDOWS)
+    snapshots = []
+    cuts = np.sort(rng.choice(np.arange(1, len(df)), size=min(20, len(df) - 1), replace=False))
+    for chunk in np.split(np.arange(len(df)), cuts):
+        engine.ingest(df.iloc[chunk], snapshots)
+    final = {}
+    for day, sums in snapshots:
+        final[day] = sums
+    tables = {}
+    for i, window in enumerate(engine.windows):
+        rows = []
+        for day, sums in final.items():
+            regional = np.vstack([sums[i].sum(axis=0, keepdims=True), sums[i]])
+            kpis = window_kpis(regional)
+            date = pd.Timestamp(np.datetime64(day, 'D'))
+            # regions are only ever appended, so an earlier day's sums cover a prefix of them
+            for j, region in enumerate([ALL_REGIONS] + engine.regions[:sums.shape[1]]):
+                if regional[j, MEASURES.index('Rows')] > 0:
+                    rows.append({'Region': region, 'Date': date, **{kpi: kpis[kpi][j] for kpi in KPIS}})
+        tables[window] = pd.DataFrame(rows).set_index(['Region', 'Date'])
+    return tables
+
+
+def compare(actual, expected):
+    """Mismatch descriptions between two KPI tables, checked on the (Region, Date) pairs pandas has data for"""
+    problems = []
+    observed = expected.index.intersection(actual.index)
+    if len(observed) != len(expected):
+        problems.append(f"{len(expected) - len(observed)} (region, day) pairs missing from the engine")
+    for kpi in KPIS:
+        left = actual.loc[observed, kpi].to_numpy(dtype=float)
+        right = expected.loc[observed, kpi].to_numpy(dtype=float)
+        bad = ~np.isclose(left, right, rtol=1e-9, atol=1e-6, equal_nan=True)
+        if bad.any():
+            where = observed[np.flatnonzero(bad)[0]]
+            problems.append(f"{kpi}: {bad.sum()} mismatches, first at {where}")
+    return problems
+
+
+def last_day_table(snapshot):
+    return snapshot.rename(columns={'region': 'Region'}).set_index(['window', 'Region'])[KPIS]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=int, default=730)
+    parser.add_argument('--sub-regions', type=int, default=25, help="numpy dataset: sub-regions per region")
+    parser.add_argument('--append-days', type=int, default=14)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args(argv)
+    rng = np.random.default_rng(args.seed)
+
+    datasets = {
+        'numpy': generate_kpi_data.generate_frame(args.days, sub_regions=args.sub_regions),
+        'loop': pd.DataFrame(generate_kpi_data.generate_rows(args.days)),
+    }
+    failures = []
+    for name, df in datasets.items():
+        tables = engine_rolling(df, rng)
+        for window in WINDOWS:
+            for problem in compare(tables[window], pandas_rolling(df, window)):
+                failures.append(f"{name} {window}d: {problem}")
+        print(f"{name}: {len(df):,} rows, {df['Region'].nunique()} regions checked against pandas rolling()")
+
+    # daily appends to a CSV with the state persisted between runs
+    df = datasets['numpy']
+    dates = pd.to_datetime(df['Date'])
+    cutoff = dates.max() - pd.Timedelta(days=args.append_days)
+    with tempfile.TemporaryDirectory() as scratch:
+        csv_path = os.path.join(scratch, 'ecommerce_kpi.csv')
+        state_path = os.path.join(scratch, 'rolling_state.npz')
+        df[dates <= cutoff].to_csv(csv_path, index=False)
+        started = time.perf_counter()
+        update_rolling([csv_path], state_path)
+        build_seconds = time.perf_counter() - started
+
+        append_seconds = []
+        for day, rows in df[dates > cutoff].groupby(dates[dates > cutoff]):
+            rows.to_csv(csv_path, mode='a', header=False, index=False)
+            started = time.perf_counter()
+            engine, added, rebuilt = update_rolling([csv_path], state_path)
+            append_seconds.append(time.perf_counter() - started)
+            if rebuilt or added != len(rows):
+                failures.append(f"append of {day:%Y-%m-%d}: read {added} rows (rebuilt={rebuilt}), "
+                                f"expected {len(rows)}")
+
+        started = time.perf_counter()
+        full = pd.read_csv(csv_path)
+        expected = {window: pandas_rolling(full, window) for window in WINDOWS}
+        pandas_seconds = time.perf_counter() - started
+
+        last = pd.Timestamp(engine.as_of())
+        incremental = last_day_table(engine.snapshot())
+        from_scratch = last_day_table(update_rolling([csv_path], state_path, rebuild=True)[0].snapshot())
+        for window in WINDOWS:
+            at_last = expected[window].xs(last, level='Date')
+            for problem in compare(incremental.loc[window], at_last):
+                failures.append(f"after appends {window}d: {problem}")
+        if not np.allclose(incremental.to_numpy(dtype=float), from_scratch.to_numpy(dtype=float),
+                           rtol=1e-9, equal_nan=True):
+            failures.append("incremental state differs from a rebuild")
+
+    print(f"\n{args.append_days} daily appends of {df['Region'].nunique()} regions "
+          f"to a {len(df):,}-row CSV (state built in {build_seconds:.3f}s)\n")
+    print(f"{'variant':<28} {'ms per day':>11}")
+    print(f"{'update_rolling (append)':<28} {np.median(append_seconds) * 1000:>11.2f}")
+    print(f"{'pandas re-read + rolling':<28} {pandas_seconds * 1000:>11.2f}")
+    print(f"\nSpeedup: {pandas_seconds / np.median(append_seconds):.0f}x")
+    for failure in failures[:20]:
+        print(f"  FAIL {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,282 @@
+"""Scaling benchmark suite: every generator and the dashboard build at several sizes.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_suite --output bench.json
+    python -m benchmarks.bench_suite --scales 1000 100000 10000000 --stages sales weather
+    python -m benchmarks.bench_suite --output new.json --compare bench.json --threshold 0.2
+
+Each (stage, scale) runs --repeat times, each run in a fresh interpreter so
+that its peak RSS is its own. The child calls the stage's main(argv) in a
+scratch directory with stdout discarded; inputs and caches a stage needs are
+prepared by an earlier, untimed child. Per (stage, scale) the suite records:
+
+- rows: rows the stage wrote (for dashboard: rows it read)
+- seconds: the best wall time across runs, with rows/sec derived from it
+- peak_rss_mb: the largest peak RSS across runs
+
+Stage scales are approximate. A scale sets the order count for sales, the
+bill count for electricity, and days x cities for weather. For kpi and
+dashboard it sets days x segments; the dashboard's input is generated before
+the timed build. rows is always measured from the output files.
+
+--output writes the results as JSON, together with the commit, Python
+version and CPU count. --compare checks them against an earlier file. Any
+stage and scale that got slower or bigger by more than --threshold (relative,
+default 0.2) is listed, and the script exits non-zero. Runs shorter than
+--min-seconds are too noisy to compare on time, so only their memory is
+checked.
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+KPI_DIR = os.path.join(ROOT, 'kpiproject')
+DEFAULT_SCALES = [1000, 10000, 100000, 1000000]
+POOL_SIZE = 10000
+WEATHER_START_YEAR = 2001
+KPI_REGIONS = 4
+KPI_DAYS = 730
+
+
+def count_rows(paths):
+    """Data rows (lines minus the header) across CSV files"""
+    rows = 0
+    for path in paths:
+        with open(path, 'rb') as handle:
+            lines = sum(block.count(b'\n') for block in iter(lambda: handle.read(1 << 20), b''))
+        rows += max(lines - 1, 0)
+    return rows
+
+
+def kpi_shape(scale):
+    # numpy engine rows = days x regions x sub-regions
+    if scale <= KPI_DAYS * KPI_REGIONS:
+        return max(1, math.ceil(scale / KPI_REGIONS)), 1
+    return KPI_DAYS, math.ceil(scale / (KPI_DAYS * KPI_REGIONS))
+
+
+def kpi_args(scale, output):
+    days, sub_regions = kpi_shape(scale)
+    return ['--engine', 'numpy', '--days', str(days), '--sub-regions', str(sub_regions), '--output', output]
+
+
+# Each stage: the module holding main(argv), the argv for a scale (run inside
+# the scratch directory), the CSVs its rows are counted from, and an optional
+# untimed setup that prepares inputs or caches.
+
+def sales_argv(scale):
+    return ['--orders', str(scale), '--customers', str(max(100, scale // 10)), '--stream',
+            '--end-date', '2025-12-31', '--faker-pool', str(POOL_SIZE), '--pool-cache', 'pools']
+
+
+def sales_setup(scale):
+    # build the Faker pools once, untimed; the run then reads them from the cache
+    import faker_pool
+    faker_pool.load_pools(['name', 'email', 'phone_number', 'word'], POOL_SIZE, locale='en_IN', seed=42,
+                          cache_dir='pools')
+
+
+def weather_argv(scale):
+    # 16 cities a year per copy; grow the years to 20, then the copies
+    cities_per_year = 365 * 16
+    years = min(20, max(1, math.ceil(scale / cities_per_year)))
+    copies = max(1, math.ceil(scale / (cities_per_year * years)))
+    return ['--start-year', str(WEATHER_START_YEAR), '--end-year', str(WEATHER_START_YEAR + years - 1),
+            '--city-copies', str(copies), '--seed', '1', '--flush', 'year']
+
+
+def weather_outputs(argv):
+    return [f'indian_weather_{argv[1]}_{argv[3]}.csv']
+
+
+def dashboard_setup(scale):
+    import generate_kpi_data
+    generate_kpi_data.main(kpi_args(scale, 'input.csv'))
+
+
+STAGES = {
+    'sales': {
+        'module': 'sales',
+        'argv': sales_argv,
+        'outputs': lambda argv: ['products.csv', 'customers.csv', 'orders.csv', 'order_items.csv'],
+        'setup': sales_setup,
+    },
+    'electricity': {
+        'module': 'electricity',
+        'argv': lambda scale: ['--records', str(scale), '--chunk-size', str(min(scale, 1_000_000))],
+        'outputs': lambda argv: ['eb.csv'],
+    },
+    'weather': {
+        'module': 'generate_weather_data',
+        'argv': weather_argv,
+        'outputs': weather_outputs,
+    },
+    'kpi': {
+        'module': 'generate_kpi_data',
+        'argv': lambda scale: kpi_args(scale, 'ecommerce_kpi.csv'),
+        'outputs': lambda argv: ['ecommerce_kpi.csv'],
+    },
+    'dashboard': {
+        'module': 'build_dashboard',
+        'argv': lambda scale: ['--data', 'input.csv', '--output-dir', 'dashboard', '--force'],
+        'outputs': lambda argv: ['input.csv'],
+        'setup': dashboard_setup,
+    },
+}
+
+
+def run_stage(stage, scale, workdir, setup=False):
+    """Run one stage, or only its setup, in this process (the child side); returns its measurements"""
+    spec = STAGES[stage]
+    for path in (ROOT, KPI_DIR):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    os.chdir(workdir)
+    argv = spec['argv'](scale)
+    with contextlib.redirect_stdout(io.StringIO()):
+        if setup:
+            spec['setup'](scale)
+            return {}
+        main = __import__(spec['module']).main
+        started = time.perf_counter()
+        main(argv)
+        seconds = time.perf_counter() - started
+    return {'rows': count_rows(spec['outputs'](argv)), 'seconds': seconds, 'peak_rss_mb': peak_rss_mb()}
+
+
+def peak_rss_mb():
+    # like sales.peak_rss_mb, without importing sales (and Faker) into every child
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_child(stage, scale, workdir, setup=False):
+    command = [sys.executable, '-m', 'benchmarks.bench_suite', '--child', stage, str(scale), workdir]
+    completed = subprocess.run(command + (['--setup'] if setup else []), cwd=ROOT, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"{stage} at {scale:,} failed:\n{completed.stderr[-2000:]}")
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def measure(stage, scale, repeat, scratch):
+    """Best time and largest peak RSS of `repeat` fresh-process runs"""
+    runs = []
+    for _ in range(repeat):
+        workdir = tempfile.mkdtemp(dir=scratch)
+        try:
+            # setup runs in its own process so its memory does not count towards the stage's peak
+            if 'setup' in STAGES[stage]:
+                run_child(stage, scale, workdir, setup=True)
+            runs.append(run_child(stage, scale, workdir))
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    seconds = min(run['seconds'] for run in runs)
+    rows = runs[0]['rows']
+    return {'stage': stage, 'scale': scale, 'rows': rows, 'seconds': round(seconds, 4),
+            'rows_per_s': round(rows / max(seconds, 1e-9)),
+            'peak_rss_mb': round(max(run['peak_rss_mb'] or 0 for run in runs), 1)}
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold, min_seconds):
+    """Regressions of results vs a baseline results file, as printable lines"""
+    previous = {(row['stage'], row['scale']): row for row in baseline['results']}
+    regressions = []
+    for row in results:
+        before = previous.get((row['stage'], row['scale']))
+        if before is None:
+            continue
+        checks = [('peak_rss_mb', 'MB')]
+        if max(row['seconds'], before['seconds']) >= min_seconds:
+            checks.insert(0, ('seconds', 's'))
+        for key, unit in checks:
+            if before[key] and row[key] > before[key] * (1 + threshold):
+                regressions.append(f"{row['stage']} @ {row['scale']:,}: {key} {before[key]:,.3f}{unit} -> "
+                                   f"{row[key]:,.3f}{unit} (+{row[key] / before[key] - 1:.0%})")
+    return regressions
+
+
+def print_results(results):
+    print(f"{'stage':<12} {'scale':>10} {'rows':>11} {'seconds':>9} {'rows/s':>11} {'peak MB':>9}")
+    for row in results:
+        print(f"{row['stage']:<12} {row['scale']:>10,} {row['rows']:>11,} {row['seconds']:>9.3f} "
+              f"{row['rows_per_s']:>11,} {row['peak_rss_mb']:>9.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES))
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES,
+                        help="approximate rows per stage run (default: 1e3 to 1e6; add 10000000 for 1e7)")
+    parser.add_argument('--repeat', type=int, default=1, help="fresh-process runs per stage and scale")
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--compare', metavar='BASELINE', help="results JSON of an earlier run to check against")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="relative growth in time or peak RSS reported as a regression (default: 0.2)")
+    parser.add_argument('--min-seconds', type=float, default=0.5,
+                        help="runs faster than this (in both files) are compared on memory only")
+    parser.add_argument('--scratch', default=None, help="directory for the stages' output (default: system temp)")
+    parser.add_argument('--child', nargs=3, metavar=('STAGE', 'SCALE', 'WORKDIR'), help=argparse.SUPPRESS)
+    parser.add_argument('--setup', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        stage, scale, workdir = args.child
+        print(json.dumps(run_stage(stage, int(scale), workdir, args.setup)))
+        return
+
+    results = []
+    for stage in args.stages:
+        for scale in args.scales:
+            row = measure(stage, scale, args.repeat, args.scratch)
+            results.append(row)
+            print(f"  {stage} @ {scale:,}: {row['seconds']:.3f}s, {row['peak_rss_mb']:.1f} MB", file=sys.stderr)
+    print_results(results)
+
+    report = {
+        'commit': git_commit(),
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as handle:
+            baseline = json.load(handle)
+        regressions = compare(results, baseline, args.threshold, args.min_seconds)
+        print(f"\nCompared with {args.compare} (commit {baseline.get('commit')}): "
+              f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+        for regression in regressions:
+            print(f"  REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""Vectorized vs per-day loop weather generation: equivalence check and speedup.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_weather_engine
+    python -m benchmarks.bench_weather_engine --years 1 5 20 --city-multipliers 1 4 16
+
+The equivalence check generates the same period with both engines and
+compares, per city and month, the means of every numeric column, the share of
+rain days and, per city, the share of every Weather_Condition. Differences must
+stay within --z standard errors; the script exits non-zero otherwise.
+
+City counts are scaled by cloning the built-in city patterns under new names.
+"""
+import argparse
+import contextlib
+import io
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import generate_weather_data as weather
+
+NUMERIC_COLUMNS = ['Temperature_Min_C', 'Temperature_Max_C', 'Humidity_Percent', 'Rainfall_mm', 'Wind_Speed_kmh']
+
+
+def run_quietly(function, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args, **kwargs)
+
+
+def check_equivalence(start_year, end_year, z_limit, seed):
+    np.random.seed(seed)
+    random.seed(seed)
+    loop = run_quietly(weather.generate_weather_dataset, start_year, end_year)
+    vectorized = run_quietly(weather.generate_weather_dataset_vectorized, start_year, end_year, seed=seed)
+
+    failures = []
+    if list(loop.columns) != list(vectorized.columns) or len(loop) != len(vectorized):
+        failures.append("schema or row count differs")
+    if not (loop[['Date', 'City']].astype(str).to_numpy() == vectorized[['Date', 'City']].astype(str).to_numpy()).all():
+        failures.append("(Date, City) ordering differs")
+
+    for frame in (loop, vectorized):
+        frame['Month'] = pd.to_datetime(frame['Date']).dt.month
+        frame['Rain_Day'] = frame['Rainfall_mm'] > 0
+
+    worst_z = 0.0
+    groups_a = loop.groupby(['City', 'Month'])
+    groups_b = vectorized.groupby(['City', 'Month'])
+    for column in NUMERIC_COLUMNS + ['Rain_Day']:
+        stats_a = groups_a[column].agg(['mean', 'var', 'count'])
+        stats_b = groups_b[column].agg(['mean', 'var', 'count'])
+        standard_error = np.sqrt(stats_a['var'] / stats_a['count'] + stats_b['var'] / stats_b['count'])
+        z = ((stats_a['mean'] - stats_b['mean']).abs() / standard_error.replace(0, np.nan)).fillna(0)
+        worst_z = max(worst_z, z.max())
+        for (city, month), value in z[z > z_limit].items():
+            failures.append(f"{column} mean for {city}/{month}: z={value:.1f}")
+
+    # two-proportion z-test on the share of each condition within each city
+    counts_a = pd.crosstab(loop['City'], loop['Weather_Condition'])
+    counts_b = pd.crosstab(vectorized['City'], vectorized['Weather_Condition'])
+    counts_a, counts_b = counts_a.align(counts_b, fill_value=0)
+    n_a = counts_a.sum(axis=1).to_numpy()[:, None]
+    n_b = counts_b.sum(axis=1).to_numpy()[:, None]
+    pooled = (counts_a + counts_b) / (n_a + n_b)
+    standard_error = np.sqrt(pooled * (1 - pooled) * (1 / n_a + 1 / n_b))
+    z = ((counts_a / n_a - counts_b / n_b).abs() / standard_error.replace(0, np.nan)).fillna(0)
+    worst_condition_z = z.to_numpy().max()
+    for (city, condition), value in z.stack()[z.stack() > z_limit].items():
+        failures.append(f"Weather_Condition share of {condition!r} for {city}: z={value:.1f}")
+
+    print(f"Equivalence ({start_year}-{end_year}, {len(loop):,} rows): worst |z| = {worst_z:.2f} (numeric), "
+          f"{worst_condition_z:.2f} (conditions)")
+    return failures
+
+
+def benchmark(years_list, multipliers, max_loop_rows):
+    print(f"\n{'years':>6} {'cities':>7} {'rows':>12} {'loop (s)':>10} {'vectorized (s)':>15} {'speedup':>9}")
+    for years in years_list:
+        for multiplier in multipliers:
+            patterns = weather.replicate_patterns(multiplier)
+            start_year, end_year = 2021, 2021 + years - 1
+            rows = len(pd.date_range(f'{start_year}-01-01', f'{end_year}-12-31')) * len(patterns)
+
+            started = time.perf_counter()
+            run_quietly(weather.generate_weather_dataset_vectorized, start_year, end_year, patterns, seed=42)
+            vectorized_seconds = time.perf_counter() - started
+
+            if rows <= max_loop_rows:
+                started = time.perf_counter()
+                run_quietly(weather.generate_weather_dataset, start_year, end_year, patterns)
+                loop_seconds = time.perf_counter() - started
+                loop_text = f"{loop_seconds:.2f}"
+            else:
+                # time one year and scale linearly by row count
+                started = time.perf_counter()
+                run_quietly(weather.generate_weather_dataset, 2021, 2021, weather.city_weather_patterns)
+                sample_rows = 365 * len(weather.city_weather_patterns)
+                loop_seconds = (time.perf_counter() - started) * rows / sample_rows
+                loop_text = f"~{loop_seconds:.1f}"
+
+            print(f"{years:>6} {len(patterns):>7} {rows:>12,} {loop_text:>10} {vectorized_seconds:>15.3f} "
+                  f"{loop_seconds / vectorized_seconds:>8.0f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--years', type=int, nargs='+', default=[1, 5, 20])
+    parser.add_argument('--city-multipliers', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--max-loop-rows', type=int, default=200000,
+                        help="largest grid timed with the loop engine; larger ones are extrapolated (marked ~)")
+    parser.add_argument('--z', type=float, default=4.5, help="per-cell z-score limit for the equivalence check")
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args(argv)
+
+    failures = check_equivalence(2021, 2025, args.z, args.seed)
+    for failure in failures:
+        print(f"  FAIL {failure}")
+    benchmark(args.years, args.city_multipliers, args.max_loop_rows)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
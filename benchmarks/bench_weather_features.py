@@ -0,0 +1,135 @@
+"""Vectorized weather features vs the notebook's per-column passes and apply.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_weather_features
+    python -m benchmarks.bench_weather_features --rows 1000000 50000000 --max-notebook-rows 50000000
+
+Synthetic multi-station, multi-decade frames (ISO date strings, one row per
+station per day from 1950 on; large sizes add stations to stay within 70 years) are featurized by the notebook's code and by
+weather_features.add_features. At the first size every derived column is
+compared with the notebook's, for the daily layout and for the hourly one
+(``YYYY-MM-DD HH:MM:SS``, one row per station per hour); the script exits
+non-zero on a mismatch.
+
+Both sides are timed chunk by chunk (--chunk-size rows, generation excluded),
+so 50M rows fit in memory. The notebook is only run up to --max-notebook-rows;
+beyond that its time is extrapolated linearly from the largest measured size
+(marked ~).
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from weather_features import FEATURES, add_features
+
+START = np.datetime64('1950-01-01')
+MAX_DAYS = 365 * 70
+
+
+def make_chunk(first_row, n_rows, stations, rng, unit='D'):
+    rows = np.arange(first_row, first_row + n_rows)
+    steps = rows // stations
+    start = START.astype(f'datetime64[{unit}]')
+    step_strings = np.datetime_as_string(start + np.arange(steps[0], steps[-1] + 1),
+                                         unit='D' if unit == 'D' else 's').astype(object)
+    if unit != 'D':
+        # hourly CSVs write a space between date and time, as generate_weather_data.py does
+        step_strings = np.char.replace(step_strings.astype(str), 'T', ' ').astype(object)
+    low = rng.normal(20, 6, n_rows).round(1)
+    return pd.DataFrame({
+        'Date': step_strings[steps - steps[0]],
+        'City': pd.Categorical.from_codes(rows % stations, [f'Station_{i:04d}' for i in range(stations)]),
+        'Temperature_Min_C': low,
+        'Temperature_Max_C': (low + rng.uniform(4, 14, n_rows)).round(1),
+    })
+
+
+def get_season(month):
+    if month in [12, 1, 2]:
+        return 'Winter'
+    elif month in [3, 4, 5]:
+        return 'Summer'
+    elif month in [6, 7, 8, 9]:
+        return 'Monsoon'
+    else:
+        return 'Autumn'
+
+
+def notebook_features(df):
+    """The feature cell of weatheranalytics.ipynb"""
+    df['Date'] = pd.to_datetime(df['Date'])
+    df['Year'] = df['Date'].dt.year
+    df['Month'] = df['Date'].dt.month
+    df['Month_Name'] = df['Date'].dt.strftime('%B')
+    df['Week'] = df['Date'].dt.isocalendar().week
+    df['Day_of_Year'] = df['Date'].dt.dayofyear
+    df['Season'] = df['Month'].apply(get_season)
+    df['Avg_Temp'] = (df['Temperature_Min_C'] + df['Temperature_Max_C']) / 2
+    return df
+
+
+def check_equivalence(n_rows, stations, seed, unit='D'):
+    frame = make_chunk(0, n_rows, stations, np.random.default_rng(seed), unit)
+    expected = notebook_features(frame.copy())
+    actual = add_features(frame)
+    failures = []
+    for column in ['Date'] + FEATURES:
+        left = expected[column].astype(str).to_numpy() if column in ('Month_Name', 'Season') else \
+            expected[column].to_numpy(dtype='datetime64[ns]' if column == 'Date' else float)
+        right = actual[column].astype(str).to_numpy() if column in ('Month_Name', 'Season') else \
+            actual[column].to_numpy(dtype='datetime64[ns]' if column == 'Date' else float)
+        if not np.array_equal(left, right):
+            failures.append(column)
+    return failures
+
+
+def time_featurize(function, n_rows, stations, chunk_size, seed):
+    rng = np.random.default_rng(seed)
+    elapsed = 0.0
+    for first_row in range(0, n_rows, chunk_size):
+        chunk = make_chunk(first_row, min(chunk_size, n_rows - first_row), stations, rng)
+        started = time.perf_counter()
+        function(chunk)
+        elapsed += time.perf_counter() - started
+    return elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000_000, 50_000_000])
+    parser.add_argument('--stations', type=int, default=200)
+    parser.add_argument('--chunk-size', type=int, default=2_000_000)
+    parser.add_argument('--max-notebook-rows', type=int, default=2_000_000,
+                        help="largest size timed with the notebook code; larger ones are extrapolated (marked ~)")
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args(argv)
+
+    failures = check_equivalence(min(args.rows), args.stations, args.seed)
+    failures += [f"{column} (hourly)" for column in check_equivalence(min(args.rows), args.stations, args.seed, 'h')]
+    print(f"Equivalence on {min(args.rows):,} rows: "
+          f"{'all features match' if not failures else 'MISMATCH in ' + ', '.join(failures)}\n")
+
+    print(f"{'rows':>12} {'stations':>9} {'notebook (s)':>13} {'vectorized (s)':>15} {'rows/s':>12} {'speedup':>9}")
+    measured = None
+    for n_rows in args.rows:
+        stations = max(args.stations, -(-n_rows // MAX_DAYS))
+        vectorized = time_featurize(add_features, n_rows, stations, args.chunk_size, args.seed)
+        if n_rows <= args.max_notebook_rows:
+            notebook = time_featurize(notebook_features, n_rows, stations, args.chunk_size, args.seed)
+            measured = (n_rows, notebook)
+            notebook_text = f"{notebook:.2f}"
+        else:
+            notebook = measured[1] * n_rows / measured[0] if measured else float('nan')
+            notebook_text = f"~{notebook:.1f}"
+        print(f"{n_rows:>12,} {stations:>9,} {notebook_text:>13} {vectorized:>15.2f} {n_rows / vectorized:>12,.0f} "
+              f"{notebook / vectorized:>8.1f}x")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
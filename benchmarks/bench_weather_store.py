@@ -0,0 +1,127 @@
+"""Memory-mapped weather store vs pd.read_csv + filter for point, range and scan queries.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_weather_store
+    python -m benchmarks.bench_weather_store --city-copies 1 16 128 --years 10
+
+For each size a weather CSV is generated with generate_weather_data's
+vectorized engine (cities cloned --city-copies times) into a temporary
+directory and converted with weather_store.build_store. Then each query runs
+both ways, and the answers must match (the script exits non-zero otherwise):
+
+- point: every column of one city on one day
+- range: Leh's winter minima and Mumbai's monsoon rainfall for one season
+- scan: mean Rainfall_mm per city over every row
+
+The read_csv side re-reads the CSV for every query, as the notebooks do; the
+store side opens the store fresh for every query, so nothing is cached in
+Python objects between runs (the OS page cache is warm for both).
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import generate_weather_data as weather
+from weather_store import WeatherStore, build_store
+
+
+def csv_queries(csv_path, end_year):
+    def read():
+        return pd.read_csv(csv_path, parse_dates=['Date'])
+
+    def between(df, city, start, end):
+        return df[(df['City'] == city) & (df['Date'] >= start) & (df['Date'] <= end)]
+
+    return {
+        'point': lambda: between(read(), 'Delhi', f'{end_year}-03-04', f'{end_year}-03-04').drop(columns='City'),
+        'range: Leh winter min': lambda: between(read(), 'Leh', f'{end_year - 1}-12-01',
+                                                 f'{end_year}-02-28')[['Date', 'Temperature_Min_C']],
+        'range: Mumbai monsoon rain': lambda: between(read(), 'Mumbai', f'{end_year}-06-01',
+                                                      f'{end_year}-09-30')[['Date', 'Rainfall_mm']],
+        'scan: rain by city': lambda: read().groupby('City')['Rainfall_mm'].mean(),
+    }
+
+
+def store_queries(path, end_year):
+    return {
+        'point': lambda: WeatherStore(path).point('Delhi', f'{end_year}-03-04'),
+        'range: Leh winter min': lambda: WeatherStore(path).query(
+            'Leh', f'{end_year - 1}-12-01', f'{end_year}-02-28', ['Temperature_Min_C']),
+        'range: Mumbai monsoon rain': lambda: WeatherStore(path).query(
+            'Mumbai', f'{end_year}-06-01', f'{end_year}-09-30', ['Rainfall_mm']),
+        'scan: rain by city': lambda: WeatherStore(path).scan(['City', 'Rainfall_mm'])
+        .groupby('City', observed=True)['Rainfall_mm'].mean(),
+    }
+
+
+def same(expected, actual):
+    if isinstance(expected, pd.Series):
+        return expected.index.astype(str).tolist() == actual.index.astype(str).tolist() and \
+            np.allclose(expected.to_numpy(), actual.to_numpy())
+    expected = expected.reset_index(drop=True)
+    if list(expected.columns) != list(actual.columns) or len(expected) != len(actual):
+        return False
+    return all((expected[column].astype(str) == actual[column].astype(str)).all() for column in expected.columns)
+
+
+def best_time(function, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--city-copies', type=int, nargs='+', default=[1, 16])
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    start_year, end_year = 2021, 2021 + args.years - 1
+    failures = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for copies in args.city_copies:
+            patterns = weather.replicate_patterns(copies)
+            with contextlib.redirect_stdout(io.StringIO()):
+                frame = weather.generate_weather_dataset_vectorized(start_year, end_year, patterns, seed=42)
+            csv_path = os.path.join(workdir, f'weather_{copies}.csv')
+            frame.to_csv(csv_path, index=False)
+            del frame
+
+            started = time.perf_counter()
+            path = build_store(csv_path)
+            build_seconds = time.perf_counter() - started
+            store_mb = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)) / 1e6
+            rows = len(WeatherStore(path))
+            print(f"\n{rows:,} rows, {len(patterns)} cities: CSV {os.path.getsize(csv_path) / 1e6:.1f} MB, "
+                  f"store {store_mb:.1f} MB built in {build_seconds:.2f}s")
+            print(f"{'query':<28} {'read_csv (ms)':>14} {'store (ms)':>11} {'speedup':>9}")
+
+            baseline, candidate = csv_queries(csv_path, end_year), store_queries(path, end_year)
+            for name in baseline:
+                if not same(baseline[name](), candidate[name]()):
+                    failures.append(f"{name} with {len(patterns)} cities")
+                csv_seconds = best_time(baseline[name], args.repeat)
+                store_seconds = best_time(candidate[name], args.repeat)
+                print(f"{name:<28} {csv_seconds * 1000:>14.2f} {store_seconds * 1000:>11.3f} "
+                      f"{csv_seconds / store_seconds:>8.0f}x")
+
+    for failure in failures:
+        print(f"  FAIL {failure}: store answer differs from read_csv")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
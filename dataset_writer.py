@@ -0,0 +1,172 @@
+"""Shared output layer for the dataset generators.
+
+Every generator (sales.py, electricity.py, generate_weather_data.py and
+kpiproject/generate_kpi_data.py) writes its tables through TableWriter, which
+can emit CSV, Parquet and/or Feather side by side:
+
+- low-cardinality text columns are written as categoricals, so Parquet and
+  Feather store them dictionary-encoded and readers get them back as category
+  dtype without re-parsing strings;
+- with a partition date column, columnar output becomes a hive-style dataset
+  (``orders.parquet/year=2024/month=3/...``) so readers can prune by date.
+
+Parquet and Feather need pyarrow, which is optional; CSV works without it.
+"""
+import os
+import shutil
+
+import pandas as pd
+
+from stage_profiler import span
+
+FORMATS = ('csv', 'parquet', 'feather')
+
+
+def add_output_arguments(parser):
+    """Add the shared --format / --partition-by-month options to an argparse parser"""
+    parser.add_argument('--format', dest='formats', nargs='+', choices=FORMATS, default=['csv'],
+                        help="output formats to write side by side (default: csv)")
+    parser.add_argument('--partition-by-month', action='store_true',
+                        help="write Parquet/Feather as hive-style year=/month= partitioned datasets")
+    return parser
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as exc:
+        raise ImportError("Parquet/Feather output requires pyarrow (pip install pyarrow)") from exc
+
+
+def remove_output(path):
+    """Delete a previous output file or partitioned dataset directory"""
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+class TableWriter:
+    """Write one table, in one or more chunks, to every requested format.
+
+    base_path is the output path without extension (``out/orders``).
+    categories maps column name -> list of categories, or None to take the
+    categories from the first chunk; later chunks must not introduce new
+    values for such columns. partition_date names the date column used for
+    year/month partitioning of columnar output (CSV is never partitioned).
+    Partitioned datasets go to dataset_base (default: base_path) with files
+    named after part_name; with overwrite=False several writers (e.g. shards)
+    can add to the same dataset directory, which the caller then clears.
+    """
+
+    def __init__(self, base_path, formats=('csv',), categories=None, partition_date=None, part_name='part',
+                 dataset_base=None, overwrite=True):
+        unknown = set(formats) - set(FORMATS)
+        if unknown:
+            raise ValueError(f"Unknown output format(s): {', '.join(sorted(unknown))}")
+        self.base_path = base_path
+        self.formats = list(formats)
+        self.categories = dict(categories or {})
+        self.partition_date = partition_date
+        self.part_name = part_name
+        self.dataset_base = dataset_base or base_path
+        self.overwrite = overwrite
+        self.rows = 0
+        self._chunks = 0
+        self._writers = {}
+        self._schema = None
+        if set(self.formats) - {'csv'}:
+            _require_pyarrow()
+
+    def path(self, fmt):
+        return f"{self.base_path}.{fmt}"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _encode(self, df):
+        df = df.copy(deep=False)
+        for column, categories in self.categories.items():
+            if column not in df:
+                continue
+            if categories is None:
+                categories = sorted(pd.unique(df[column].dropna()))
+                self.categories[column] = categories
+            encoded = pd.Categorical(df[column], categories=categories)
+            if (encoded.codes == -1).sum() != df[column].isna().sum():
+                raise ValueError(f"Column {column!r} has values outside its declared categories")
+            df[column] = encoded
+        return df
+
+    def write(self, df):
+        with span(f"write {os.path.basename(self.base_path)}", rows=len(df)):
+            self._write(df)
+
+    def _write(self, df):
+        first = self._chunks == 0
+        if 'csv' in self.formats:
+            df.to_csv(self.path('csv'), mode='w' if first else 'a', header=first, index=False)
+
+        columnar = [fmt for fmt in self.formats if fmt != 'csv']
+        if columnar:
+            import pyarrow as pa
+
+            table = pa.Table.from_pandas(self._encode(df), preserve_index=False)
+            if self._schema is None:
+                self._schema = table.schema
+            table = table.cast(self._schema)
+            for fmt in columnar:
+                if self.partition_date:
+                    self._write_partitioned(table, df[self.partition_date], fmt, first)
+                else:
+                    self._write_file(table, fmt, first)
+
+        self.rows += len(df)
+        self._chunks += 1
+
+    def _write_file(self, table, fmt, first):
+        import pyarrow.ipc as ipc
+        import pyarrow.parquet as pq
+
+        if first:
+            remove_output(self.path(fmt))
+            if fmt == 'parquet':
+                self._writers[fmt] = pq.ParquetWriter(self.path(fmt), table.schema)
+            else:
+                self._writers[fmt] = ipc.new_file(self.path(fmt), table.schema)
+        self._writers[fmt].write_table(table)
+
+    def _write_partitioned(self, table, dates, fmt, first):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        path = f"{self.dataset_base}.{fmt}"
+        if first and self.overwrite:
+            remove_output(path)
+        dates = pd.to_datetime(dates)
+        table = table.append_column('year', pa.array(dates.dt.year.to_numpy(), pa.int16()))
+        table = table.append_column('month', pa.array(dates.dt.month.to_numpy(), pa.int8()))
+        ds.write_dataset(
+            table,
+            path,
+            format='ipc' if fmt == 'feather' else 'parquet',
+            partitioning=['year', 'month'],
+            partitioning_flavor='hive',
+            basename_template=f"{self.part_name}-{self._chunks:05d}-{{i}}.{fmt}",
+            existing_data_behavior='overwrite_or_ignore',
+        )
+
+    def close(self):
+        for writer in self._writers.values():
+            writer.close()
+        self._writers = {}
+
+
+def write_table(df, base_path, formats=('csv',), categories=None, partition_date=None):
+    """Write a complete DataFrame to every requested format; returns the row count"""
+    with TableWriter(base_path, formats, categories, partition_date) as writer:
+        writer.write(df)
+    return writer.rows
@@ -1,49 +1,179 @@
+import argparse
+import time
+
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-
-# Set random seed for reproducibility
-np.random.seed(42)
 
-# Number of records
-n_records = 100000
+from dataset_writer import TableWriter, add_output_arguments
+from stage_profiler import add_profile_argument, profiling, span
 
 # Generate date range - spread bills across a realistic period
-start_date = datetime(2022, 1, 1)
-end_date = datetime(2024, 12, 31)
-date_range = (end_date - start_date).days
-
-# Generate random dates within the range for each record
-random_days = np.random.randint(0, date_range, size=n_records)
-dates = [start_date + timedelta(days=int(x)) for x in random_days]
-
-# Generate synthetic data with normal distribution
-consumer_ids = np.arange(1001, 1001 + n_records)
-units_consumed = np.random.normal(loc=250, scale=50, size=n_records).clip(min=10)
-rate_per_unit = np.random.normal(loc=5.5, scale=0.5, size=n_records).clip(min=3)
-bill_amount = units_consumed * rate_per_unit + np.random.normal(loc=0, scale=10, size=n_records)
-bill_amount = bill_amount.clip(min=50)
-
-# Additional columns
-meter_numbers = [f"MTR{i:06d}" for i in range(1, n_records + 1)]
-customer_names = [f"Customer_{i}" for i in range(1, n_records + 1)]
-payment_status = np.random.choice(['Paid', 'Pending', 'Overdue'], size=n_records, p=[0.7, 0.2, 0.1])
-
-# Create DataFrame
-df = pd.DataFrame({
-    'Consumer_ID': consumer_ids,
-    'Meter_Number': meter_numbers,
-    'Customer_Name': customer_names,
-    'Bill_Date': dates,
-    'Units_Consumed': np.round(units_consumed, 2),
-    'Rate_Per_Unit': np.round(rate_per_unit, 2),
-    'Bill_Amount': np.round(bill_amount, 2),
-    'Payment_Status': payment_status
-})
-
-# Save to CSV
-df.to_csv('eb.csv', index=False)
-print("Electricity bill dataset generated successfully!")
-print(f"\nDataset shape: {df.shape}")
-print(f"\nFirst few rows:\n{df.head()}")
-print(f"\nStatistics:\n{df[['Units_Consumed', 'Bill_Amount']].describe()}")
\ No newline at end of file
+START_DATE = np.datetime64('2022-01-01')
+END_DATE = np.datetime64('2024-12-31')
+PAYMENT_STATUSES = ['Paid', 'Pending', 'Overdue']
+SUMMARY_COLUMNS = ['Units_Consumed', 'Bill_Amount']
+
+
+def format_ids(prefix, ids, width=0):
+    """Vectorized f"{prefix}{i:0{width}d}" over an integer array"""
+    text = pd.Series(ids).astype(str)
+    if width:
+        text = text.str.zfill(width)
+    return (prefix + text).to_numpy(dtype=object)
+
+
+def generate_bills(first_record, n_records, rng):
+    """Generate n_records bills numbered from first_record (1-based) using a RandomState.
+
+    A single call with RandomState(42) reproduces the original 100,000-bill
+    dataset; chunked runs keep drawing from the same rng chunk after chunk.
+    """
+    # Generate random dates within the range for each record
+    random_days = rng.randint(0, (END_DATE - START_DATE).astype(int), size=n_records)
+    dates = START_DATE + random_days
+
+    # Generate synthetic data with normal distribution
+    numbers = np.arange(first_record, first_record + n_records)
+    units_consumed = rng.normal(loc=250, scale=50, size=n_records).clip(min=10)
+    rate_per_unit = rng.normal(loc=5.5, scale=0.5, size=n_records).clip(min=3)
+    bill_amount = units_consumed * rate_per_unit + rng.normal(loc=0, scale=10, size=n_records)
+    bill_amount = bill_amount.clip(min=50)
+
+    # Additional columns
+    payment_status = rng.choice(PAYMENT_STATUSES, size=n_records, p=[0.7, 0.2, 0.1])
+
+    return pd.DataFrame({
+        'Consumer_ID': numbers + 1000,
+        'Meter_Number': format_ids('MTR', numbers, 6),
+        'Customer_Name': format_ids('Customer_', numbers),
+        'Bill_Date': dates,
+        'Units_Consumed': np.round(units_consumed, 2),
+        'Rate_Per_Unit': np.round(rate_per_unit, 2),
+        'Bill_Amount': np.round(bill_amount, 2),
+        'Payment_Status': payment_status
+    })
+
+
+class RunningStats:
+    """describe()-style summary accumulated chunk by chunk.
+
+    count/mean/std/min/max are exact (pairwise merge of mean and M2). The
+    quartiles come from a bottom-k random sample of `sample_size` values, so
+    they are exact whenever the total row count fits in the sample.
+    """
+
+    def __init__(self, columns, sample_size=1_000_000, seed=0):
+        self.columns = list(columns)
+        self.sample_size = sample_size
+        self.rng = np.random.default_rng(seed)
+        self.count = 0
+        self.mean = np.zeros(len(self.columns))
+        self.m2 = np.zeros(len(self.columns))
+        self.min = np.full(len(self.columns), np.inf)
+        self.max = np.full(len(self.columns), -np.inf)
+        self.sample = np.empty((0, len(self.columns)))
+        self.keys = np.empty(0)
+
+    def update(self, df):
+        values = df[self.columns].to_numpy(dtype=float)
+        n = len(values)
+        if n == 0:
+            return
+        chunk_mean = values.mean(axis=0)
+        chunk_m2 = ((values - chunk_mean) ** 2).sum(axis=0)
+        total = self.count + n
+        delta = chunk_mean - self.mean
+        self.mean = self.mean + delta * n / total
+        self.m2 = self.m2 + chunk_m2 + delta ** 2 * self.count * n / total
+        self.count = total
+        self.min = np.minimum(self.min, values.min(axis=0))
+        self.max = np.maximum(self.max, values.max(axis=0))
+
+        # keep the rows with the smallest random keys: a uniform sample of everything seen
+        keys = np.concatenate([self.keys, self.rng.random(n)])
+        sample = np.concatenate([self.sample, values])
+        if len(keys) > self.sample_size:
+            keep = np.argpartition(keys, self.sample_size)[:self.sample_size]
+            keys, sample = keys[keep], sample[keep]
+        self.keys, self.sample = keys, sample
+
+    def describe(self):
+        std = np.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.full(len(self.columns), np.nan)
+        if self.count:
+            rows = [self.mean, std, self.min, *np.percentile(self.sample, [25, 50, 75], axis=0), self.max]
+        else:
+            # like DataFrame.describe() on no rows
+            rows = [np.full(len(self.columns), np.nan)] * 7
+        rows.insert(0, np.full(len(self.columns), float(self.count)))
+        return pd.DataFrame(rows, index=['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max'],
+                            columns=self.columns)
+
+
+def generate_bill_dataset(output_base, n_records, chunk_size=None, seed=42, formats=('csv',),
+                          partition_by_month=False):
+    """Generate and write n_records bills chunk by chunk; returns (head, RunningStats)"""
+    rng = np.random.RandomState(seed)
+    chunk_size = max(chunk_size or n_records, 1)
+    stats = RunningStats(SUMMARY_COLUMNS)
+    head = None
+    started = time.perf_counter()
+    with TableWriter(output_base, formats, categories={'Payment_Status': PAYMENT_STATUSES},
+                     partition_date='Bill_Date' if partition_by_month else None) as writer:
+        for first in range(1, n_records + 1, chunk_size):
+            size = min(chunk_size, n_records + 1 - first)
+            with span('bills', rows=size):
+                chunk = generate_bills(first, size, rng)
+            writer.write(chunk)
+            with span('statistics', rows=size):
+                stats.update(chunk)
+            if head is None:
+                head = chunk.head()
+            if chunk_size < n_records:
+                print(f"  {writer.rows:,} / {n_records:,} bills written ({time.perf_counter() - started:.1f}s)")
+        if head is None:
+            # no bills: still write the header, as the single-frame version did
+            head = generate_bills(1, 0, rng)
+            writer.write(head)
+    return head, stats
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the electricity bill dataset")
+    parser.add_argument('--records', type=int, default=100000, help="number of bills (default: 100,000)")
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help="generate and write this many bills at a time with flat memory "
+                             "(default: everything in one chunk)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='eb', help="output path without extension (default: eb)")
+    add_output_arguments(parser)
+    add_profile_argument(parser, 'electricity')
+    args = parser.parse_args(argv)
+    if args.records < 0:
+        parser.error("--records must not be negative")
+    if args.chunk_size is not None and args.chunk_size < 1:
+        parser.error("--chunk-size must be positive")
+    return args
+
+
+def generate(args):
+    """Generate, write and summarise the bills as configured by parse_args"""
+    started = time.perf_counter()
+    head, stats = generate_bill_dataset(args.output, args.records, args.chunk_size, args.seed,
+                                        args.formats, args.partition_by_month)
+    elapsed = time.perf_counter() - started
+
+    print(f"Electricity bill dataset generated successfully! ({', '.join(args.formats)})")
+    print(f"\nDataset shape: ({stats.count}, {len(head.columns)})")
+    print(f"Generated in {elapsed:.2f}s ({stats.count / max(elapsed, 1e-9):,.0f} bills/sec)")
+    print(f"\nFirst few rows:\n{head}")
+    print(f"\nStatistics:\n{stats.describe()}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with profiling(args.profile, 'electricity'):
+        generate(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Pre-generated Faker value pools sampled with NumPy index arrays.
+
+Calling Faker once per row dominates generation time at millions of rows.
+Instead, each field (name, email, phone_number, word) is generated once into a
+bounded pool, optionally cached on disk, and rows draw from the pool with an
+index array. Emails and phones can be made unique per row by deriving them
+from the row id.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from faker import Faker
+
+DEFAULT_POOL_SIZE = 10000
+DEFAULT_CACHE_DIR = '.faker_pool_cache'
+
+# Multiplier for the phone bijection below; odd and not a multiple of 5, so it
+# is coprime with PHONE_SPACE and (a * id) mod PHONE_SPACE never repeats
+PHONE_SPACE = 4_000_000_000
+PHONE_MULTIPLIER = 2_654_435_761
+
+
+def _cache_path(cache_dir, locale, field, size, seed):
+    return os.path.join(cache_dir, f"{locale}-{field}-{size}-{seed}.json")
+
+
+def build_pool(field, size=DEFAULT_POOL_SIZE, locale='en_IN', seed=42, cache_dir=DEFAULT_CACHE_DIR):
+    """Return a NumPy object array of `size` values from Faker method `field`.
+
+    The pool is reproducible for a given (locale, field, size, seed) and is
+    read from cache_dir when present; pass cache_dir=None to disable caching.
+    """
+    path = _cache_path(cache_dir, locale, field, size, seed) if cache_dir else None
+    if path and os.path.exists(path):
+        with open(path, encoding='utf-8') as handle:
+            return np.array(json.load(handle), dtype=object)
+
+    fake = Faker(locale)
+    fake.seed_instance(seed)
+    method = getattr(fake, field)
+    values = [method() for _ in range(size)]
+
+    if path:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as handle:
+            json.dump(values, handle, ensure_ascii=False)
+    return np.array(values, dtype=object)
+
+
+def load_pools(fields, size=DEFAULT_POOL_SIZE, locale='en_IN', seed=42, cache_dir=DEFAULT_CACHE_DIR):
+    """Build (or load) one pool per Faker field, keyed by field name"""
+    return {field: build_pool(field, size, locale, seed, cache_dir) for field in fields}
+
+
+def sample(pool, n, rng):
+    """Draw n values from a pool with replacement"""
+    return pool[rng.integers(0, len(pool), size=n)]
+
+
+def unique_emails(email_pool, ids, rng):
+    """Emails that are unique per id: pooled local part and domain, id as suffix.
+
+    The trailing digits Faker puts on the local part are replaced by the id,
+    e.g. ``urvi56@example.com`` becomes ``urvi1042@example.com`` for id 1042.
+    """
+    parts = pd.Series(email_pool).str.extract(r'^(.*?)\d*@(.*)$')
+    picks = rng.integers(0, len(email_pool), size=len(ids))
+    local = pd.Series(parts[0].to_numpy(dtype=object)[picks])
+    domain = pd.Series(parts[1].to_numpy(dtype=object)[picks])
+    return (local + pd.Series(ids).astype(str) + '@' + domain).to_numpy(dtype=object)
+
+
+def unique_phones(ids):
+    """Ten-digit Indian mobile numbers that are unique for ids below PHONE_SPACE"""
+    ids = np.asarray(ids, dtype=np.uint64) % np.uint64(PHONE_SPACE)
+    # both factors are below PHONE_SPACE, so the product fits in uint64
+    numbers = ids * np.uint64(PHONE_MULTIPLIER) % np.uint64(PHONE_SPACE)
+    return pd.Series(numbers + np.uint64(6_000_000_000)).astype(str).radd('+91 ').to_numpy(dtype=object)
+
+
+def random_dates(n, days_back, rng, end_date=None):
+    """Uniform dates in the last `days_back` days, like Faker's date_between"""
+    end = np.datetime64(end_date or 'today', 'D')
+    return end - rng.integers(0, days_back + 1, size=n)
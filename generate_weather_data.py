@@ -1,8 +1,16 @@
+import argparse
+import time
+
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import random
 
+import weather_cube
+import weather_store
+from dataset_writer import TableWriter, add_output_arguments, write_table
+from stage_profiler import add_profile_argument, profiling, span
+
 # Define realistic monthly weather patterns for each city
 city_weather_patterns = {
     # EXTREME COLD - Himalayan/Hill Stations
@@ -300,9 +308,10 @@ def generate_daily_weather(city, date, month_pattern):
         'Weather_Condition': condition
     }
 
-def generate_weather_dataset(start_year=2021, end_year=2025):
+def generate_weather_dataset(start_year=2021, end_year=2025, patterns=None):
     """Generate complete weather dataset for all cities and dates"""
     
+    patterns_by_city = city_weather_patterns if patterns is None else patterns
     weather_data = []
     
     # Generate date range
@@ -311,13 +320,13 @@ def generate_weather_dataset(start_year=2021, end_year=2025):
     current_date = start_date
     
     total_days = (end_date - start_date).days + 1
-    print(f"Generating weather data for {len(city_weather_patterns)} cities...")
+    print(f"Generating weather data for {len(patterns_by_city)} cities...")
     print(f"Date range: {start_date.date()} to {end_date.date()} ({total_days} days)")
     
     while current_date <= end_date:
         month_name = current_date.strftime('%b')
         
-        for city, patterns in city_weather_patterns.items():
+        for city, patterns in patterns_by_city.items():
             month_pattern = patterns[month_name]
             daily_data = generate_daily_weather(city, current_date, month_pattern)
             weather_data.append(daily_data)
@@ -337,12 +346,249 @@ def generate_weather_dataset(start_year=2021, end_year=2025):
     
     return df
 
-# Generate the dataset
-print("=" * 70)
-print("INDIAN WEATHER DATA GENERATOR (2021-2025)")
-print("=" * 70)
-print("\nCities included:")
-print("-" * 70)
+MONTH_NAMES = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+RAIN_CONDITIONS = ['Heavy Rain', 'Rainy', 'Light Rain', 'Drizzle']
+
+def weather_conditions(patterns=None):
+    """Every Weather_Condition value the generators can emit, sorted"""
+    patterns = city_weather_patterns if patterns is None else patterns
+    return sorted({condition
+                   for city_patterns in patterns.values()
+                   for month_pattern in city_patterns.values()
+                   for condition in month_pattern['conditions']} | set(RAIN_CONDITIONS))
+
+def compile_weather_patterns(patterns=None):
+    """Compile the nested city -> month -> pattern dict into (city x month) arrays.
+
+    Cities are sorted so that a (date x city) grid built from these tables is
+    already in the (Date, City) order the loop engine gets from sort_values.
+    Conditions are stored as codes into the `conditions` vocabulary.
+    """
+    patterns = city_weather_patterns if patterns is None else patterns
+    cities = sorted(patterns)
+    conditions = weather_conditions(patterns)
+    code = {condition: index for index, condition in enumerate(conditions)}
+    n_choices = max(len(month_pattern['conditions'])
+                    for city_patterns in patterns.values()
+                    for month_pattern in city_patterns.values())
+
+    tables = {key: np.empty((len(cities), 12)) for key in ('temp_min', 'temp_max', 'humidity', 'rainfall', 'wind')}
+    condition_codes = np.empty((len(cities), 12, n_choices), dtype=np.int16)
+    condition_counts = np.empty((len(cities), 12), dtype=np.int16)
+    for c, city in enumerate(cities):
+        for m, month_name in enumerate(MONTH_NAMES):
+            month_pattern = patterns[city][month_name]
+            for key, table in tables.items():
+                table[c, m] = month_pattern[key]
+            choices = [code[condition] for condition in month_pattern['conditions']]
+            condition_codes[c, m, :len(choices)] = choices
+            condition_counts[c, m] = len(choices)
+
+    return {
+        'cities': cities,
+        'conditions': conditions,
+        'condition_codes': condition_codes,
+        'condition_counts': condition_counts,
+        **tables,
+    }
+
+def generate_weather_grid(dates, compiled, rng):
+    """Generate weather for every (date, city) pair of a date range in array operations.
+
+    Applies the same rules as generate_daily_weather -- daily noise around the
+    monthly pattern, the four rainfall regimes and the rainfall-driven
+    Weather_Condition -- to a flattened (date x city) grid. Rows come out in
+    (Date, City) order.
+    """
+    dates = pd.DatetimeIndex(dates)
+    n_cities = len(compiled['cities'])
+    n = len(dates) * n_cities
+    month = np.repeat(dates.month.to_numpy() - 1, n_cities)
+    city = np.tile(np.arange(n_cities), len(dates))
+
+    def param(key):
+        return compiled[key][city, month]
+
+    temp_min = param('temp_min') + rng.normal(0, 2, n)
+    temp_max = param('temp_max') + rng.normal(0, 2.5, n)
+    temp_min = np.where(temp_min >= temp_max, temp_max - 3, temp_min)
+
+    humidity = np.clip(param('humidity') + rng.normal(0, 8, n), 20, 100)
+
+    # Rainfall regimes by the month's base rainfall: dry (<10), light (<50),
+    # moderate (<150) and heavy; each has its own chance of a rain day and
+    # its own amount distribution
+    base_rain = param('rainfall')
+    regime = np.searchsorted([10, 50, 150], base_rain, side='right')
+    rain_day = rng.random(n) < np.array([0.1, 0.3, 0.5, 0.6])[regime]
+    rainfall = np.zeros(n)
+    exponential_days = rain_day & (regime <= 1)
+    rainfall[exponential_days] = rng.exponential(
+        np.where(regime[exponential_days] == 0, 2, base_rain[exponential_days] / 10))
+    gamma_days = rain_day & (regime >= 2)
+    rainfall[gamma_days] = rng.gamma(
+        2, np.where(regime[gamma_days] == 2, base_rain[gamma_days] / 20, base_rain[gamma_days] / 15))
+
+    wind_speed = np.maximum(0, param('wind') + rng.normal(0, 3, n))
+
+    # Weather condition based on rainfall; dry days pick from the month's list
+    conditions = compiled['conditions']
+    pick = (rng.random(n) * compiled['condition_counts'][city, month]).astype(np.intp)
+    condition = compiled['condition_codes'][city, month, pick]
+    light = rng.random(n) < 0.5
+    condition = np.select(
+        [rainfall > 50, rainfall > 10, (rainfall > 0) & light, rainfall > 0],
+        [conditions.index(name) for name in RAIN_CONDITIONS],
+        condition,
+    )
+
+    return pd.DataFrame({
+        'Date': np.repeat(dates.to_numpy(), n_cities),
+        'City': pd.Categorical.from_codes(city, compiled['cities']).astype(object),
+        'Temperature_Min_C': np.round(temp_min, 1),
+        'Temperature_Max_C': np.round(temp_max, 1),
+        'Humidity_Percent': np.round(humidity, 1),
+        'Rainfall_mm': np.round(rainfall, 1),
+        'Wind_Speed_kmh': np.round(wind_speed, 1),
+        'Weather_Condition': np.asarray(conditions, dtype=object)[condition],
+    })
+
+def generate_weather_dataset_vectorized(start_year=2021, end_year=2025, patterns=None, seed=None):
+    """Array-based equivalent of generate_weather_dataset"""
+    compiled = compile_weather_patterns(patterns)
+    dates = pd.date_range(f'{start_year}-01-01', f'{end_year}-12-31', freq='D')
+    print(f"Generating weather data for {len(compiled['cities'])} cities...")
+    print(f"Date range: {dates[0].date()} to {dates[-1].date()} ({len(dates)} days)")
+
+    df = generate_weather_grid(dates, compiled, np.random.default_rng(seed))
+
+    print(f"\nDataset generated successfully!")
+    print(f"Total records: {len(df):,}")
+    print(f"Cities: {len(compiled['cities'])}")
+    print(f"Date range: {df['Date'].iloc[0]} to {df['Date'].iloc[-1]}")
+
+    return df
+
+def replicate_patterns(copies=1, patterns=None):
+    """Scale the station count by cloning every city's patterns under new names.
+
+    copies=3 yields 'Leh', 'Leh 2', 'Leh 3', ... for every city.
+    """
+    patterns = city_weather_patterns if patterns is None else patterns
+    replicated = dict(patterns)
+    for copy in range(2, copies + 1):
+        for city, city_patterns in patterns.items():
+            replicated[f'{city} {copy}'] = city_patterns
+    return replicated
+
+HOURLY_COLUMNS = ['Date', 'City', 'Temperature_C', 'Humidity_Percent', 'Rainfall_mm', 'Wind_Speed_kmh',
+                  'Weather_Condition']
+
+def diurnal_shape(hours):
+    """0 at the 05:00 minimum, 1 at the 15:00 maximum, cosine-shaped in between"""
+    hours = np.asarray(hours, dtype=float)
+    rising = (hours >= 5) & (hours <= 15)
+    return np.where(rising,
+                    (1 - np.cos(np.pi * (hours - 5) / 10)) / 2,
+                    (1 + np.cos(np.pi * ((hours - 15) % 24) / 14)) / 2)
+
+def split_rainfall(totals, weights):
+    """Split daily totals across axis 1 in proportion to weights, in 0.1 mm steps.
+
+    Largest-remainder rounding: each hour gets the floor of its share in
+    tenths, and the tenths left over go to the hours with the largest
+    fractional parts, so every day's hours sum exactly to its total.
+    """
+    tenths = np.round(totals * 10).astype(np.int64)
+    exact = tenths * weights / weights.sum(axis=1, keepdims=True)
+    hourly = np.floor(exact).astype(np.int64)
+    leftover = tenths - hourly.sum(axis=1, keepdims=True)
+    # rank of each hour's fractional part within its day, largest first
+    rank = np.argsort(np.argsort(hourly - exact, axis=1, kind='stable'), axis=1, kind='stable')
+    return (hourly + (rank < leftover)) / 10
+
+def expand_hourly(daily, dates, compiled, rng):
+    """Expand a (Date, City)-ordered daily grid into 24 hourly rows per city-day.
+
+    Temperature follows a diurnal curve from Temperature_Min_C at 05:00 to
+    Temperature_Max_C at 15:00; humidity moves against it and wind with it.
+    The day's rainfall is split across hours with random weights, so hourly
+    amounts add up to the daily total. Rows come out in (Date, City) order.
+    """
+    n_days, n_cities = len(dates), len(compiled['cities'])
+
+    def day_values(column):
+        return daily[column].to_numpy().reshape(n_days, 1, n_cities)
+
+    shape = diurnal_shape(np.arange(24)).reshape(1, 24, 1)
+    size = (n_days, 24, n_cities)
+
+    temp_min, temp_max = day_values('Temperature_Min_C'), day_values('Temperature_Max_C')
+    temperature = temp_min + (temp_max - temp_min) * shape + rng.normal(0, 0.4, size)
+    humidity = np.clip(day_values('Humidity_Percent') + 10 * (0.5 - shape) + rng.normal(0, 2, size), 20, 100)
+    wind_speed = np.maximum(0, day_values('Wind_Speed_kmh') * (0.75 + 0.5 * shape) + rng.normal(0, 1, size))
+
+    weights = rng.gamma(0.3, 1, size)
+    rainfall = split_rainfall(day_values('Rainfall_mm'), weights)
+
+    # rain hours keep the day's condition; dry hours of a rain day are Cloudy
+    conditions = np.asarray(compiled['conditions'], dtype=object)
+    day_condition = np.broadcast_to(day_values('Weather_Condition'), size)
+    rain_day = np.isin(day_condition, RAIN_CONDITIONS)
+    condition = np.where(rain_day & (rainfall <= 0), 'Cloudy', day_condition).astype(object)
+
+    timestamps = (dates.to_numpy().reshape(n_days, 1, 1)
+                  + np.arange(24).astype('timedelta64[h]').reshape(1, 24, 1))
+    return pd.DataFrame({
+        'Date': np.broadcast_to(timestamps, size).ravel(),
+        'City': np.broadcast_to(np.asarray(compiled['cities'], dtype=object), size).ravel(),
+        'Temperature_C': np.round(temperature, 1).ravel(),
+        'Humidity_Percent': np.round(humidity, 1).ravel(),
+        'Rainfall_mm': rainfall.ravel(),
+        'Wind_Speed_kmh': np.round(wind_speed, 1).ravel(),
+        'Weather_Condition': condition.ravel(),
+    }, columns=HOURLY_COLUMNS)
+
+def flush_periods(start_year, end_year, flush='year'):
+    """Consecutive date ranges covering the years, one per year or per month"""
+    for year in range(start_year, end_year + 1):
+        if flush == 'month':
+            for month in range(1, 13):
+                start = pd.Timestamp(year, month, 1)
+                yield pd.date_range(start, start + pd.offsets.MonthEnd(0), freq='D')
+        else:
+            yield pd.date_range(f'{year}-01-01', f'{year}-12-31', freq='D')
+
+def generate_weather_chunks(start_year=2021, end_year=2025, patterns=None, seed=None, resolution='daily',
+                            flush='year'):
+    """Yield the dataset one year (or month) at a time, daily or hourly.
+
+    Chunks are produced in date order and each is already (Date, City)
+    ordered, so writing them one after another gives the same ordering as a
+    global sort without holding the whole dataset in memory.
+    """
+    compiled = compile_weather_patterns(patterns)
+    rng = np.random.default_rng(seed)
+    for dates in flush_periods(start_year, end_year, flush):
+        with span('generate') as stage:
+            chunk = generate_weather_grid(dates, compiled, rng)
+            if resolution == 'hourly':
+                chunk = expand_hourly(chunk, dates, compiled, rng)
+            stage.add_rows(len(chunk))
+        yield chunk
+
+def write_weather_chunks(chunks, writer):
+    """Write chunks as they are generated, reporting progress; returns the (City, Year, Month) cube"""
+    started = time.perf_counter()
+    cube = None
+    for chunk in chunks:
+        writer.write(chunk)
+        with span('cube', rows=len(chunk)):
+            cube = weather_cube.merge(cube, weather_cube.aggregate(chunk))
+        first, last = chunk['Date'].iloc[0], chunk['Date'].iloc[-1]
+        print(f"  {first:%Y-%m-%d} to {last:%Y-%m-%d}: {len(chunk):,} rows "
+              f"({writer.rows:,} total, {time.perf_counter() - started:.1f}s)")
+    return cube
 
 # Group cities by climate type
 climate_groups = {
@@ -352,49 +598,151 @@ climate_groups = {
     'Moderate/Varied': ['Bangalore', 'Delhi', 'Kolkata', 'Hyderabad', 'Pune', 'Ahmedabad']
 }
 
-for climate_type, cities in climate_groups.items():
-    print(f"\n{climate_type}:")
-    for city in cities:
-        print(f"  • {city}")
-
-print("\n" + "=" * 70)
-print("\nGenerating dataset...")
-print("-" * 70)
-
-df_weather = generate_weather_dataset(2021, 2025)
-
-# Save to CSV
-output_file = 'indian_weather_2021_2025.csv'
-df_weather.to_csv(output_file, index=False)
-print(f"\n✓ Dataset saved to: {output_file}")
-
-# Display statistics
-print("\n" + "=" * 70)
-print("DATASET STATISTICS")
-print("=" * 70)
-
-print("\nTemperature Range by City:")
-print("-" * 70)
-temp_stats = df_weather.groupby('City').agg({
-    'Temperature_Min_C': ['min', 'mean', 'max'],
-    'Temperature_Max_C': ['min', 'mean', 'max']
-}).round(1)
-print(temp_stats)
-
-print("\n\nTotal Rainfall by City (2021-2025):")
-print("-" * 70)
-rainfall_stats = df_weather.groupby('City')['Rainfall_mm'].sum().sort_values(ascending=False).round(1)
-print(rainfall_stats)
-
-print("\n\nWeather Conditions Distribution:")
-print("-" * 70)
-condition_counts = df_weather['Weather_Condition'].value_counts()
-print(condition_counts)
-
-print("\n\nSample Data (First 20 rows):")
-print("-" * 70)
-print(df_weather.head(20).to_string(index=False))
-
-print("\n" + "=" * 70)
-print("✓ DATASET GENERATION COMPLETE!")
-print("=" * 70)
+def print_statistics(cube, start_year, end_year, df_weather=None):
+    """Print the per-city temperature, rainfall and condition summaries from the aggregate cube"""
+    print("\n" + "=" * 70)
+    print("DATASET STATISTICS")
+    print("=" * 70)
+
+    print("\nTemperature Range by City:")
+    print("-" * 70)
+    temp_columns = [column for column in ['Temperature_Min_C', 'Temperature_Max_C', 'Temperature_C']
+                    if column in weather_cube.metrics(cube)]
+    temp_stats = weather_cube.city_stats(cube, temp_columns).round(1)
+    print(temp_stats)
+
+    print(f"\n\nTotal Rainfall by City ({start_year}-{end_year}):")
+    print("-" * 70)
+    rainfall_stats = weather_cube.city_totals(cube, 'Rainfall_mm').sort_values(ascending=False).round(1)
+    print(rainfall_stats)
+
+    print("\n\nWeather Conditions Distribution:")
+    print("-" * 70)
+    condition_counts = weather_cube.condition_counts(cube)
+    print(condition_counts)
+
+    if df_weather is not None:
+        print("\n\nSample Data (First 20 rows):")
+        print("-" * 70)
+        print(df_weather.head(20).to_string(index=False))
+
+def save_weather_cube(cube, output_base, formats):
+    """Persist the aggregate cube next to the CSV so later appends only fold in new rows"""
+    if 'csv' in formats:
+        weather_cube.save_cube(cube, f'{output_base}.csv')
+        print(f"✓ Aggregate cube saved to: {weather_cube.cube_paths(f'{output_base}.csv')[0]}")
+
+def save_weather_store(output_base, formats):
+    """Convert the CSV into the (City, Date)-sorted, memory-mapped weather store"""
+    if 'csv' in formats:
+        path = weather_store.build_store(f'{output_base}.csv')
+        print(f"✓ Memory-mapped store saved to: {path}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the Indian weather dataset")
+    parser.add_argument('--start-year', type=int, default=2021)
+    parser.add_argument('--end-year', type=int, default=2025)
+    parser.add_argument('--engine', choices=['vectorized', 'loop'], default='vectorized',
+                        help="vectorized (city x month tables, default) or the original per-day loop")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="seed for the vectorized engine (default: unseeded, like the loop engine)")
+    parser.add_argument('--resolution', choices=['daily', 'hourly'], default='daily',
+                        help="one row per city-day (default) or per city-hour")
+    parser.add_argument('--flush', choices=['year', 'month'], default=None,
+                        help="generate and write one year/month at a time with flat memory "
+                             "(implied as 'year' for --resolution hourly)")
+    parser.add_argument('--city-copies', type=int, default=1,
+                        help="clone every city's patterns this many times to scale the station count")
+    parser.add_argument('--store', action='store_true',
+                        help="also build the memory-mapped, city-indexed store (weather_store.py) from the CSV")
+    add_output_arguments(parser)
+    add_profile_argument(parser, 'weather')
+    args = parser.parse_args(argv)
+    if args.store and 'csv' not in args.formats:
+        parser.error("--store is built from the CSV output; include csv in --format")
+    if args.resolution == 'hourly' and args.flush is None:
+        args.flush = 'year'
+    if args.flush and args.engine != 'vectorized':
+        parser.error("--flush and --resolution hourly require the vectorized engine")
+    if args.city_copies < 1:
+        parser.error("--city-copies must be at least 1")
+    return args
+
+def generate(args):
+    """Generate, write and summarise the dataset as configured by parse_args"""
+    print("=" * 70)
+    print(f"INDIAN WEATHER DATA GENERATOR ({args.start_year}-{args.end_year})")
+    print("=" * 70)
+    print("\nCities included:")
+    print("-" * 70)
+
+    for climate_type, cities in climate_groups.items():
+        print(f"\n{climate_type}:")
+        for city in cities:
+            print(f"  • {city}")
+
+    print("\n" + "=" * 70)
+    print("\nGenerating dataset...")
+    print("-" * 70)
+
+    patterns = replicate_patterns(args.city_copies)
+    categories = {'City': sorted(patterns), 'Weather_Condition': weather_conditions()}
+    partition_date = 'Date' if args.partition_by_month else None
+
+    if args.flush:
+        suffix = '_hourly' if args.resolution == 'hourly' else ''
+        output_base = f'indian_weather{suffix}_{args.start_year}_{args.end_year}'
+        print(f"Generating {args.resolution} weather for {len(patterns)} cities, one {args.flush} at a time...")
+        chunks = generate_weather_chunks(args.start_year, args.end_year, patterns, args.seed,
+                                         args.resolution, args.flush)
+        with TableWriter(output_base, args.formats, categories, partition_date) as writer:
+            cube = write_weather_chunks(chunks, writer)
+        print(f"\n✓ {writer.rows:,} rows saved to: {', '.join(f'{output_base}.{fmt}' for fmt in args.formats)}")
+        with span('save cube'):
+            save_weather_cube(cube, output_base, args.formats)
+        if args.store:
+            with span('build store', rows=writer.rows):
+                save_weather_store(output_base, args.formats)
+        with span('statistics'):
+            print_statistics(cube, args.start_year, args.end_year)
+        print("\n" + "=" * 70)
+        print("✓ DATASET GENERATION COMPLETE!")
+        print("=" * 70)
+        return
+
+    with span(f'generate ({args.engine})') as stage:
+        if args.engine == 'vectorized':
+            df_weather = generate_weather_dataset_vectorized(args.start_year, args.end_year, patterns,
+                                                             seed=args.seed)
+        else:
+            df_weather = generate_weather_dataset(args.start_year, args.end_year, patterns)
+        stage.add_rows(len(df_weather))
+
+    # Save to CSV (and any other requested formats)
+    output_base = f'indian_weather_{args.start_year}_{args.end_year}'
+    write_table(df_weather, output_base, args.formats, categories, partition_date)
+    print(f"\n✓ Dataset saved to: {', '.join(f'{output_base}.{fmt}' for fmt in args.formats)}")
+    with span('cube', rows=len(df_weather)):
+        cube = weather_cube.aggregate(df_weather)
+    with span('save cube'):
+        save_weather_cube(cube, output_base, args.formats)
+    if args.store:
+        with span('build store', rows=len(df_weather)):
+            save_weather_store(output_base, args.formats)
+
+    # Display statistics
+    with span('statistics'):
+        print_statistics(cube, args.start_year, args.end_year, df_weather)
+
+    print("\n" + "=" * 70)
+    print("✓ DATASET GENERATION COMPLETE!")
+    print("=" * 70)
+
+def main(argv=None):
+    args = parse_args(argv)
+    with profiling(args.profile, 'weather'):
+        generate(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,81 @@
+import argparse
+import glob
+import hashlib
+import inspect
+import json
 import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
+from matplotlib.colors import LinearSegmentedColormap
+from matplotlib.figure import Figure
+
+# stage_profiler lives at the repository root, shared with the generators
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stage_profiler import add_profile_argument, profiling, span  # noqa: E402
+from rolling_kpis import ALL_REGIONS, KPIS, update_rolling  # noqa: E402
 
 DATA_FILE = "ecommerce_kpi.csv"
 OUTPUT_DIR = "dashboard"
+MANIFEST_FILE = "manifest.json"
+HTML_FILE = "index.html"
+ROLLING_STATE_FILE = "rolling_state.npz"
+# Above this many points scatters are drawn as hexbin density instead of markers
+DENSITY_THRESHOLD = 50_000
+
+# Every chart on the dashboard. Charts are independent of each other, so adding
+# an entry here is enough for it to be rendered in the process pool and shown
+# in index.html (trend charts get their own panel, scatters share a grid).
+CHARTS = [
+    {
+        "key": "trend",
+        "kind": "trend",
+        "file": "revenue_trend.png",
+        "columns": ["Date", "Revenue"],
+        "heading": "Revenue Trend",
+        "alt": "Revenue trend",
+        "note": "Monthly aggregation to highlight trend direction.",
+    },
+    {
+        "key": "spend",
+        "kind": "scatter",
+        "file": "spend_vs_revenue.png",
+        "columns": ["Marketing_Spend", "Revenue"],
+        "title": "Revenue vs Marketing Spend",
+        "xlabel": "Marketing Spend",
+        "ylabel": "Revenue",
+        "color": "#1f7a8c",
+        "alt": "Spend vs revenue",
+        "note": "Marketing spend vs revenue with regression.",
+    },
+    {
+        "key": "visitors",
+        "kind": "scatter",
+        "file": "visitors_vs_orders.png",
+        "columns": ["Website_Visitors", "Orders"],
+        "title": "Orders vs Website Visitors",
+        "xlabel": "Website Visitors",
+        "ylabel": "Orders",
+        "color": "#ff6b35",
+        "alt": "Visitors vs orders",
+        "note": "Website visitors vs orders.",
+    },
+    {
+        "key": "cac",
+        "kind": "scatter",
+        "file": "cac_vs_revenue.png",
+        "columns": ["Customer_Acquisition_Cost", "Revenue"],
+        "title": "Revenue vs Customer Acquisition Cost",
+        "xlabel": "Customer Acquisition Cost",
+        "ylabel": "Revenue",
+        "color": "#ffa62b",
+        "alt": "CAC vs revenue",
+        "note": "Customer acquisition cost vs revenue.",
+    },
+]
 
 
 def ensure_dir(path):
@@ -25,12 +95,50 @@ def format_percent(value):
 
 
 def compute_kpis(df):
-    total_revenue = df["Revenue"].sum()
-    total_orders = df["Orders"].sum()
-    avg_conversion = df["Conversion_Rate"].mean()
-    total_spend = df["Marketing_Spend"].sum()
-    avg_aov = df["Avg_Order_Value"].mean()
+    return kpi_cards(
+        df["Revenue"].sum(),
+        df["Orders"].sum(),
+        df["Conversion_Rate"].mean(),
+        df["Marketing_Spend"].sum(),
+        df["Avg_Order_Value"].mean(),
+    )
 
+
+ROLLING_LABELS = {"revenue": "Revenue", "orders": "Orders", "conversion": "Conversion", "aov": "AOV", "cac": "CAC"}
+ROLLING_FORMATS = {"revenue": format_currency, "orders": format_number, "conversion": format_percent,
+                   "aov": lambda value: f"${value:,.2f}", "cac": lambda value: f"${value:,.2f}"}
+
+
+def format_rolling(kpi, value):
+    return "-" if np.isnan(value) else ROLLING_FORMATS[kpi](value)
+
+
+def rolling_section(paths, output_dir):
+    # 7/28-day KPIs from the persisted rolling state, which only reads rows
+    # appended since the last build; None when the rows are not in date order
+    try:
+        engine, rows, rebuilt = update_rolling(paths, os.path.join(output_dir, ROLLING_STATE_FILE))
+    except ValueError as exc:
+        print(f"Rolling KPIs skipped: {exc}")
+        return None
+    if engine.day is None:
+        return None
+    print(f"Rolling KPIs: {'rebuilt from' if rebuilt else 'appended'} {rows:,} rows, "
+          f"as of {engine.as_of():%Y-%m-%d}")
+    snapshot = engine.snapshot()
+    everywhere = snapshot[snapshot["region"] == ALL_REGIONS]
+    # All first, then regions alphabetically, 7d before 28d
+    table = snapshot.assign(regional=snapshot["region"] != ALL_REGIONS).sort_values(["regional", "region", "window"])
+    return {
+        "as_of": f"{engine.as_of():%Y-%m-%d}",
+        "cards": [(f"{ROLLING_LABELS[kpi]} · {row.window}d", format_rolling(kpi, getattr(row, kpi)))
+                  for row in everywhere.itertuples() for kpi in KPIS],
+        "rows": [[row.region, f"{row.window}d"] + [format_rolling(kpi, getattr(row, kpi)) for kpi in KPIS]
+                 for row in table.itertuples()],
+    }
+
+
+def kpi_cards(total_revenue, total_orders, avg_conversion, total_spend, avg_aov):
     return [
         ("Total Revenue", format_currency(total_revenue)),
         ("Total Orders", format_number(total_orders)),
@@ -42,41 +150,202 @@ def compute_kpis(df):
 
 def plot_revenue_trend(df, output_path):
     monthly = df.set_index("Date").resample("M").sum(numeric_only=True)
-    plt.figure(figsize=(10, 4))
-    plt.plot(monthly.index, monthly["Revenue"], color="#1f7a8c", linewidth=2)
-    plt.title("Monthly Revenue Trend")
-    plt.xlabel("Month")
-    plt.ylabel("Revenue")
-    plt.grid(alpha=0.2)
-    plt.tight_layout()
-    plt.savefig(output_path, dpi=150)
-    plt.close()
-
-
-def scatter_with_regression(x, y, title, xlabel, ylabel, output_path, color):
-    slope, intercept = np.polyfit(x, y, 1)
-    y_pred = slope * x + intercept
-    r2 = 1 - (np.sum((y - y_pred) ** 2) / np.sum((y - np.mean(y)) ** 2))
-
-    plt.figure(figsize=(6, 4))
-    plt.scatter(x, y, alpha=0.6, color=color)
-    plt.plot(x, y_pred, color="#ff6b35", linewidth=2)
-    plt.title(f"{title} (R2: {r2:.2f})")
-    plt.xlabel(xlabel)
-    plt.ylabel(ylabel)
-    plt.grid(alpha=0.2)
-    plt.tight_layout()
-    plt.savefig(output_path, dpi=150)
-    plt.close()
+    fig = Figure(figsize=(10, 4))
+    ax = fig.add_subplot()
+    ax.plot(monthly.index, monthly["Revenue"], color="#1f7a8c", linewidth=2)
+    ax.set_title("Monthly Revenue Trend")
+    ax.set_xlabel("Month")
+    ax.set_ylabel("Revenue")
+    ax.grid(alpha=0.2)
+    fig.tight_layout()
+    fig.savefig(output_path, dpi=150)
+
+
+class RegressionStats:
+    # Sufficient statistics for a least-squares line: n, Σx, Σy, Σxy, Σx², Σy².
+    # Sums are kept relative to a shift (the first chunk's means) so that the
+    # centred moments do not lose precision on large, far-from-zero values.
+    def __init__(self):
+        self.n = 0
+        self.shift_x = self.shift_y = 0.0
+        self.sx = self.sy = self.sxy = self.sxx = self.syy = 0.0
+
+    @classmethod
+    def from_arrays(cls, x, y, chunk_size=1_000_000):
+        stats = cls()
+        for start in range(0, len(x), chunk_size):
+            stats.update(x[start:start + chunk_size], y[start:start + chunk_size])
+        return stats
+
+    def update(self, x, y):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if len(x) == 0:
+            return self
+        if self.n == 0:
+            self.shift_x, self.shift_y = float(x.mean()), float(y.mean())
+        dx = x - self.shift_x
+        dy = y - self.shift_y
+        self.n += len(x)
+        self.sx += dx.sum()
+        self.sy += dy.sum()
+        self.sxy += (dx * dy).sum()
+        self.sxx += (dx * dx).sum()
+        self.syy += (dy * dy).sum()
+        return self
+
+    def merge(self, other):
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            self.shift_x, self.shift_y = other.shift_x, other.shift_y
+        # re-express the other sums relative to this shift before adding them
+        bx = other.shift_x - self.shift_x
+        by = other.shift_y - self.shift_y
+        self.sxy += other.sxy + by * other.sx + bx * other.sy + other.n * bx * by
+        self.sxx += other.sxx + 2 * bx * other.sx + other.n * bx * bx
+        self.syy += other.syy + 2 * by * other.sy + other.n * by * by
+        self.sx += other.sx + other.n * bx
+        self.sy += other.sy + other.n * by
+        self.n += other.n
+        return self
+
+    def fit(self):
+        # slope, intercept and R² of the least-squares line, same as np.polyfit(x, y, 1)
+        sxx = self.sxx - self.sx ** 2 / self.n
+        syy = self.syy - self.sy ** 2 / self.n
+        sxy = self.sxy - self.sx * self.sy / self.n
+        slope = sxy / sxx
+        intercept = (self.shift_y + self.sy / self.n) - slope * (self.shift_x + self.sx / self.n)
+        r2 = sxy ** 2 / (sxx * syy)
+        return slope, intercept, r2
+
+
+def scatter_with_regression(x, y, title, xlabel, ylabel, output_path, color,
+                            density_threshold=DENSITY_THRESHOLD, stats=None, dense=None):
+    # dense overrides the len(x) test when x and y are a sample of more rows
+    slope, intercept, r2 = (stats or RegressionStats.from_arrays(x, y)).fit()
+    if dense is None:
+        dense = len(x) > density_threshold
+
+    fig = Figure(figsize=(6, 4))
+    ax = fig.add_subplot()
+    if dense:
+        cmap = LinearSegmentedColormap.from_list("density", ["#ffffff", color])
+        hexbin = ax.hexbin(x, y, gridsize=60, cmap=cmap, bins="log", mincnt=1)
+        fig.colorbar(hexbin, ax=ax, label="Points")
+        line_x = np.array([np.min(x), np.max(x)])
+        ax.plot(line_x, slope * line_x + intercept, color="#ff6b35", linewidth=2)
+    else:
+        ax.scatter(x, y, alpha=0.6, color=color)
+        ax.plot(x, slope * x + intercept, color="#ff6b35", linewidth=2)
+    ax.set_title(f"{title} (R2: {r2:.2f})")
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.grid(alpha=0.2)
+    fig.tight_layout()
+    fig.savefig(output_path, dpi=150)
 
     return r2
 
 
-def build_html(kpis, image_files, output_path):
+def render_chart(chart, data, output_dir, stats=None, dense=None):
+    started = time.perf_counter()
+    output_path = os.path.join(output_dir, chart["file"])
+    # only recorded when rendering in-process (--workers 1)
+    with span(f"render {chart['file']}", rows=len(data)):
+        if chart["kind"] == "trend":
+            plot_revenue_trend(data, output_path)
+        else:
+            x, y = chart["columns"]
+            scatter_with_regression(
+                data[x].values,
+                data[y].values,
+                chart["title"],
+                chart["xlabel"],
+                chart["ylabel"],
+                output_path,
+                chart["color"],
+                chart.get("density_threshold", DENSITY_THRESHOLD),
+                stats,
+                dense,
+            )
+    return time.perf_counter() - started
+
+
+def render_charts(inputs, charts, output_dir, workers=None, rows=None):
+    # inputs maps chart key -> (data, stats); each worker only receives its own chart's data.
+    # rows is the full row count when the data is a sample; it decides the density view.
+    tasks = []
+    for chart in charts:
+        data, stats = inputs[chart["key"]]
+        dense = None if rows is None else rows > chart.get("density_threshold", DENSITY_THRESHOLD)
+        tasks.append((chart, data, output_dir, stats, dense))
+    if workers == 1 or len(tasks) < 2:
+        return [render_chart(*task) for task in tasks]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(render_chart, *task) for task in tasks]
+        return [future.result() for future in futures]
+
+
+def print_timing_report(charts, timings, wall_seconds):
+    if not charts:
+        return
+    width = max(len(chart["file"]) for chart in charts)
+    print("Chart rendering:")
+    for chart, seconds in zip(charts, timings):
+        print(f"  {chart['file']:<{width}}  {seconds:6.2f}s")
+    print(f"  {'total (sum of charts)':<{width}}  {sum(timings):6.2f}s")
+    print(f"  {'wall clock':<{width}}  {wall_seconds:6.2f}s")
+
+
+def build_html(kpis, charts, output_path, rolling=None):
     kpi_cards = "\n".join(
         f"<div class=\"kpi-card\"><span>{label}</span><strong>{value}</strong></div>"
         for label, value in kpis
     )
+    rolling_panel = ""
+    if rolling:
+        rolling_cards = "\n".join(
+            f"          <div class=\"kpi-card\"><span>{label}</span><strong>{value}</strong></div>"
+            for label, value in rolling["cards"]
+        )
+        header = "".join(f"<th>{label}</th>" for label in ["Region", "Window"] + list(ROLLING_LABELS.values()))
+        body = "\n".join(
+            "            <tr>" + "".join(f"<td>{cell}</td>" for cell in row) + "</tr>" for row in rolling["rows"]
+        )
+        rolling_panel = f"""      <section class="panel">
+        <h2>Rolling KPIs</h2>
+        <div class="kpi-grid">
+{rolling_cards}
+        </div>
+        <table class="rolling">
+          <thead><tr>{header}</tr></thead>
+          <tbody>
+{body}
+          </tbody>
+        </table>
+        <div class="note">7- and 28-day windows ending {rolling['as_of']}, all regions and per region.</div>
+      </section>
+"""
+    trend_panels = "\n".join(
+        f"""      <section class="panel">
+        <h2>{chart['heading']}</h2>
+        <img src="{chart['file']}" alt="{chart['alt']}" />
+        <div class="note">{chart['note']}</div>
+      </section>"""
+        for chart in charts
+        if chart["kind"] == "trend"
+    )
+    scatter_cells = "\n".join(
+        f"""          <div>
+            <img src="{chart['file']}" alt="{chart['alt']}" />
+            <div class="note">{chart['note']}</div>
+          </div>"""
+        for chart in charts
+        if chart["kind"] == "scatter"
+    )
 
     html = f"""<!doctype html>
 <html lang="en">
@@ -190,6 +459,25 @@ def build_html(kpis, image_files, output_path):
         box-shadow: 0 12px 35px rgba(11, 31, 42, 0.12);
       }}
 
+      table.rolling {{
+        width: 100%;
+        margin-top: 22px;
+        border-collapse: collapse;
+        font-size: 14px;
+      }}
+
+      table.rolling th,
+      table.rolling td {{
+        padding: 8px 10px;
+        text-align: right;
+        border-bottom: 1px solid #e6e1da;
+      }}
+
+      table.rolling th:first-child,
+      table.rolling td:first-child {{
+        text-align: left;
+      }}
+
       .note {{
         color: var(--muted);
         font-size: 13px;
@@ -218,26 +506,11 @@ def build_html(kpis, image_files, output_path):
       <section class="kpi-grid">
         {kpi_cards}
       </section>
-      <section class="panel">
-        <h2>Revenue Trend</h2>
-        <img src="{image_files['trend']}" alt="Revenue trend" />
-        <div class="note">Monthly aggregation to highlight trend direction.</div>
-      </section>
+{rolling_panel}{trend_panels}
       <section class="panel">
         <h2>Scatter Diagnostics</h2>
         <div class="chart-grid">
-          <div>
-            <img src="{image_files['spend']}" alt="Spend vs revenue" />
-            <div class="note">Marketing spend vs revenue with regression.</div>
-          </div>
-          <div>
-            <img src="{image_files['visitors']}" alt="Visitors vs orders" />
-            <div class="note">Website visitors vs orders.</div>
-          </div>
-          <div>
-            <img src="{image_files['cac']}" alt="CAC vs revenue" />
-            <div class="note">Customer acquisition cost vs revenue.</div>
-          </div>
+{scatter_cells}
         </div>
       </section>
     </main>
@@ -249,56 +522,251 @@ def build_html(kpis, image_files, output_path):
         handle.write(html)
 
 
-def main():
-    df = pd.read_csv(DATA_FILE, parse_dates=["Date"])
-    ensure_dir(OUTPUT_DIR)
-
-    kpis = compute_kpis(df)
+def resolve_paths(patterns):
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern))
+        if not matches and not os.path.exists(pattern):
+            raise FileNotFoundError(f"No KPI data matches {pattern!r}")
+        paths.extend(matches or [pattern])
+    return paths
+
+
+def read_kpi_data(paths):
+    frames = [pd.read_csv(path, parse_dates=["Date"]) for path in paths]
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+
+class KpiStream:
+    # One pass over KPI rows in chunks, in constant memory: the headline KPI
+    # sums, monthly revenue, regression sums for every scatter chart and a
+    # bounded uniform sample of rows to draw (all rows, in order, when they fit).
+    KPI_COLUMNS = ["Revenue", "Orders", "Conversion_Rate", "Marketing_Spend", "Avg_Order_Value"]
+
+    def __init__(self, charts, sample_size=DENSITY_THRESHOLD, seed=0):
+        self.charts = charts
+        self.sample_size = sample_size
+        self.rng = np.random.default_rng(seed)
+        self.rows = 0
+        self.sums = dict.fromkeys(self.KPI_COLUMNS, 0)
+        self.counts = dict.fromkeys(self.KPI_COLUMNS, 0)
+        self.monthly = pd.Series(dtype=float)
+        self.stats = {chart["key"]: RegressionStats() for chart in charts if chart["kind"] == "scatter"}
+        self.sample_columns = sorted({column for chart in charts if chart["kind"] == "scatter"
+                                      for column in chart["columns"]})
+        self.sample = None
+
+    def update(self, chunk):
+        for column in self.KPI_COLUMNS:
+            self.sums[column] += chunk[column].sum()
+            self.counts[column] += int(chunk[column].count())
+
+        revenue = chunk.groupby(chunk["Date"].dt.to_period("M"))["Revenue"].sum()
+        self.monthly = self.monthly.add(revenue, fill_value=0) if len(self.monthly) else revenue
+
+        for chart in self.charts:
+            if chart["key"] in self.stats:
+                x, y = chart["columns"]
+                self.stats[chart["key"]].update(chunk[x].to_numpy(), chunk[y].to_numpy())
+
+        # keep the rows with the smallest random keys, remembering their position
+        sample = chunk[self.sample_columns].assign(
+            _key=self.rng.random(len(chunk)), _row=np.arange(self.rows, self.rows + len(chunk))
+        )
+        sample = sample if self.sample is None else pd.concat([self.sample, sample], ignore_index=True)
+        if len(sample) > self.sample_size:
+            sample = sample.nsmallest(self.sample_size, "_key")
+        self.sample = sample
+        self.rows += len(chunk)
+
+    def kpis(self):
+        return kpi_cards(
+            self.sums["Revenue"],
+            self.sums["Orders"],
+            self.sums["Conversion_Rate"] / self.counts["Conversion_Rate"],
+            self.sums["Marketing_Spend"],
+            self.sums["Avg_Order_Value"] / self.counts["Avg_Order_Value"],
+        )
+
+    def monthly_revenue(self):
+        # Same rows as df.set_index("Date").resample("M").sum()["Revenue"], empty months included
+        months = pd.period_range(self.monthly.index.min(), self.monthly.index.max(), freq="M")
+        revenue = self.monthly.sort_index().reindex(months, fill_value=0)
+        return pd.DataFrame({"Date": months.to_timestamp(how="end").normalize(), "Revenue": revenue.to_numpy()})
+
+    def chart_inputs(self):
+        sample = self.sample.sort_values("_row")
+        inputs = {}
+        for chart in self.charts:
+            if chart["kind"] == "trend":
+                inputs[chart["key"]] = (self.monthly_revenue(), None)
+            else:
+                inputs[chart["key"]] = (sample[chart["columns"]].reset_index(drop=True), self.stats[chart["key"]])
+        return inputs
+
+
+def stream_kpi_data(paths, charts, chunk_size=250_000):
+    stream = KpiStream(charts)
+    for path in paths:
+        for chunk in pd.read_csv(path, parse_dates=["Date"], chunksize=chunk_size):
+            with span("aggregate chunk", rows=len(chunk)):
+                stream.update(chunk)
+    return stream
+
+
+def digest(*parts):
+    sha = hashlib.sha256()
+    for part in parts:
+        sha.update(part if isinstance(part, bytes) else json.dumps(part, sort_keys=True, default=str).encode())
+    return sha.hexdigest()
+
+
+def chart_params_hash(chart):
+    # The chart spec, its effective density threshold and the source of the code that draws it
+    if chart["kind"] == "trend":
+        renderer, density_threshold = plot_revenue_trend, None
+    else:
+        renderer, density_threshold = scatter_with_regression, chart.get("density_threshold", DENSITY_THRESHOLD)
+    return digest(chart, density_threshold, inspect.getsource(renderer), inspect.getsource(render_chart))
+
+
+def chart_data_hash(data, stats=None):
+    rows = pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes()
+    return digest(rows, vars(stats) if stats is not None else None)
+
+
+def html_template_hash(charts):
+    return digest(charts, inspect.getsource(build_html))
+
+
+def source_stamp(paths):
+    stamps = []
+    for path in paths:
+        stat = os.stat(path)
+        stamps.append({"path": os.path.abspath(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns})
+    return stamps
+
+
+def load_manifest(output_dir):
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def save_manifest(output_dir, manifest):
+    with open(os.path.join(output_dir, MANIFEST_FILE), "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, indent=2)
+
+
+def is_current(entry, output_dir, **expected):
+    return (
+        entry is not None
+        and all(entry.get(key) == value for key, value in expected.items())
+        and os.path.exists(os.path.join(output_dir, entry["file"]))
+    )
 
-    trend_path = os.path.join(OUTPUT_DIR, "revenue_trend.png")
-    spend_path = os.path.join(OUTPUT_DIR, "spend_vs_revenue.png")
-    visitors_path = os.path.join(OUTPUT_DIR, "visitors_vs_orders.png")
-    cac_path = os.path.join(OUTPUT_DIR, "cac_vs_revenue.png")
 
-    plot_revenue_trend(df, trend_path)
-    scatter_with_regression(
-        df["Marketing_Spend"].values,
-        df["Revenue"].values,
-        "Revenue vs Marketing Spend",
-        "Marketing Spend",
-        "Revenue",
-        spend_path,
-        "#1f7a8c",
-    )
-    scatter_with_regression(
-        df["Website_Visitors"].values,
-        df["Orders"].values,
-        "Orders vs Website Visitors",
-        "Website Visitors",
-        "Orders",
-        visitors_path,
-        "#ff6b35",
-    )
-    scatter_with_regression(
-        df["Customer_Acquisition_Cost"].values,
-        df["Revenue"].values,
-        "Revenue vs Customer Acquisition Cost",
-        "Customer Acquisition Cost",
-        "Revenue",
-        cac_path,
-        "#ffa62b",
+def print_build_summary(reused, rebuilt):
+    print(f"Reused ({len(reused)}): {', '.join(reused) or '-'}")
+    print(f"Rebuilt ({len(rebuilt)}): {', '.join(rebuilt) or '-'}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the static KPI dashboard")
+    parser.add_argument("--data", nargs="+", default=[DATA_FILE],
+                        help="one or more KPI CSV files or glob patterns (default: ecommerce_kpi.csv)")
+    parser.add_argument("--stream", action="store_true",
+                        help="aggregate the data in chunks with constant memory instead of loading it")
+    parser.add_argument("--chunk-size", type=int, default=250_000)
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="chart rendering processes (default: one per CPU; 1 renders in-process)")
+    parser.add_argument("--force", action="store_true",
+                        help="ignore the build manifest and regenerate every chart and index.html")
+    add_profile_argument(parser, "dashboard")
+    return parser.parse_args(argv)
+
+
+def build(args):
+    ensure_dir(args.output_dir)
+    manifest = {} if args.force else load_manifest(args.output_dir)
+    previous = manifest.get("charts", {})
+    paths = resolve_paths(args.data)
+    source = source_stamp(paths)
+    params = {chart["key"]: chart_params_hash(chart) for chart in CHARTS}
+
+    # Same data file (size and mtime) and same chart code/specs: nothing to re-read
+    html_entry = manifest.get("html")
+    if (
+        manifest.get("source") == source
+        and all(is_current(previous.get(chart["key"]), args.output_dir, params=params[chart["key"]])
+                for chart in CHARTS)
+        and is_current(html_entry, args.output_dir, template=html_template_hash(CHARTS))
+    ):
+        print_build_summary([chart["file"] for chart in CHARTS] + [HTML_FILE], [])
+        print(f"Dashboard in {args.output_dir} is up to date")
+        return
+
+    sampled_rows = None
+    if args.stream:
+        with span("stream data") as stage:
+            stream = stream_kpi_data(paths, CHARTS, args.chunk_size)
+            stage.add_rows(stream.rows)
+        with span("kpis"):
+            kpis = stream.kpis()
+            inputs = stream.chart_inputs()
+        sampled_rows = stream.rows
+    else:
+        with span("read data") as stage:
+            df = read_kpi_data(paths)
+            stage.add_rows(len(df))
+        with span("kpis", rows=len(df)):
+            kpis = compute_kpis(df)
+        inputs = {chart["key"]: (df[chart["columns"]], None) for chart in CHARTS}
+
+    entries = {}
+    stale = []
+    for chart in CHARTS:
+        with span("hash chart data"):
+            entry = {"file": chart["file"], "params": params[chart["key"]],
+                     "data": chart_data_hash(*inputs[chart["key"]])}
+        if not is_current(previous.get(chart["key"]), args.output_dir, params=entry["params"], data=entry["data"]):
+            stale.append(chart)
+        elif "seconds" in previous[chart["key"]]:
+            entry["seconds"] = previous[chart["key"]]["seconds"]
+        entries[chart["key"]] = entry
+
+    started = time.perf_counter()
+    with span("render charts"):
+        timings = render_charts(inputs, stale, args.output_dir, args.workers, sampled_rows)
+    print_timing_report(stale, timings, time.perf_counter() - started)
+    for chart, seconds in zip(stale, timings):
+        entries[chart["key"]]["seconds"] = round(seconds, 3)
+
+    html = {"file": HTML_FILE, "template": html_template_hash(CHARTS)}
+    with span("rolling kpis"):
+        rolling = rolling_section(paths, args.output_dir)
+    html["hash"] = digest(kpis, rolling, html["template"])
+    html_rebuilt = not is_current(html_entry, args.output_dir, hash=html["hash"])
+    if html_rebuilt:
+        with span("html"):
+            build_html(kpis, CHARTS, os.path.join(args.output_dir, HTML_FILE), rolling)
+
+    save_manifest(args.output_dir, {"source": source, "charts": entries, "html": html})
+    stale_keys = {chart["key"] for chart in stale}
+    print_build_summary(
+        [chart["file"] for chart in CHARTS if chart["key"] not in stale_keys] + ([] if html_rebuilt else [HTML_FILE]),
+        [chart["file"] for chart in stale] + ([HTML_FILE] if html_rebuilt else []),
     )
+    print(f"Dashboard generated in {args.output_dir}")
 
-    image_files = {
-        "trend": os.path.basename(trend_path),
-        "spend": os.path.basename(spend_path),
-        "visitors": os.path.basename(visitors_path),
-        "cac": os.path.basename(cac_path),
-    }
 
-    html_path = os.path.join(OUTPUT_DIR, "index.html")
-    build_html(kpis, image_files, html_path)
-    print(f"Dashboard generated in {OUTPUT_DIR}")
+def main(argv=None):
+    args = parse_args(argv)
+    with profiling(args.profile, "dashboard"):
+        build(args)
 
 
 if __name__ == "__main__":
@@ -1,12 +1,37 @@
+import argparse
 import csv
 import math
+import os
 import random
+import sys
 from datetime import date, timedelta
 
+# dataset_writer lives at the repository root, shared with the other generators
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dataset_writer import add_output_arguments, write_table  # noqa: E402
+from stage_profiler import add_profile_argument, profiling, span  # noqa: E402
+
 SEED = 42
 DAYS = 730
 START_DATE = date(2024, 2, 15)
 OUTPUT_FILE = "ecommerce_kpi.csv"
+FIELDNAMES = [
+    "Date",
+    "Marketing_Spend",
+    "Website_Visitors",
+    "Conversion_Rate",
+    "Orders",
+    "Revenue",
+    "Avg_Order_Value",
+    "Customer_Acquisition_Cost",
+    "Region",
+]
+
+CHANNELS = [
+    {"name": "Web", "share": 0.50, "aov_mult": 1.00, "conv_mult": 1.00},
+    {"name": "App", "share": 0.32, "aov_mult": 0.96, "conv_mult": 1.12},
+    {"name": "Marketplace", "share": 0.18, "aov_mult": 0.92, "conv_mult": 0.88},
+]
 
 REGIONS = [
     {"name": "North", "weight": 0.28, "spend_mult": 1.05, "aov_mult": 1.02, "conv_mult": 1.00},
@@ -33,12 +58,12 @@ def get_region_factors(region_name):
     return REGIONS[0]
 
 
-def generate_rows():
-    rng = random.Random(SEED)
+def generate_rows(days=DAYS, start_date=START_DATE, seed=SEED):
+    rng = random.Random(seed)
     rows = []
 
-    for day_index in range(DAYS):
-        current_date = START_DATE + timedelta(days=day_index)
+    for day_index in range(days):
+        current_date = start_date + timedelta(days=day_index)
         day_of_year = current_date.timetuple().tm_yday
 
         region = pick_region(rng)
@@ -92,26 +117,162 @@ def generate_rows():
     return rows
 
 
-def write_csv(rows, output_path):
-    fieldnames = [
-        "Date",
-        "Marketing_Spend",
-        "Website_Visitors",
-        "Conversion_Rate",
-        "Orders",
-        "Revenue",
-        "Avg_Order_Value",
-        "Customer_Acquisition_Cost",
-        "Region",
-    ]
+def build_segments(sub_regions=1, channels=None):
+    segments = []
+    for region in REGIONS:
+        for sub_region in range(1, sub_regions + 1):
+            for channel in channels or [None]:
+                name = region["name"] if sub_regions == 1 else f"{region['name']}-{sub_region}"
+                share = 1.0 / sub_regions
+                segment = {"Region": name, "share": share, "spend_mult": region["spend_mult"],
+                           "aov_mult": region["aov_mult"], "conv_mult": region["conv_mult"]}
+                if channel is not None:
+                    segment["Channel"] = channel["name"]
+                    segment["share"] *= channel["share"]
+                    segment["aov_mult"] *= channel["aov_mult"]
+                    segment["conv_mult"] *= channel["conv_mult"]
+                segments.append(segment)
+    return segments
+
+
+def generate_frame(days=DAYS, start_date=START_DATE, seed=SEED, sub_regions=1, channels=None):
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    segments = build_segments(sub_regions, channels)
+    shape = (days, len(segments))
+
+    def column(key):
+        return np.array([segment[key] for segment in segments])
+
+    share, spend_mult = column("share"), column("spend_mult")
+    aov_mult, conv_mult = column("aov_mult"), column("conv_mult")
+
+    dates = np.datetime64(start_date) + np.arange(days)
+    day_index = np.arange(days)[:, None]
+    day_of_year = ((dates - dates.astype("datetime64[Y]")).astype(int) + 1)[:, None]
+
+    weekly = 1.0 + 0.06 * np.sin(2 * np.pi * day_index / 7)
+    annual = 1.0 + 0.14 * np.sin(2 * np.pi * day_of_year / 365)
+    promo = 1.0 + 0.18 * ((day_of_year >= 150) & (day_of_year <= 170)) + 0.25 * (
+        (day_of_year >= 330) & (day_of_year <= 360)
+    )
+
+    base_spend = 9000 * weekly * annual * promo * share
+    spend_noise = rng.normal(0, 1100, shape) * share
+    marketing_spend = np.maximum(1200 * share, base_spend + spend_noise) * spend_mult
+
+    visitors = marketing_spend * (2.9 + rng.normal(0, 0.28, shape)) + 5200 * annual * share
+    visitors = np.maximum(300 * share, visitors)
+
+    conv_rate = 0.018 * conv_mult * (1 + 0.0000015 * marketing_spend / share)
+    conv_rate = np.clip(conv_rate + rng.normal(0, 0.0022, shape), 0.006, 0.05)
+
+    orders = (visitors * conv_rate).astype(np.int64)
 
+    aov = 68 * aov_mult * (1 + 0.06 * annual) + rng.normal(0, 6.5, shape)
+    aov = np.clip(aov, 25, 220)
+
+    revenue = np.maximum(0, orders * aov * (1 + rng.normal(0, 0.03, shape)))
+
+    new_customer_rate = np.clip(0.55 + rng.normal(0, 0.07, shape), 0.35, 0.85)
+    new_customers = np.maximum(1, (orders * new_customer_rate).astype(np.int64))
+    cac = marketing_spend / new_customers
+
+    website_visitors = visitors.astype(np.int64)
+    frame = pd.DataFrame(
+        {
+            "Date": np.repeat(dates, len(segments)).astype(str),
+            "Marketing_Spend": np.round(marketing_spend, 2).ravel(),
+            "Website_Visitors": website_visitors.ravel(),
+            "Conversion_Rate": np.round(orders / np.maximum(visitors, 1), 4).ravel(),
+            "Orders": orders.ravel(),
+            "Revenue": np.round(revenue, 2).ravel(),
+            "Avg_Order_Value": np.round(aov, 2).ravel(),
+            "Customer_Acquisition_Cost": np.round(cac, 2).ravel(),
+            "Region": np.tile(column("Region"), days),
+        }
+    )
+    if channels:
+        frame["Channel"] = np.tile(column("Channel"), days)
+    return frame
+
+
+def write_csv(rows, output_path):
     with open(output_path, "w", newline="", encoding="utf-8") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer = csv.DictWriter(csvfile, fieldnames=FIELDNAMES)
         writer.writeheader()
         writer.writerows(rows)
 
 
+def write_frame_csv(frame, output_path):
+    frame.to_csv(output_path, index=False)
+
+
+def write_columnar(rows, output_path, formats, partition_by_month=False):
+    import pandas as pd
+
+    df = pd.DataFrame(rows)
+    df["Date"] = pd.to_datetime(df["Date"])
+    categories = {"Region": sorted(df["Region"].unique())}
+    if "Channel" in df:
+        categories["Channel"] = [channel["name"] for channel in CHANNELS]
+    write_table(
+        df,
+        os.path.splitext(output_path)[0],
+        formats,
+        categories=categories,
+        partition_date="Date" if partition_by_month else None,
+    )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate ecommerce_kpi.csv")
+    parser.add_argument("--engine", choices=["loop", "numpy"], default="loop",
+                        help="loop: one random region per day (default, the original dataset); "
+                             "numpy: every region every day, computed as whole arrays")
+    parser.add_argument("--days", type=int, default=DAYS)
+    parser.add_argument("--start-date", type=date.fromisoformat, default=START_DATE)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--sub-regions", type=int, default=1,
+                        help="numpy engine: split each region into N sub-regions (North-1, North-2, ...)")
+    parser.add_argument("--channels", action="store_true",
+                        help="numpy engine: split each region by sales channel (adds a Channel column)")
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    add_output_arguments(parser)
+    add_profile_argument(parser, "kpi")
+    args = parser.parse_args(argv)
+    if args.engine == "loop" and (args.sub_regions != 1 or args.channels):
+        parser.error("--sub-regions and --channels require --engine numpy")
+    return args
+
+
+def generate(args):
+    with span(f"generate ({args.engine})") as stage:
+        if args.engine == "numpy":
+            data_rows = generate_frame(args.days, args.start_date, args.seed, args.sub_regions,
+                                       CHANNELS if args.channels else None)
+        else:
+            data_rows = generate_rows(args.days, args.start_date, args.seed)
+        stage.add_rows(len(data_rows))
+    if "csv" in args.formats:
+        with span(f"write {os.path.basename(args.output)}", rows=len(data_rows)):
+            if args.engine == "numpy":
+                write_frame_csv(data_rows, args.output)
+            else:
+                write_csv(data_rows, args.output)
+    columnar = [fmt for fmt in args.formats if fmt != "csv"]
+    if columnar:
+        write_columnar(data_rows, args.output, columnar, args.partition_by_month)
+    print(f"Wrote {len(data_rows)} rows to {args.output} ({', '.join(args.formats)})")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with profiling(args.profile, "kpi"):
+        generate(args)
+
+
 if __name__ == "__main__":
-    data_rows = generate_rows()
-    write_csv(data_rows, OUTPUT_FILE)
-    print(f"Wrote {len(data_rows)} rows to {OUTPUT_FILE}")
+    main()
@@ -0,0 +1,269 @@
+import argparse
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from build_dashboard import CHARTS, DATA_FILE, KpiStream, resolve_paths
+
+PAYLOAD_DIR = "payloads"
+ALL_REGIONS = "All"
+# dashboard.html aims for at most this many points on the trend chart
+MAX_POINTS = 400
+# daily revenue is also downsampled with LTTB to each of these sizes
+LTTB_LEVELS = (500, 2000, 8000)
+SCATTER_POINTS = 1500
+# file names write_payloads creates inside each region's directory
+PAYLOAD_FILE = re.compile(r"(trend|scatter)_(\w+)\.json")
+
+
+def week_start(dates):
+    # Sunday-based weeks, matching bucketStart in dashboard.html
+    return (dates - pd.to_timedelta((dates.dt.dayofweek + 1) % 7, unit="D")).dt.normalize()
+
+
+def lttb(x, y, threshold):
+    # Largest-Triangle-Three-Buckets: indices of `threshold` points that keep
+    # the visual shape of the series (peaks and troughs survive downsampling)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    selected = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_start, next_end = (edges[bucket + 1], edges[bucket + 2]) if bucket + 2 < len(edges) else (n - 1, n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        area = np.abs(
+            (x[selected] - avg_x) * (y[start:end] - y[selected])
+            - (x[selected] - x[start:end]) * (avg_y - y[selected])
+        )
+        selected = start + int(np.argmax(area))
+        indices[bucket + 1] = selected
+    return indices
+
+
+def thin_scatter(x, y, max_points=SCATTER_POINTS):
+    # One point per occupied cell of a grid over the plot area, plus the
+    # extremes: keeps the cloud's outline and outliers with bounded points
+    if len(x) <= max_points:
+        return np.arange(len(x))
+    side = max(int(np.sqrt(max_points)) - 1, 1)
+    cells = []
+    for values in (x, y):
+        low, high = np.min(values), np.max(values)
+        scaled = (values - low) / (high - low) if high > low else np.zeros(len(values))
+        cells.append(np.minimum((scaled * side).astype(np.int64), side - 1))
+    _, keep = np.unique(cells[0] * side + cells[1], return_index=True)
+    extremes = [np.argmin(x), np.argmax(x), np.argmin(y), np.argmax(y)]
+    return np.unique(np.concatenate([keep, extremes]))
+
+
+def whole(values):
+    return np.round(values).astype(np.int64).tolist()
+
+
+def region_slug(region):
+    return re.sub(r"[^A-Za-z0-9_-]", "_", region)
+
+
+class RegionAggregates:
+    # Per region (and across all regions): a KpiStream with the KPI sums,
+    # regression sums and scatter sample, plus daily revenue for the rollups
+    def __init__(self, charts=CHARTS):
+        self.charts = charts
+        self.streams = {}
+        self.daily = {}
+
+    def update(self, rows):
+        groups = [(ALL_REGIONS, rows)] + list(rows.groupby("Region", sort=True))
+        for region, group in groups:
+            group = group.reset_index(drop=True)
+            self.streams.setdefault(region, KpiStream(self.charts)).update(group)
+            daily = group.groupby(group["Date"].dt.normalize())["Revenue"].sum()
+            previous = self.daily.get(region)
+            self.daily[region] = daily if previous is None else previous.add(daily, fill_value=0)
+
+    def regions(self):
+        return [ALL_REGIONS] + sorted(region for region in self.streams if region != ALL_REGIONS)
+
+    def stream(self, region):
+        if region not in self.streams:
+            raise KeyError(region)
+        return self.streams[region]
+
+    def daily_revenue(self, region):
+        # every calendar day of the whole dataset, so all regions share one axis
+        days = pd.date_range(self.daily[ALL_REGIONS].index.min(), self.daily[ALL_REGIONS].index.max(), freq="D")
+        return self.daily[region].reindex(days, fill_value=0)
+
+    def trend_levels(self, region):
+        days = len(self.daily_revenue(region))
+        return [f"lttb{level}" for level in LTTB_LEVELS if level < days]
+
+    def kpis_payload(self, region):
+        stream = self.stream(region)
+        return {
+            "region": region,
+            "rows": stream.rows,
+            "kpis": [{"label": label, "value": value} for label, value in stream.kpis()],
+        }
+
+    def trend_payload(self, region, resolution):
+        self.stream(region)
+        daily = self.daily_revenue(region)
+        payload = {"region": region, "resolution": resolution}
+        if resolution == "day":
+            payload.update(start=daily.index[0].strftime("%Y-%m-%d"), values=whole(daily.to_numpy()))
+        elif resolution in ("week", "month"):
+            dates = daily.index.to_series()
+            keys = week_start(dates) if resolution == "week" else dates.dt.to_period("M").dt.start_time
+            rolled = daily.groupby(keys.to_numpy()).sum()
+            payload.update(labels=[label.strftime("%Y-%m-%d") for label in rolled.index],
+                           values=whole(rolled.to_numpy()))
+        elif resolution in self.trend_levels(region):
+            indices = lttb(np.arange(len(daily)), daily.to_numpy(), int(resolution[len("lttb"):]))
+            payload.update(
+                start=daily.index[0].strftime("%Y-%m-%d"),
+                offsets=indices.tolist(),
+                values=whole(daily.to_numpy()[indices]),
+            )
+        else:
+            raise KeyError(resolution)
+        return payload
+
+    def scatter_payload(self, region, key):
+        chart = next(chart for chart in self.charts if chart["key"] == key and chart["kind"] == "scatter")
+        data, stats = self.stream(region).chart_inputs()[key]
+        x, y = (data[column].to_numpy(dtype=float) for column in chart["columns"])
+        keep = thin_scatter(x, y)
+        slope, intercept, r2 = stats.fit() if stats.n > 1 else (0.0, 0.0, 0.0)
+        line_x = [float(x.min()), float(x.max())] if len(x) else []
+        return {
+            "region": region,
+            "key": key,
+            "columns": chart["columns"],
+            "rows": stats.n,
+            "x": np.round(x[keep], 4).tolist(),
+            "y": np.round(y[keep], 4).tolist(),
+            "line": [[value, slope * value + intercept] for value in line_x],
+            "r2": r2,
+        }
+
+    def index_payload(self):
+        days = self.daily_revenue(ALL_REGIONS).index
+        return {
+            "start": days[0].strftime("%Y-%m-%d"),
+            "end": days[-1].strftime("%Y-%m-%d"),
+            "days": len(days),
+            "max_points": MAX_POINTS,
+            "regions": [
+                {
+                    "name": region,
+                    "slug": region_slug(region),
+                    "kpis": self.kpis_payload(region)["kpis"],
+                    "lttb": [{"name": level, "points": int(level[len("lttb"):])}
+                             for level in self.trend_levels(region)],
+                }
+                for region in self.regions()
+            ],
+            "scatter": [chart["key"] for chart in self.charts if chart["kind"] == "scatter"],
+        }
+
+    def payload(self, name):
+        # payload for a relative file name: index.json, <region>/trend_<res>.json, <region>/scatter_<key>.json
+        if name == "index.json":
+            return self.index_payload()
+        slug, _, file_name = name.partition("/")
+        regions = {region_slug(region): region for region in self.regions()}
+        match = PAYLOAD_FILE.fullmatch(file_name)
+        if slug not in regions or match is None:
+            raise KeyError(name)
+        kind, argument = match.groups()
+        if kind == "trend":
+            return self.trend_payload(regions[slug], argument)
+        return self.scatter_payload(regions[slug], argument)
+
+    def payload_names(self):
+        names = ["index.json"]
+        scatter_keys = [chart["key"] for chart in self.charts if chart["kind"] == "scatter"]
+        for region in self.regions():
+            slug = region_slug(region)
+            for resolution in ["day", "week", "month"] + self.trend_levels(region):
+                names.append(f"{slug}/trend_{resolution}.json")
+            names.extend(f"{slug}/scatter_{key}.json" for key in scatter_keys)
+        return names
+
+
+def dump_payload(payload):
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def build_aggregates(paths, chunk_size=250_000):
+    aggregates = RegionAggregates()
+    for path in paths:
+        for chunk in pd.read_csv(path, parse_dates=["Date"], chunksize=chunk_size):
+            aggregates.update(chunk)
+    return aggregates
+
+
+def clear_payloads(output_dir):
+    # Remove payloads of an earlier run (a dropped region or LTTB level would
+    # linger otherwise); only files named like payloads are touched
+    if not os.path.isdir(output_dir):
+        return
+    index = os.path.join(output_dir, "index.json")
+    if os.path.isfile(index):
+        os.remove(index)
+    for entry in os.scandir(output_dir):
+        if not entry.is_dir(follow_symlinks=False):
+            continue
+        for payload in os.scandir(entry.path):
+            if payload.is_file(follow_symlinks=False) and PAYLOAD_FILE.fullmatch(payload.name):
+                os.remove(payload.path)
+        if not os.listdir(entry.path):
+            os.rmdir(entry.path)
+
+
+def write_payloads(aggregates, output_dir):
+    clear_payloads(output_dir)
+    total = 0
+    names = aggregates.payload_names()
+    for name in names:
+        path = os.path.join(output_dir, *name.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        content = dump_payload(aggregates.payload(name))
+        with open(path, "wb") as handle:
+            handle.write(content)
+        total += len(content)
+    return len(names), total
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the JSON payloads dashboard.html reads")
+    parser.add_argument("--data", nargs="+", default=[DATA_FILE],
+                        help="one or more KPI CSV files or glob patterns (default: ecommerce_kpi.csv)")
+    parser.add_argument("--output-dir", default=PAYLOAD_DIR)
+    parser.add_argument("--chunk-size", type=int, default=250_000)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    paths = resolve_paths(args.data)
+    aggregates = build_aggregates(paths, args.chunk_size)
+    files, size = write_payloads(aggregates, args.output_dir)
+    source_size = sum(os.path.getsize(path) for path in paths)
+    print(f"Wrote {files} payload files ({size / 1024:,.1f} KB) to {args.output_dir} "
+          f"from {source_size / 1024:,.1f} KB of CSV")
+
+
+if __name__ == "__main__":
+    main()
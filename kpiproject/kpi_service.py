@@ -0,0 +1,196 @@
+import argparse
+import asyncio
+import hashlib
+import io
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+
+import pandas as pd
+
+from build_dashboard import CHARTS, DATA_FILE
+from kpi_payloads import ALL_REGIONS, RegionAggregates, dump_payload
+
+POLL_SECONDS = 2.0
+HEAD_BYTES = 65536
+DASHBOARD_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dashboard.html")
+
+
+def head_digest(path, length):
+    with open(path, "rb") as handle:
+        return hashlib.sha1(handle.read(min(length, HEAD_BYTES))).hexdigest()
+
+
+class KpiCache:
+    # RegionAggregates (KPI sums, daily revenue, regression sums and scatter
+    # samples per region) kept in memory. refresh() folds rows appended to the
+    # CSV into the existing aggregates and only reloads everything if the file
+    # was rewritten.
+    def __init__(self, path, charts=CHARTS):
+        self.path = path
+        self.charts = charts
+        self.lock = threading.Lock()
+        self.reloads = 0
+        self.appended_rows = 0
+        self.reload()
+
+    def reload(self):
+        with open(self.path, "rb") as handle:
+            data = handle.read()
+        end = data.rfind(b"\n") + 1
+        with self.lock:
+            self.aggregates = RegionAggregates(self.charts)
+            self.payloads = {}
+            self.columns = data[:data.find(b"\n")].decode("utf-8").strip().split(",")
+            self._fold(pd.read_csv(io.BytesIO(data[:end]), parse_dates=["Date"]))
+            self.offset = end
+            self.digest = head_digest(self.path, end)
+            self.reloads += 1
+            self.refreshed_at = time.time()
+
+    def _fold(self, rows):
+        self.aggregates.update(rows)
+        self.payloads = {}
+
+    def refresh(self):
+        size = os.path.getsize(self.path)
+        if size == self.offset:
+            return 0
+        if size < self.offset or head_digest(self.path, self.offset) != self.digest:
+            self.reload()
+            return None
+
+        with open(self.path, "rb") as handle:
+            handle.seek(self.offset)
+            data = handle.read(size - self.offset)
+        # only whole lines; a partially written last row is picked up next time
+        end = data.rfind(b"\n") + 1
+        if end == 0:
+            return 0
+        rows = pd.read_csv(io.BytesIO(data[:end]), header=None, names=self.columns, parse_dates=["Date"])
+        with self.lock:
+            self._fold(rows)
+            self.offset += end
+            self.digest = head_digest(self.path, self.offset)
+            self.appended_rows += len(rows)
+            self.refreshed_at = time.time()
+        return len(rows)
+
+    def cached(self, key, build):
+        # payloads are kept as serialized JSON until the next fold invalidates them
+        with self.lock:
+            if key not in self.payloads:
+                self.payloads[key] = dump_payload(build())
+            return self.payloads[key]
+
+    def regions(self):
+        return self.aggregates.regions()
+
+    def kpis(self, region):
+        return self.cached(("kpis", region), lambda: self.aggregates.kpis_payload(region))
+
+    def trend(self, region, resolution):
+        return self.cached(("trend", region, resolution), lambda: self.aggregates.trend_payload(region, resolution))
+
+    def scatter(self, region, key):
+        return self.cached(("scatter", region, key), lambda: self.aggregates.scatter_payload(region, key))
+
+    def payload(self, name):
+        # same files kpi_payloads.py writes, served from memory
+        return self.cached(("payload", name), lambda: self.aggregates.payload(name))
+
+    def status(self):
+        return {
+            "path": os.path.abspath(self.path),
+            "rows": self.aggregates.stream(ALL_REGIONS).rows,
+            "offset": self.offset,
+            "reloads": self.reloads,
+            "appended_rows": self.appended_rows,
+            "refreshed_at": self.refreshed_at,
+        }
+
+
+def create_app(path=DATA_FILE, poll_seconds=POLL_SECONDS):
+    from fastapi import FastAPI, HTTPException
+    from fastapi.responses import FileResponse, Response
+
+    cache = KpiCache(path)
+
+    async def watch():
+        while True:
+            await asyncio.sleep(poll_seconds)
+            try:
+                await asyncio.to_thread(cache.refresh)
+            except (OSError, ValueError, pd.errors.ParserError) as exc:
+                print(f"Refresh of {path} failed: {exc}")
+
+    @asynccontextmanager
+    async def lifespan(app):
+        watcher = asyncio.create_task(watch()) if poll_seconds > 0 else None
+        yield
+        if watcher is not None:
+            watcher.cancel()
+
+    app = FastAPI(title="KPI service", lifespan=lifespan)
+    app.state.cache = cache
+
+    def lookup(build, *args):
+        try:
+            return Response(build(*args), media_type="application/json")
+        except (KeyError, StopIteration):
+            raise HTTPException(status_code=404, detail=f"Unknown region, chart or resolution: {', '.join(map(str, args))}")
+
+    @app.get("/")
+    async def dashboard():
+        return FileResponse(DASHBOARD_FILE)
+
+    @app.get("/api/regions")
+    async def regions():
+        return cache.regions()
+
+    @app.get("/api/kpis")
+    async def kpis(region: str = ALL_REGIONS):
+        return lookup(cache.kpis, region)
+
+    @app.get("/api/trend")
+    async def trend(region: str = ALL_REGIONS, freq: str = "week"):
+        return lookup(cache.trend, region, freq)
+
+    @app.get("/api/scatter/{key}")
+    async def scatter(key: str, region: str = ALL_REGIONS):
+        return lookup(cache.scatter, region, key)
+
+    @app.get("/api/payloads/{name:path}")
+    async def payload(name: str):
+        return lookup(cache.payload, name)
+
+    @app.get("/api/status")
+    async def status():
+        return cache.status()
+
+    return app
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve cached KPI aggregates for dashboard.html")
+    parser.add_argument("--data", default=DATA_FILE)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--poll", type=float, default=POLL_SECONDS,
+                        help="seconds between checks of the CSV for appended rows (0 disables watching)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        import uvicorn
+    except ImportError as exc:
+        raise SystemExit("The KPI service needs an ASGI server: pip install uvicorn") from exc
+
+    uvicorn.run(create_app(args.data, args.poll), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import argparse
+import asyncio
+import time
+
+import httpx
+import numpy as np
+
+ENDPOINTS = [
+    "/api/kpis",
+    "/api/trend?freq=week",
+    "/api/trend?freq=month",
+    "/api/scatter/spend",
+    "/api/scatter/visitors",
+]
+
+
+async def worker(client, queue, latencies, errors):
+    while queue:
+        endpoint, url = queue.pop()
+        started = time.perf_counter()
+        try:
+            response = await client.get(url)
+            response.raise_for_status()
+        except httpx.HTTPError:
+            errors[endpoint] = errors.get(endpoint, 0) + 1
+            continue
+        latencies.setdefault(endpoint, []).append(time.perf_counter() - started)
+
+
+async def run(client, requests, concurrency, regions):
+    # cycle through every endpoint for every region
+    queue = []
+    for index in range(requests):
+        endpoint = ENDPOINTS[index % len(ENDPOINTS)]
+        region = regions[index // len(ENDPOINTS) % len(regions)]
+        separator = "&" if "?" in endpoint else "?"
+        queue.append((endpoint, f"{endpoint}{separator}region={region}"))
+    queue.reverse()
+
+    latencies, errors = {}, {}
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(client, queue, latencies, errors) for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def report(latencies, errors, elapsed):
+    total = sum(len(values) for values in latencies.values())
+    print(f"{'endpoint':<24} {'requests':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for endpoint in ENDPOINTS:
+        if endpoint not in latencies:
+            continue
+        p50, p95, p99 = np.percentile(np.array(latencies[endpoint]) * 1000, [50, 95, 99])
+        print(f"{endpoint:<24} {len(latencies[endpoint]):>9,} {p50:>8.2f} {p95:>8.2f} {p99:>8.2f}")
+    print(f"\n{total:,} requests in {elapsed:.2f}s ({total / elapsed:,.0f} req/s), "
+          f"{sum(errors.values())} errors")
+
+
+async def main_async(args):
+    if args.in_process:
+        from kpi_service import create_app
+
+        transport = httpx.ASGITransport(app=create_app(args.data, poll_seconds=0))
+        client = httpx.AsyncClient(transport=transport, base_url="http://kpi-service")
+    else:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        client = httpx.AsyncClient(base_url=args.url, limits=limits, timeout=30)
+
+    async with client:
+        regions = (await client.get("/api/regions")).json()
+        await run(client, len(ENDPOINTS) * len(regions), args.concurrency, regions)  # warm the caches
+        latencies, errors, elapsed = await run(client, args.requests, args.concurrency, regions)
+    report(latencies, errors, elapsed)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the KPI service")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="base URL of a running kpi_service.py")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--in-process", action="store_true",
+                        help="test an app created in this process instead of a server at --url")
+    parser.add_argument("--data", default="ecommerce_kpi.csv", help="CSV for --in-process")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(main_async(parse_args()))
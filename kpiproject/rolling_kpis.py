@@ -0,0 +1,260 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+DATA_FILE = "ecommerce_kpi.csv"
+STATE_FILE = os.path.join("dashboard", "rolling_state.npz")
+STATE_VERSION = 1
+WINDOWS = (7, 28)
+ALL_REGIONS = "All"
+KPIS = ["revenue", "orders", "conversion", "aov", "cac"]
+# Daily sums kept per region; every rolling KPI is one of them or a ratio of
+# two. Rows counts the contributing rows, so an emptied window is exactly zero.
+MEASURES = ["Revenue", "Orders", "Website_Visitors", "Marketing_Spend", "New_Customers", "Rows"]
+COLUMNS = ["Date", "Region", "Revenue", "Orders", "Website_Visitors", "Marketing_Spend",
+           "Customer_Acquisition_Cost"]
+# An appended file must still start and end its already-ingested part with
+# the same this-many bytes; other rewrites go unnoticed until --rebuild
+CHECK_BYTES = 4096
+
+
+def row_measures(df):
+    # New customers are implied by spend and CAC (the generators set CAC = spend / new customers)
+    spend = df["Marketing_Spend"].to_numpy(dtype=float)
+    cac = df["Customer_Acquisition_Cost"].to_numpy(dtype=float)
+    new_customers = np.divide(spend, cac, out=np.zeros_like(spend), where=cac > 0)
+    return np.column_stack([
+        df["Revenue"].to_numpy(dtype=float),
+        df["Orders"].to_numpy(dtype=float),
+        df["Website_Visitors"].to_numpy(dtype=float),
+        spend,
+        new_customers,
+        np.ones(len(df)),
+    ])
+
+
+def window_kpis(sums):
+    # Rolling KPIs from window sums (last axis = MEASURES): ratios of sums,
+    # so a window's AOV is its revenue over its orders, not a mean of daily AOVs
+    revenue, orders, visitors, spend, new_customers, _ = np.moveaxis(sums, -1, 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "revenue": revenue,
+            "orders": orders,
+            "conversion": np.where(visitors > 0, orders / visitors, np.nan),
+            "aov": np.where(orders > 0, revenue / orders, np.nan),
+            "cac": np.where(new_customers > 0, spend / new_customers, np.nan),
+        }
+
+
+def day_numbers(dates):
+    return pd.to_datetime(dates).to_numpy().astype("datetime64[D]").astype(np.int64)
+
+
+class StaleSource(Exception):
+    # A source file changed other than by appending rows
+    pass
+
+
+class RollingKpis:
+    # Per-region sums over the last w calendar days for every window w.
+    # ring[day % size] holds one day's sums per region (size = the longest
+    # window) and sums[i] are running totals for windows[i]: opening a day
+    # subtracts the days leaving each window and clears its slot, adding rows
+    # adds to that slot and to every total. An appended day therefore costs
+    # O(regions x measures), however long the history is.
+    def __init__(self, windows=WINDOWS):
+        self.windows = tuple(sorted(windows))
+        self.size = self.windows[-1]
+        self.regions = []
+        self.codes = {}
+        self.ring = np.zeros((self.size, 0, len(MEASURES)))
+        self.sums = np.zeros((len(self.windows), 0, len(MEASURES)))
+        self.day = None
+        self.rows = 0
+        # path -> {"offset": bytes ingested, "digest": source_digest at that offset}
+        self.sources = {}
+
+    def _add_regions(self, names):
+        new = [name for name in names if name not in self.codes]
+        if not new:
+            return
+        for name in new:
+            self.codes[name] = len(self.regions)
+            self.regions.append(name)
+        self.ring = np.concatenate([self.ring, np.zeros((self.size, len(new), len(MEASURES)))], axis=1)
+        self.sums = np.concatenate([self.sums, np.zeros((len(self.windows), len(new), len(MEASURES)))], axis=1)
+
+    def _open_day(self, day):
+        if self.day is not None and day - self.day >= self.size:
+            # nothing in any window survives the gap
+            self.ring[:] = 0
+            self.sums[:] = 0
+        elif self.day is not None:
+            for t in range(self.day + 1, day + 1):
+                for i, window in enumerate(self.windows):
+                    self.sums[i] -= self.ring[(t - window) % self.size]
+                self.ring[t % self.size] = 0
+            # subtracting floats leaves rounding residue in windows that are now empty
+            self.sums[self.sums[..., -1] == 0] = 0
+        self.day = day
+
+    def ingest(self, df, snapshots=None):
+        # Rows must arrive in date order, across calls too. With `snapshots`,
+        # (day, window sums) is appended after each run of rows with one date;
+        # a date split over two calls yields two entries, the later one final.
+        if len(df) == 0:
+            return
+        days = day_numbers(df["Date"])
+        if (np.diff(days) < 0).any() or (self.day is not None and days[0] < self.day):
+            raise ValueError("KPI rows are not in date order; rebuild the rolling state")
+        self._add_regions(pd.unique(df["Region"]))
+        codes = df["Region"].map(self.codes).to_numpy()
+        values = row_measures(df)
+        bounds = np.concatenate([[0], np.flatnonzero(np.diff(days)) + 1, [len(days)]])
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            self._open_day(int(days[start]))
+            added = np.zeros((len(self.regions), len(MEASURES)))
+            np.add.at(added, codes[start:end], values[start:end])
+            self.ring[self.day % self.size] += added
+            self.sums += added
+            if snapshots is not None:
+                snapshots.append((self.day, self.sums.copy()))
+        self.rows += len(df)
+
+    def ingest_sources(self, paths, chunk_size=250_000):
+        # Ingest what was appended to each path since the last call; returns the row count
+        unknown = set(self.sources) - {os.path.abspath(path) for path in paths}
+        if unknown:
+            raise StaleSource(f"{', '.join(sorted(unknown))} no longer in the data")
+        rows = self.rows
+        for path in paths:
+            key = os.path.abspath(path)
+            source = self.sources.get(key)
+            if source is None:
+                for chunk in pd.read_csv(path, usecols=COLUMNS, chunksize=chunk_size):
+                    self.ingest(chunk)
+                offset = os.path.getsize(path)
+            else:
+                chunk, offset = read_appended(path, source)
+                if chunk is not None:
+                    self.ingest(chunk)
+            self.sources[key] = {"offset": offset, "digest": source_digest(path, offset)}
+        return self.rows - rows
+
+    def as_of(self):
+        return None if self.day is None else pd.Timestamp(np.datetime64(self.day, "D"))
+
+    def snapshot(self):
+        # Rolling KPIs as of the last ingested day: one row per window and region (All first)
+        rows = []
+        for i, window in enumerate(self.windows):
+            sums = np.vstack([self.sums[i].sum(axis=0, keepdims=True), self.sums[i]])
+            kpis = window_kpis(sums)
+            for j, region in enumerate([ALL_REGIONS] + self.regions):
+                rows.append({"window": window, "region": region, **{kpi: kpis[kpi][j] for kpi in KPIS}})
+        return pd.DataFrame(rows, columns=["window", "region"] + KPIS)
+
+    def save(self, path):
+        meta = {"version": STATE_VERSION, "windows": self.windows, "regions": self.regions, "day": self.day,
+                "rows": self.rows, "sources": self.sources}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "wb") as handle:
+            np.savez(handle, ring=self.ring, meta=np.array(json.dumps(meta)))
+
+    @classmethod
+    def load(cls, path, windows=WINDOWS):
+        # None if there is no usable state for these windows
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as state:
+            meta = json.loads(str(state["meta"]))
+            ring = state["ring"]
+        if meta.get("version") != STATE_VERSION or tuple(meta["windows"]) != tuple(sorted(windows)):
+            return None
+        engine = cls(windows)
+        engine.regions = meta["regions"]
+        engine.codes = {region: code for code, region in enumerate(engine.regions)}
+        engine.ring = ring
+        engine.day = meta["day"]
+        engine.rows = meta["rows"]
+        engine.sources = meta["sources"]
+        # running totals are re-summed from the ring, so rounding never accumulates across runs
+        engine.sums = np.zeros((len(engine.windows), len(engine.regions), len(MEASURES)))
+        if engine.day is not None:
+            for i, window in enumerate(engine.windows):
+                slots = [(engine.day - back) % engine.size for back in range(window)]
+                engine.sums[i] = ring[slots].sum(axis=0)
+        return engine
+
+
+def source_digest(path, offset):
+    with open(path, "rb") as handle:
+        head = handle.read(min(offset, CHECK_BYTES))
+        start = max(offset - CHECK_BYTES, 0)
+        handle.seek(start)
+        tail = handle.read(offset - start)
+    return hashlib.sha1(head + b"\0" + tail).hexdigest()
+
+
+def read_appended(path, source):
+    # Whole rows written after source["offset"], as (DataFrame or None, new offset)
+    offset = source["offset"]
+    if os.path.getsize(path) < offset or source_digest(path, offset) != source["digest"]:
+        raise StaleSource(f"{path} was rewritten, not appended to")
+    with open(path, "rb") as handle:
+        columns = handle.readline().decode("utf-8").strip().split(",")
+        handle.seek(offset)
+        data = handle.read()
+    end = data.rfind(b"\n") + 1
+    if end == 0:
+        return None, offset
+    df = pd.read_csv(io.BytesIO(data[:end]), header=None, names=columns, usecols=COLUMNS)
+    return df, offset + end
+
+
+def update_rolling(paths, state_path=STATE_FILE, rebuild=False, windows=WINDOWS):
+    # Bring the persisted state up to date with `paths`: only appended rows
+    # are read, and the state is rebuilt from scratch when a file was
+    # rewritten or rows arrived out of date order. Returns (engine, rows read, rebuilt).
+    engine = None if rebuild else RollingKpis.load(state_path, windows)
+    rows = None
+    if engine is not None:
+        try:
+            rows = engine.ingest_sources(paths)
+        except (StaleSource, ValueError):
+            engine = None
+    rebuilt = engine is None
+    if rebuilt:
+        engine = RollingKpis(windows)
+        rows = engine.ingest_sources(paths)
+    engine.save(state_path)
+    return engine, rows, rebuilt
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Update and print the rolling-window KPIs per region")
+    parser.add_argument("--data", nargs="+", default=[DATA_FILE],
+                        help="KPI CSV files in date order (default: ecommerce_kpi.csv)")
+    parser.add_argument("--state", default=STATE_FILE, help=f"rolling state file (default: {STATE_FILE})")
+    parser.add_argument("--rebuild", action="store_true", help="ignore the saved state and re-read everything")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    engine, rows, rebuilt = update_rolling(args.data, args.state, args.rebuild)
+    action = "Rebuilt from" if rebuilt else "Appended"
+    print(f"{action} {rows:,} rows; rolling KPIs as of {engine.as_of():%Y-%m-%d}")
+    print(engine.snapshot().to_string(index=False, float_format=lambda value: f"{value:,.4f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Incremental top-k customer and product leaderboards over streaming orders.
+
+orderanalysis.ipynb ranks customers by total_spent and products by
+total_revenue by sorting complete groupby results. A Leaderboard instead keeps
+exact running totals per integer key in dense NumPy arrays and a sorted top-k
+index. Each ingested batch only updates the keys it touches. The new top-k is
+then chosen from the previous top-k plus those keys, which is exact while
+totals only grow. A batch that lowers a total inside the top-k triggers one
+full re-rank. Reading the top n <= k rows costs O(n).
+
+Ties are ranked by ascending key.
+
+Usage:
+    python leaderboard.py [--data-dir .] [--top 10] [--chunk-size 5000] [--follow 2]
+"""
+import argparse
+import io
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_K = 100
+
+
+class Leaderboard:
+    # Running sums of `measures` per integer key, ranked by measures[rank_by].
+    # A measure named 'count' counts rows instead of summing a column.
+    def __init__(self, key, measures, rank_by, k=DEFAULT_K):
+        self.key = key
+        self.measures = dict(measures)
+        self.rank_by = rank_by
+        self.k = k
+        self.totals = None
+        self.seen = np.zeros(0, dtype=bool)
+        self.top_keys = np.zeros(0, dtype=np.int64)
+        self.rows = 0
+        self.full_reranks = 0
+
+    def _allocate(self, batch):
+        # counts and integer columns are summed exactly as int64
+        self.totals = {}
+        for name, column in self.measures.items():
+            integer = column == 'count' or pd.api.types.is_integer_dtype(batch[column])
+            self.totals[name] = np.zeros(0, dtype=np.int64 if integer else float)
+
+    def _grow(self, size):
+        if size <= len(self.seen):
+            return
+        size = max(size, 2 * len(self.seen))
+        for name, values in self.totals.items():
+            self.totals[name] = np.concatenate([values, np.zeros(size - len(values), dtype=values.dtype)])
+        self.seen = np.concatenate([self.seen, np.zeros(size - len(self.seen), dtype=bool)])
+
+    def _rank(self, candidates):
+        # top k of candidates by total descending, then key ascending
+        candidates = candidates[self.seen[candidates]]
+        totals = self.totals[self.rank_by][candidates]
+        if len(candidates) > self.k:
+            # keep everything tied with the k-th total so the key tie-break is exact
+            threshold = np.partition(totals, len(totals) - self.k)[len(totals) - self.k]
+            keep = totals >= threshold
+            candidates, totals = candidates[keep], totals[keep]
+        order = np.lexsort((candidates, -totals))[:self.k]
+        return candidates[order]
+
+    def ingest(self, batch):
+        """Fold a DataFrame of new rows (with the key and measure columns) into the totals"""
+        if len(batch) == 0:
+            return
+        if self.totals is None:
+            self._allocate(batch)
+        keys, inverse = np.unique(batch[self.key].to_numpy(dtype=np.int64), return_inverse=True)
+        if keys[0] < 0:
+            raise ValueError(f"{self.key} must be non-negative integers")
+        self._grow(int(keys[-1]) + 1)
+        rank_before = self.totals[self.rank_by][self.top_keys]
+        for name, column in self.measures.items():
+            if column == 'count':
+                sums = np.bincount(inverse, minlength=len(keys))
+            else:
+                sums = np.bincount(inverse, weights=batch[column].to_numpy(dtype=float), minlength=len(keys))
+            self.totals[name][keys] += sums.astype(self.totals[name].dtype)
+        self.seen[keys] = True
+        self.rows += len(batch)
+
+        if (self.totals[self.rank_by][self.top_keys] < rank_before).any():
+            # a leader lost ground: keys outside the candidates may now rank higher
+            self.full_reranks += 1
+            self.top_keys = self._rank(np.flatnonzero(self.seen))
+        else:
+            self.top_keys = self._rank(np.union1d(self.top_keys, keys))
+
+    def top(self, n=10):
+        """The n (<= k) leading keys with their totals, best first"""
+        if n > self.k:
+            raise ValueError(f"top({n}) exceeds the leaderboard size k={self.k}")
+        keys = self.top_keys[:n]
+        data = {self.key: keys}
+        data.update((name, values[keys]) for name, values in (self.totals or {}).items())
+        return pd.DataFrame(data)
+
+    def all_totals(self):
+        """Every key's totals, ranked (O(number of keys); for checks and exports)"""
+        if self.totals is None:
+            return pd.DataFrame(columns=[self.key] + list(self.measures))
+        keys = np.flatnonzero(self.seen)
+        order = np.lexsort((keys, -self.totals[self.rank_by][keys]))
+        data = {self.key: keys[order]}
+        data.update((name, values[keys[order]]) for name, values in (self.totals or {}).items())
+        return pd.DataFrame(data)
+
+
+class OrderLeaderboards:
+    # The notebook's customer and product rankings, fed with orders and
+    # order_items batches
+    def __init__(self, k=DEFAULT_K):
+        self.customers = Leaderboard('customer_id', {'order_count': 'count', 'total_spent': 'total_amount'},
+                                     'total_spent', k)
+        self.products = Leaderboard('product_id', {'total_quantity': 'quantity', 'total_revenue': 'total_price',
+                                                   'order_count': 'count'}, 'total_revenue', k)
+
+    def ingest(self, orders=None, order_items=None):
+        if orders is not None:
+            self.customers.ingest(orders)
+        if order_items is not None:
+            self.products.ingest(order_items)
+
+
+def tail_rows(path, offset, columns=None):
+    """Whole CSV lines appended after byte `offset`: (rows, new offset, columns)"""
+    with open(path, 'rb') as handle:
+        if columns is None:
+            header = handle.readline()
+            columns = header.decode('utf-8').strip().split(',')
+            offset = max(offset, len(header))
+        handle.seek(offset)
+        data = handle.read()
+    end = data.rfind(b'\n') + 1
+    if end == 0:
+        return None, offset, columns
+    rows = pd.read_csv(io.BytesIO(data[:end]), header=None, names=columns)
+    return rows, offset + end, columns
+
+
+def print_leaders(boards, n):
+    print(f"Top {n} customers by total_spent ({boards.customers.rows:,} orders):")
+    print(boards.customers.top(n).to_string(index=False))
+    print(f"\nTop {n} products by total_revenue ({boards.products.rows:,} order items):")
+    print(boards.products.top(n).to_string(index=False))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain top-N customer and product leaderboards")
+    parser.add_argument('--data-dir', default='.', help="directory with orders.csv and order_items.csv")
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('-k', type=int, default=DEFAULT_K, help="leaderboard size kept up to date")
+    parser.add_argument('--chunk-size', type=int, default=5000, help="rows per ingested batch")
+    parser.add_argument('--follow', type=float, default=0, metavar='SECONDS',
+                        help="keep polling the CSVs for appended rows every SECONDS")
+    args = parser.parse_args(argv)
+
+    boards = OrderLeaderboards(args.k)
+    paths = {name: os.path.join(args.data_dir, f'{name}.csv') for name in ('orders', 'order_items')}
+    started = time.perf_counter()
+    for name, path in paths.items():
+        for chunk in pd.read_csv(path, chunksize=args.chunk_size):
+            boards.ingest(**{name: chunk})
+    print(f"Ingested in {time.perf_counter() - started:.3f}s\n")
+    print_leaders(boards, args.top)
+
+    if args.follow > 0:
+        offsets = {name: os.path.getsize(path) for name, path in paths.items()}
+        columns = {name: pd.read_csv(path, nrows=0).columns.tolist() for name, path in paths.items()}
+        while True:
+            time.sleep(args.follow)
+            changed = False
+            for name, path in paths.items():
+                rows, offsets[name], _ = tail_rows(path, offsets[name], columns[name])
+                if rows is not None:
+                    boards.ingest(**{name: rows})
+                    changed = True
+            if changed:
+                print()
+                print_leaders(boards, args.top)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,303 @@
+"""Order analytics on a cached, typed order_items x orders x products fact table.
+
+orderanalysis.ipynb reads orders.csv, order_items.csv and products.csv with
+default dtypes and recomputes its groupbys cell by cell. This module joins the
+three tables once into a single fact table (one row per order item) with
+categorical and narrow integer dtypes (from dataset_schema) and pre-extracted
+date parts, caches it on disk and exposes the notebook's analyses as functions over that table.
+Next to it the cache keeps an orders table: every row of orders.csv, with the
+same date parts and per-order item counts and totals. The order-level
+analyses run on it, so orders without items are counted too.
+
+The cache (``.order_analytics_cache/`` in the data directory) records the size,
+modification time and SHA-1 of every source CSV. It is reused while they match;
+a file whose mtime changed but whose content hash did not is not rebuilt.
+
+Usage:
+    python order_analytics.py [--data-dir .] [--rebuild]
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from dataset_schema import read_dataset
+
+SOURCES = {'orders': 'orders.csv', 'order_items': 'order_items.csv', 'products': 'products.csv'}
+CACHE_DIR = '.order_analytics_cache'
+CACHE_VERSION = 3
+
+ORDER_STATUSES = ['Pending', 'Confirmed', 'Shipped', 'Delivered', 'Cancelled']
+DAYS_OF_WEEK = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+ORDER_COLUMNS = ['order_id', 'customer_id', 'order_date', 'order_status', 'total_amount',
+                 'year', 'quarter', 'month', 'day_of_week']
+
+
+def _file_sha1(path, block_size=1 << 20):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _stamp(path):
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha1': _file_sha1(path)}
+
+
+def read_sources(data_dir='.'):
+    """Read the three CSVs with their dataset_schema types applied at parse time"""
+    paths = {name: os.path.join(data_dir, file_name) for name, file_name in SOURCES.items()}
+    orders = read_dataset('orders', paths['orders'])
+    items = read_dataset('order_items', paths['order_items'])
+    products = read_dataset('products', paths['products'], columns=['product_id', 'product_name', 'category'])
+    products['product_name'] = products['product_name'].astype('category')
+    return orders, items, products
+
+
+def _with_date_parts(orders):
+    statuses = ORDER_STATUSES + sorted(set(orders['order_status'].astype(str)) - set(ORDER_STATUSES))
+    orders = orders.assign(order_status=orders['order_status'].astype(str).astype(
+        pd.CategoricalDtype(statuses)))
+    dates = orders['order_date']
+    orders['year'] = dates.dt.year.astype('int16')
+    orders['quarter'] = dates.dt.quarter.astype('int8')
+    orders['month'] = dates.dt.month.astype('int8')
+    orders['day_of_week'] = pd.Categorical.from_codes(dates.dt.dayofweek.to_numpy(), DAYS_OF_WEEK)
+    return orders
+
+
+def build_orders_table(orders, items):
+    """Every order with its date parts, left-joined with its item count and item total"""
+    orders = _with_date_parts(orders)[ORDER_COLUMNS]
+    per_order = items.groupby('order_id').agg(item_count=('order_item_id', 'size'),
+                                              items_total=('total_price', 'sum'))
+    orders = orders.merge(per_order, left_on='order_id', right_index=True, how='left', validate='one_to_one')
+    orders['item_count'] = orders['item_count'].fillna(0).astype('int32')
+    orders['items_total'] = orders['items_total'].fillna(0.0)
+    return orders.reset_index(drop=True)
+
+
+def build_fact_table(orders, items, products):
+    """Join order_items with their order and product, one row per order item"""
+    orders = _with_date_parts(orders)
+    fact = items.merge(orders[ORDER_COLUMNS], on='order_id', how='inner', validate='many_to_one')
+    fact = fact.merge(products, on='product_id', how='left', validate='many_to_one')
+    fact = fact.sort_values(['order_id', 'order_item_id'], kind='stable').reset_index(drop=True)
+    # marks one row per order, so order-level measures are not repeated per item
+    fact['first_item'] = fact['order_id'].ne(fact['order_id'].shift()).to_numpy()
+    return fact
+
+
+def cache_paths(data_dir='.', cache_dir=None):
+    """(fact table, orders table, metadata) paths of the cache"""
+    cache_dir = cache_dir or os.path.join(data_dir, CACHE_DIR)
+    return (os.path.join(cache_dir, 'fact.pkl'), os.path.join(cache_dir, 'orders.pkl'),
+            os.path.join(cache_dir, 'fact.json'))
+
+
+def _cache_is_current(meta, data_dir):
+    if meta.get('version') != CACHE_VERSION:
+        return False
+    for name, file_name in SOURCES.items():
+        path = os.path.join(data_dir, file_name)
+        stored = meta['sources'].get(name)
+        if stored is None or not os.path.exists(path):
+            return False
+        stat = os.stat(path)
+        if stat.st_size != stored['size']:
+            return False
+        if stat.st_mtime_ns != stored['mtime_ns']:
+            if _file_sha1(path) != stored['sha1']:
+                return False
+            # touched but unchanged: remember the new mtime to skip rehashing
+            stored['mtime_ns'] = stat.st_mtime_ns
+            meta['touched'] = True
+    return True
+
+
+def load_tables(data_dir='.', cache_dir=None, rebuild=False):
+    """Return (fact table, orders table, True if they came from the cache)"""
+    fact_path, orders_path, meta_path = cache_paths(data_dir, cache_dir)
+    if (not rebuild and os.path.exists(fact_path) and os.path.exists(orders_path)
+            and os.path.exists(meta_path)):
+        with open(meta_path, encoding='utf-8') as handle:
+            meta = json.load(handle)
+        if _cache_is_current(meta, data_dir):
+            if meta.pop('touched', False):
+                with open(meta_path, 'w', encoding='utf-8') as handle:
+                    json.dump(meta, handle, indent=2)
+            return pd.read_pickle(fact_path), pd.read_pickle(orders_path), True
+
+    # stamped before reading, so a file changed mid-build fails the next check
+    stamps = {name: _stamp(os.path.join(data_dir, file_name)) for name, file_name in SOURCES.items()}
+    orders, items, products = read_sources(data_dir)
+    fact = build_fact_table(orders, items, products)
+    orders = build_orders_table(orders, items)
+    os.makedirs(os.path.dirname(fact_path), exist_ok=True)
+    fact.to_pickle(fact_path)
+    orders.to_pickle(orders_path)
+    meta = {'version': CACHE_VERSION, 'rows': len(fact), 'orders': len(orders), 'sources': stamps}
+    with open(meta_path, 'w', encoding='utf-8') as handle:
+        json.dump(meta, handle, indent=2)
+    return fact, orders, False
+
+
+def orders_view(fact):
+    """One row per order that has items, from the fact table alone (no orders without items)"""
+    return fact.loc[fact['first_item'].to_numpy(), ORDER_COLUMNS].reset_index(drop=True)
+
+
+def _orders(fact, orders):
+    # order-level analyses take the orders table from load_tables; without it
+    # they fall back to orders_view(fact), which misses orders without items
+    return orders_view(fact) if orders is None else orders
+
+
+def status_counts(fact, orders=None):
+    orders = _orders(fact, orders)
+    return orders['order_status'].value_counts()
+
+
+def revenue_by_status(fact, orders=None):
+    orders = _orders(fact, orders)
+    stats = orders.groupby('order_status', observed=True)['total_amount'].agg(['sum', 'mean', 'count'])
+    stats.columns = ['Total Revenue', 'Average Order Value', 'Order Count']
+    return stats
+
+
+def monthly_orders(fact, orders=None):
+    orders = _orders(fact, orders)
+    monthly = orders.groupby(['year', 'month']).agg(
+        order_count=('order_id', 'count'), total_revenue=('total_amount', 'sum')).reset_index()
+    year_month = pd.PeriodIndex.from_fields(year=monthly['year'], month=monthly['month'], freq='M')
+    monthly = monthly.drop(columns=['year', 'month'])
+    monthly.insert(0, 'year_month', year_month)
+    monthly['year_month_str'] = monthly['year_month'].astype(str)
+    return monthly
+
+
+def customer_stats(fact, orders=None):
+    orders = _orders(fact, orders)
+    stats = orders.groupby('customer_id').agg(
+        order_count=('order_id', 'count'), total_spent=('total_amount', 'sum')).reset_index()
+    return stats.sort_values('total_spent', ascending=False)
+
+
+def product_stats(fact):
+    stats = fact.groupby('product_id').agg(
+        total_quantity=('quantity', 'sum'), total_revenue=('total_price', 'sum'),
+        order_count=('order_item_id', 'count')).reset_index()
+    return stats.sort_values('total_revenue', ascending=False)
+
+
+def category_stats(fact):
+    stats = fact.groupby('category', observed=True).agg(
+        total_quantity=('quantity', 'sum'), total_revenue=('total_price', 'sum'))
+    # orders containing the category: mark each distinct (order, category) pair
+    # in a dense table indexed by order position (the table is sorted by order)
+    codes = fact['category'].cat.codes.to_numpy().astype(np.int64)
+    n_categories = len(fact['category'].cat.categories)
+    order_position = np.cumsum(fact['first_item'].to_numpy()) - 1
+    seen = np.zeros((order_position[-1] + 1 if len(fact) else 0) * n_categories, dtype=bool)
+    known = codes >= 0
+    seen[order_position[known] * n_categories + codes[known]] = True
+    counts = np.bincount(np.flatnonzero(seen) % n_categories, minlength=n_categories)
+    stats['order_count'] = pd.Series(counts, index=fact['category'].cat.categories)
+    return stats.reset_index().sort_values('total_revenue', ascending=False)
+
+
+def items_per_order(fact):
+    # the fact table is sorted by order_id, so each order is one run of rows
+    starts = np.flatnonzero(fact['first_item'].to_numpy())
+    return pd.DataFrame({'order_id': fact['order_id'].to_numpy()[starts],
+                         'item_count': np.diff(np.append(starts, len(fact)))})
+
+
+def yearly_stats(fact, orders=None):
+    orders = _orders(fact, orders)
+    return orders.groupby('year').agg(
+        order_count=('order_id', 'count'), total_revenue=('total_amount', 'sum')).reset_index()
+
+
+def quarterly_stats(fact, orders=None):
+    orders = _orders(fact, orders)
+    stats = orders.groupby(['year', 'quarter']).agg(
+        order_count=('order_id', 'count'), total_revenue=('total_amount', 'sum')).reset_index()
+    stats['year_quarter'] = stats['year'].astype(str) + '-Q' + stats['quarter'].astype(str)
+    return stats
+
+
+def day_of_week_stats(fact, orders=None):
+    orders = _orders(fact, orders)
+    return orders.groupby('day_of_week', observed=False).agg(
+        order_count=('order_id', 'count'), total_revenue=('total_amount', 'sum')).reset_index()
+
+
+def summary_metrics(fact, orders=None):
+    """Headline numbers of the notebook's summary dashboard"""
+    orders = _orders(fact, orders)
+    total_orders = len(orders)
+    total_customers = orders['customer_id'].nunique()
+    return {
+        'total_orders': total_orders,
+        'total_revenue': float(orders['total_amount'].sum()),
+        'avg_order_value': float(orders['total_amount'].mean()),
+        'total_customers': total_customers,
+        'total_products': fact['product_id'].nunique(),
+        'avg_orders_per_customer': total_orders / total_customers if total_customers else np.nan,
+        'avg_items_per_order': len(fact) / total_orders if total_orders else np.nan,
+    }
+
+
+ORDER_ANALYSES = {'status_counts', 'revenue_by_status', 'monthly_orders', 'customer_stats',
+                  'yearly_stats', 'quarterly_stats', 'day_of_week_stats', 'summary_metrics'}
+ANALYSES = {
+    'status_counts': status_counts,
+    'revenue_by_status': revenue_by_status,
+    'monthly_orders': monthly_orders,
+    'customer_stats': customer_stats,
+    'product_stats': product_stats,
+    'category_stats': category_stats,
+    'items_per_order': items_per_order,
+    'yearly_stats': yearly_stats,
+    'quarterly_stats': quarterly_stats,
+    'day_of_week_stats': day_of_week_stats,
+    'summary_metrics': summary_metrics,
+}
+
+
+def run_all(fact, orders=None):
+    """Every analysis in ANALYSES, keyed by name (orders: the orders table from load_tables)"""
+    orders = _orders(fact, orders)
+    return {name: analysis(fact, orders) if name in ORDER_ANALYSES else analysis(fact)
+            for name, analysis in ANALYSES.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build (or load) the order tables and print the summary")
+    parser.add_argument('--data-dir', default='.', help="directory with orders.csv, order_items.csv and products.csv")
+    parser.add_argument('--rebuild', action='store_true', help="ignore the cached tables")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    fact, orders, cached = load_tables(args.data_dir, rebuild=args.rebuild)
+    loaded = time.perf_counter() - started
+    size_mb = (fact.memory_usage(deep=True).sum() + orders.memory_usage(deep=True).sum()) / 1e6
+    print(f"Fact table: {len(fact):,} rows, orders table: {len(orders):,} rows, {size_mb:.1f} MB, "
+          f"{'loaded from cache' if cached else 'built from CSV'} in {loaded:.3f}s")
+
+    started = time.perf_counter()
+    results = run_all(fact, orders)
+    print(f"{len(results)} analyses in {time.perf_counter() - started:.3f}s\n")
+    for name, value in results['summary_metrics'].items():
+        print(f"{name:<26} {value:>16,.2f}" if isinstance(value, float) else f"{name:<26} {value:>16,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,229 @@
+"""Pre-aggregated rollup cube for order analytics queries.
+
+The cube has one row per (year, quarter, month, day_of_week, order_status,
+category) cell of the order_analytics fact table, with integer codes for every
+dimension and additive measures:
+
+- item_count, quantity, total_price: summed over the order items in the cell
+- orders, amount: each order's count and total_amount, credited to the cell of
+  its first item, so they add up exactly over any roll-up of category
+- category_orders, category_amount: each order's count and total_amount
+  credited once to every category it contains
+
+Orders without items come from the order_analytics orders table. Each one is
+a row with a null category and no items, so it counts towards orders and
+amount but never towards a category.
+
+query() answers a group-by / filter over those dimensions with NumPy masks and
+a bincount over the few thousand cube rows. order_count and total_amount come
+from orders/amount unless the query groups by category or filters it to one
+value, where "orders containing the category" (category_orders/amount) is the
+meaningful and exact answer. Other dimensions (customer_id, product_id,
+order_date, ...) and filters on several categories without grouping by
+category fall back to the raw fact table.
+
+Usage:
+    python order_cube.py [--data-dir .] [--by year quarter] [--where order_status=Delivered]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import order_analytics
+
+DIMENSIONS = ['year', 'quarter', 'month', 'day_of_week', 'order_status', 'category']
+MEASURES = ['order_count', 'item_count', 'quantity', 'total_amount', 'total_price']
+COUNT_MEASURES = {'order_count', 'item_count', 'quantity'}
+
+
+def _labels(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return np.asarray(series.cat.categories)
+    return np.sort(series.unique())
+
+
+def _codes(series, labels):
+    if isinstance(series.dtype, pd.CategoricalDtype) and np.array_equal(series.cat.categories, labels):
+        return series.cat.codes.to_numpy().astype(np.int64)
+    return np.searchsorted(labels, series.to_numpy()).astype(np.int64)
+
+
+class OrderCube:
+    # Base cuboid over DIMENSIONS as parallel NumPy arrays: dimension codes in
+    # `codes`, their labels in `labels`, measure sums in `measures`. The fact
+    # table, with a row per item-less order appended, is kept for queries the
+    # cube cannot answer.
+    def __init__(self, fact, orders=None):
+        frame = pd.DataFrame({
+            'item_count': np.ones(len(fact), dtype=np.int64),
+            'quantity': fact['quantity'].to_numpy(dtype=np.int64),
+            'total_price': fact['total_price'].to_numpy(),
+        })
+        first_item = fact['first_item'].to_numpy()
+        amount = fact['total_amount'].to_numpy()
+        frame['orders'] = first_item.astype(np.int64)
+        frame['amount'] = np.where(first_item, amount, 0.0)
+        first_in_category = ~fact.duplicated(['order_id', 'category']).to_numpy()
+        frame['category_orders'] = first_in_category.astype(np.int64)
+        frame['category_amount'] = np.where(first_in_category, amount, 0.0)
+
+        itemless = orders[orders['item_count'] == 0] if orders is not None else orders
+        if itemless is not None and len(itemless):
+            empty = itemless[order_analytics.ORDER_COLUMNS].assign(
+                category=pd.Categorical([None] * len(itemless), dtype=fact['category'].dtype),
+                quantity=0, total_price=0.0)
+            fact = pd.concat([fact, empty], ignore_index=True)
+            order_amount = itemless['total_amount'].to_numpy()
+            frame = pd.concat([frame, pd.DataFrame({
+                'item_count': 0, 'quantity': 0, 'total_price': 0.0,
+                'orders': 1, 'amount': order_amount, 'category_orders': 1, 'category_amount': order_amount,
+            }, index=range(len(itemless)))], ignore_index=True)
+        self.fact = fact
+
+        self.labels = {dim: _labels(fact[dim]) for dim in DIMENSIONS}
+        for dim in DIMENSIONS:
+            frame[dim] = _codes(fact[dim], self.labels[dim])
+        # a null category (item-less order, or product not in products.csv)
+        # keeps code -1; queries on category leave those cells out
+        cube = frame.groupby(DIMENSIONS, sort=True).sum().reset_index()
+
+        self.codes = {dim: cube[dim].to_numpy() for dim in DIMENSIONS}
+        self.measures = {column: cube[column].to_numpy() for column in cube.columns if column not in DIMENSIONS}
+        self.label_codes = {dim: {label: code for code, label in enumerate(labels.tolist())}
+                            for dim, labels in self.labels.items()}
+
+    def __len__(self):
+        return len(self.codes[DIMENSIONS[0]])
+
+    def answerable(self, by, where):
+        """True if query(by, where) can be answered from the cube"""
+        if not set(by) | set(where) <= set(DIMENSIONS):
+            return False
+        categories = where.get('category')
+        if 'category' not in by and categories is not None and len(_as_list(categories)) > 1:
+            # orders containing any of several categories overlap; needs raw rows
+            return False
+        return True
+
+    def query(self, by=(), where=None, measures=MEASURES):
+        """Measures grouped by `by`, over rows matching `where` ({dim: value or list})"""
+        by = [by] if isinstance(by, str) else list(by)
+        where = dict(where or {})
+        if not self.answerable(by, where):
+            return self.raw_query(by, where, measures)
+
+        mask = self.codes['category'] >= 0 if 'category' in by else np.ones(len(self), dtype=bool)
+        for dim, values in where.items():
+            wanted = [self.label_codes[dim][value] for value in _as_list(values) if value in self.label_codes[dim]]
+            mask &= np.isin(self.codes[dim], wanted)
+        rows = np.flatnonzero(mask)
+
+        sizes = [len(self.labels[dim]) for dim in by]
+        key = np.zeros(len(rows), dtype=np.int64)
+        for dim, size in zip(by, sizes):
+            key = key * size + self.codes[dim][rows]
+        cells = int(np.prod(sizes))
+        per_category = 'category' in by or 'category' in where
+        sources = {
+            'order_count': 'category_orders' if per_category else 'orders',
+            'total_amount': 'category_amount' if per_category else 'amount',
+            'item_count': 'item_count', 'quantity': 'quantity', 'total_price': 'total_price',
+        }
+        # a cell is occupied by items or by item-less orders
+        weights = self.measures['item_count'][rows] + self.measures[sources['order_count']][rows]
+        present = np.bincount(key, weights=weights, minlength=cells)
+        occupied = np.flatnonzero(present) if by else np.arange(1)
+        data = {}
+        for measure in measures:
+            values = np.bincount(key, weights=self.measures[sources[measure]][rows], minlength=cells)[occupied]
+            data[measure] = values.astype(np.int64) if measure in COUNT_MEASURES else values
+        if not by:
+            return pd.DataFrame(data)
+
+        level_codes = []
+        remainder = occupied
+        for size in reversed(sizes):
+            level_codes.append(remainder % size)
+            remainder = remainder // size
+        levels = [self.labels[dim] for dim in by]
+        index = pd.MultiIndex(levels=levels, codes=level_codes[::-1], names=by, verify_integrity=False)
+        if len(by) == 1:
+            index = index.get_level_values(0)
+        return pd.DataFrame(data, index=index)
+
+    def raw_query(self, by, where, measures=MEASURES):
+        """query() computed from the fact table, for any fact table columns"""
+        # item-less orders have no order_item_id, so only real items are counted
+        fact = self.fact
+        mask = np.ones(len(fact), dtype=bool)
+        for column, values in where.items():
+            mask &= fact[column].isin(_as_list(values)).to_numpy()
+        fact = fact[mask]
+        grouped = fact.groupby(by, observed=True, sort=True) if by else None
+        # order-level measures count each order once per group
+        orders = fact.drop_duplicates(by + ['order_id'])
+        if by:
+            totals = {
+                'item_count': grouped['order_item_id'].count(),
+                'quantity': grouped['quantity'].sum(),
+                'total_price': grouped['total_price'].sum(),
+                'order_count': orders.groupby(by, observed=True, sort=True).size(),
+                'total_amount': orders.groupby(by, observed=True, sort=True)['total_amount'].sum(),
+            }
+            result = pd.DataFrame({measure: totals[measure] for measure in measures})
+        else:
+            totals = {
+                'item_count': fact['order_item_id'].count(),
+                'quantity': fact['quantity'].sum(),
+                'total_price': fact['total_price'].sum(),
+                'order_count': len(orders),
+                'total_amount': orders['total_amount'].sum(),
+            }
+            result = pd.DataFrame({measure: [totals[measure]] for measure in measures})
+        for measure in COUNT_MEASURES & set(measures):
+            result[measure] = result[measure].astype(np.int64)
+        return result
+
+
+def _as_list(values):
+    return list(values) if isinstance(values, (list, tuple, set, np.ndarray)) else [values]
+
+
+def build_cube(data_dir='.', rebuild=False):
+    """OrderCube over the (cached) order_analytics fact and orders tables"""
+    fact, orders, _ = order_analytics.load_tables(data_dir, rebuild=rebuild)
+    return OrderCube(fact, orders)
+
+
+def _parse_filter(text):
+    dim, _, values = text.partition('=')
+    parsed = [int(value) if value.lstrip('-').isdigit() else value for value in values.split(',')]
+    return dim, parsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the order rollup cube")
+    parser.add_argument('--data-dir', default='.', help="directory with orders.csv, order_items.csv and products.csv")
+    parser.add_argument('--by', nargs='*', default=['year', 'quarter'], help="dimensions to group by")
+    parser.add_argument('--where', nargs='*', default=[], metavar='DIM=V1,V2',
+                        help="filters, e.g. order_status=Delivered,Shipped category=Books")
+    parser.add_argument('--rebuild', action='store_true', help="rebuild the cached order tables")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    cube = build_cube(args.data_dir, args.rebuild)
+    print(f"Cube: {len(cube):,} cells from {len(cube.fact):,} order items in {time.perf_counter() - started:.3f}s")
+
+    where = dict(_parse_filter(text) for text in args.where)
+    started = time.perf_counter()
+    result = cube.query(args.by, where)
+    elapsed = time.perf_counter() - started
+    source = 'cube' if cube.answerable(args.by, where) else 'raw fact table'
+    print(result.to_string())
+    print(f"\nAnswered from the {source} in {elapsed * 1000:.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
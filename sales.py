@@ -1,13 +1,27 @@
+import argparse
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
 from faker import Faker
 import random
-from datetime import datetime, timedelta
+from datetime import date, timedelta
+from functools import partial
+
+import faker_pool
+from dataset_writer import TableWriter, add_output_arguments, remove_output
+from stage_profiler import add_profile_argument, profiling, span
 
 fake = Faker('en_IN')
 np.random.seed(42)
 random.seed(42)
 
+SEED = 42
+
 # Indian product categories and realistic products
 categories = {
     'Electronics': ['Smartphone', 'Laptop', 'Headphones', 'Charger', 'Power Bank', 'Tablet', 'Smart Watch', 'USB Cable'],
@@ -18,89 +32,607 @@ categories = {
     'Sports': ['Cricket Bat', 'Yoga Mat', 'Dumbbells', 'Shoes', 'T-Shirt', 'Water Bottle']
 }
 
-# Generate Products (1000s)
-print("Generating Products...")
-products = []
-product_id = 1
-for category, items in categories.items():
-    for item in items:
-        for i in range(120):  # ~1000 products across categories
-            products.append({
-                'product_id': product_id,
-                'product_name': f"{item} {fake.word()}",
-                'category': category,
-                'price': round(np.random.lognormal(mean=np.log(500), sigma=1.5), 2),
-                'stock_quantity': random.randint(10, 1000)
-            })
-            product_id += 1
-
-df_products = pd.DataFrame(products)
-df_products.to_csv('products.csv', index=False)
-print(f"Products: {len(df_products)} records created")
-
-# Generate Customers (1000s)
-print("Generating Customers...")
-customers = []
-for i in range(5000):
-    customers.append({
-        'customer_id': i + 1,
-        'customer_name': fake.name(),
-        'email': fake.email(), 
-        'phone': fake.phone_number(),
-        'city': random.choice(['Mumbai', 'Delhi', 'Bangalore', 'Hyderabad', 'Chennai', 'Kolkata', 'Pune', 'Ahmedabad']),
-        'state': random.choice(['Maharashtra', 'Delhi', 'Karnataka', 'Telangana', 'Tamil Nadu', 'West Bengal', 'Gujarat']),
-        'registration_date': fake.date_between(start_date='-2y')
-    })
+CITIES = ['Mumbai', 'Delhi', 'Bangalore', 'Hyderabad', 'Chennai', 'Kolkata', 'Pune', 'Ahmedabad']
+STATES = ['Maharashtra', 'Delhi', 'Karnataka', 'Telangana', 'Tamil Nadu', 'West Bengal', 'Gujarat']
+ORDER_STATUSES = ['Pending', 'Confirmed', 'Shipped', 'Delivered', 'Cancelled']
+
+CUSTOMER_COLUMNS = ['customer_id', 'customer_name', 'email', 'phone', 'city', 'state', 'registration_date']
+ORDER_COLUMNS = ['order_id', 'customer_id', 'order_date', 'order_status', 'total_amount']
+ORDER_ITEM_COLUMNS = ['order_item_id', 'order_id', 'product_id', 'quantity', 'unit_price', 'total_price']
+
+ORDER_WINDOW_DAYS = 730
+
+# Low-cardinality columns written dictionary-encoded by the columnar formats,
+# and the date column each table is partitioned by with --partition-by-month
+TABLE_CATEGORIES = {
+    'products': {'category': list(categories)},
+    'customers': {'city': CITIES, 'state': STATES},
+    'orders': {'order_status': ORDER_STATUSES},
+    'order_items': {},
+}
+TABLE_PARTITION_DATES = {
+    'customers': 'registration_date',
+    'orders': 'order_date',
+}
+
+
+def seed_generators(seed):
+    """Seed Faker and the global numpy and random streams the per-row generators use"""
+    fake.seed_instance(seed)
+    np.random.seed(seed)
+    random.seed(seed)
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None if unavailable)"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is bytes on macOS and kilobytes on Linux
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+        except (ImportError, AttributeError):
+            return None
+
+
+def report_table(name, rows, elapsed, peak=None):
+    """Print rows, throughput and peak memory once a table is complete"""
+    elapsed = max(elapsed, 1e-9)
+    peak = peak if peak is not None else peak_rss_mb()
+    peak_text = f"{peak:,.1f} MB" if peak is not None else "n/a"
+    print(f"{name}: {rows:,} records created in {elapsed:.2f}s "
+          f"({rows / elapsed:,.0f} rows/sec, peak RSS {peak_text})")
+
+
+def generate_products(products_per_item=120, word_pool=None, rng=None):
+    """Generate the product catalogue (~5,000 products across categories).
+
+    With word_pool, name suffixes are sampled from the pool instead of calling
+    fake.word() per product.
+    """
+    words = None
+    if word_pool is not None:
+        n_products = sum(len(items) for items in categories.values()) * products_per_item
+        words = iter(faker_pool.sample(word_pool, n_products, rng))
+    products = []
+    product_id = 1
+    for category, items in categories.items():
+        for item in items:
+            for i in range(products_per_item):  # ~1000 products across categories
+                products.append({
+                    'product_id': product_id,
+                    'product_name': f"{item} {next(words) if words else fake.word()}",
+                    'category': category,
+                    'price': round(np.random.lognormal(mean=np.log(500), sigma=1.5), 2),
+                    'stock_quantity': random.randint(10, 1000)
+                })
+                product_id += 1
+    return pd.DataFrame(products)
+
+
+def generate_customers(n_customers=5000, first_customer_id=1, end_date=None):
+    """Generate customer records with Faker names and contact details"""
+    end = end_date or date.today()
+    start = end - timedelta(days=ORDER_WINDOW_DAYS)
+    customers = []
+    for i in range(n_customers):
+        customers.append({
+            'customer_id': first_customer_id + i,
+            'customer_name': fake.name(),
+            'email': fake.email(),
+            'phone': fake.phone_number(),
+            'city': random.choice(CITIES),
+            'state': random.choice(STATES),
+            'registration_date': fake.date_between(start_date=start, end_date=end)
+        })
+    return pd.DataFrame(customers, columns=CUSTOMER_COLUMNS)
 
-df_customers = pd.DataFrame(customers)
-df_customers.to_csv('customers.csv', index=False)
-print(f"Customers: {len(df_customers)} records created")
-
-# Generate Orders (10000s)
-print("Generating Orders...")
-orders = []
-base_date = datetime.now() - timedelta(days=730)
-for i in range(15000):
-    order_date = base_date + timedelta(days=random.randint(0, 730))
-    orders.append({
-        'order_id': i + 1,
-        'customer_id': random.randint(1, 5000),
-        'order_date': order_date.date(),
-        'order_status': random.choice(['Pending', 'Confirmed', 'Shipped', 'Delivered', 'Cancelled']),
-        'total_amount': round(random.uniform(500, 50000), 2)
+
+def generate_customers_pooled(n_customers, pools, rng, first_customer_id=1, unique_emails=False,
+                              unique_phones=False, end_date=None):
+    """Columnar generate_customers that samples Faker values from pre-built pools"""
+    ids = np.arange(first_customer_id, first_customer_id + n_customers)
+    if unique_emails:
+        emails = faker_pool.unique_emails(pools['email'], ids, rng)
+    else:
+        emails = faker_pool.sample(pools['email'], n_customers, rng)
+    if unique_phones:
+        phones = faker_pool.unique_phones(ids)
+    else:
+        phones = faker_pool.sample(pools['phone_number'], n_customers, rng)
+    return pd.DataFrame({
+        'customer_id': ids,
+        'customer_name': faker_pool.sample(pools['name'], n_customers, rng),
+        'email': emails,
+        'phone': phones,
+        'city': np.asarray(CITIES)[rng.integers(0, len(CITIES), size=n_customers)],
+        'state': np.asarray(STATES)[rng.integers(0, len(STATES), size=n_customers)],
+        'registration_date': faker_pool.random_dates(n_customers, ORDER_WINDOW_DAYS, rng, end_date)
     })
 
-df_orders = pd.DataFrame(orders)
-df_orders.to_csv('orders.csv', index=False)
-print(f"Orders: {len(df_orders)} records created")
-
-# Generate Order Items (Lakhs - 100s of 1000s)
-print("Generating Order Items...")
-order_items = []
-item_id = 1
-for order_id in df_orders['order_id']:
-    num_items = random.randint(1, 5)
-    for _ in range(num_items):
-        product_id = random.randint(1, len(df_products))
-        quantity = random.randint(1, 10)
-        price = df_products[df_products['product_id'] == product_id]['price'].values[0]
-        
-        order_items.append({
-            'order_item_id': item_id,
-            'order_id': order_id,
-            'product_id': product_id,
-            'quantity': quantity,
-            'unit_price': price,
-            'total_price': round(quantity * price, 2)
+
+def order_base_date(end_date=None):
+    """First day of the order window ending on end_date (default: today)"""
+    return (end_date or date.today()) - timedelta(days=ORDER_WINDOW_DAYS)
+
+
+def generate_orders(n_orders=15000, n_customers=5000, end_date=None):
+    """Generate order headers spread over the last two years"""
+    orders = []
+    base_date = order_base_date(end_date)
+    for i in range(n_orders):
+        order_date = base_date + timedelta(days=random.randint(0, ORDER_WINDOW_DAYS))
+        orders.append({
+            'order_id': i + 1,
+            'customer_id': random.randint(1, n_customers),
+            'order_date': order_date,
+            'order_status': random.choice(ORDER_STATUSES),
+            'total_amount': round(random.uniform(500, 50000), 2)
         })
-        item_id += 1
+    return pd.DataFrame(orders, columns=ORDER_COLUMNS)
+
+
+def generate_orders_chunk(first_order_id, n_orders, n_customers, base_date, rng):
+    """Columnar version of generate_orders for one chunk of the order_id range"""
+    day_offsets = rng.integers(0, ORDER_WINDOW_DAYS + 1, size=n_orders)
+    return pd.DataFrame({
+        'order_id': np.arange(first_order_id, first_order_id + n_orders),
+        'customer_id': rng.integers(1, n_customers + 1, size=n_orders),
+        'order_date': np.datetime64(base_date, 'D') + day_offsets,
+        'order_status': np.asarray(ORDER_STATUSES)[rng.integers(0, len(ORDER_STATUSES), size=n_orders)],
+        'total_amount': np.round(rng.uniform(500, 50000, size=n_orders), 2)
+    }, columns=ORDER_COLUMNS)
+
+
+def build_price_index(df_products):
+    """Return a price array where price_index[product_id] is that product's price"""
+    product_ids = df_products['product_id'].to_numpy()
+    price_index = np.zeros(product_ids.max() + 1, dtype=np.float64)
+    price_index[product_ids] = df_products['price'].to_numpy()
+    return price_index
+
+
+def draw_order_items(order_ids, n_products, rng, items_per_order=None):
+    """Draw items-per-order, product ids and quantities for all orders in bulk"""
+    if items_per_order is None:
+        items_per_order = rng.integers(1, 6, size=len(order_ids))
+    n_items = int(items_per_order.sum())
+    product_ids = rng.integers(1, n_products + 1, size=n_items)
+    quantities = rng.integers(1, 11, size=n_items)
+    return items_per_order, product_ids, quantities
+
+
+def generate_order_items(order_ids, price_index, rng, first_item_id=1, items_per_order=None):
+    """Columnar order_items generator.
+
+    unit_price is resolved by indexing price_index with the product ids, so the
+    cost no longer depends on the size of the product table. items_per_order
+    may be supplied when it comes from a separate stream (sharded mode).
+    """
+    order_ids = np.asarray(order_ids)
+    items_per_order, product_ids, quantities = draw_order_items(order_ids, len(price_index) - 1, rng,
+                                                                items_per_order)
+    unit_price = price_index[product_ids]
+    return pd.DataFrame({
+        'order_item_id': np.arange(first_item_id, first_item_id + len(product_ids)),
+        'order_id': np.repeat(order_ids, items_per_order),
+        'product_id': product_ids,
+        'quantity': quantities,
+        'unit_price': unit_price,
+        'total_price': np.round(quantities * unit_price, 2)
+    }, columns=ORDER_ITEM_COLUMNS)
+
+
+def generate_order_items_legacy(order_ids, df_products, rng, first_item_id=1):
+    """Original row-by-row generator (boolean product lookup per line item).
+
+    Consumes the same draws as generate_order_items, so both engines produce
+    identical output for the same seed.
+    """
+    items_per_order, product_ids, quantities = draw_order_items(order_ids, len(df_products), rng)
+    order_items = []
+    item_id = first_item_id
+    position = 0
+    for order_id, num_items in zip(order_ids, items_per_order):
+        for _ in range(num_items):
+            product_id = product_ids[position]
+            quantity = quantities[position]
+            price = df_products[df_products['product_id'] == product_id]['price'].values[0]
+
+            order_items.append({
+                'order_item_id': item_id,
+                'order_id': order_id,
+                'product_id': product_id,
+                'quantity': quantity,
+                'unit_price': price,
+                'total_price': round(quantity * price, 2)
+            })
+            item_id += 1
+            position += 1
+    return pd.DataFrame(order_items, columns=ORDER_ITEM_COLUMNS)
+
+
+def table_writer(output_dir, table, formats=('csv',), partition_by_month=False, **kwargs):
+    """TableWriter for one star-schema table with its categorical and partition columns"""
+    return TableWriter(os.path.join(output_dir, table), formats, TABLE_CATEGORIES[table],
+                       TABLE_PARTITION_DATES.get(table) if partition_by_month else None, **kwargs)
+
+
+def stream_customers(writer, n_customers, chunk_size, generate=generate_customers):
+    """Write customers chunk by chunk so memory stays bounded"""
+    started = time.perf_counter()
+    # at least one (possibly empty) chunk, so the table always gets its header
+    for first in range(0, max(n_customers, 1), chunk_size):
+        size = min(chunk_size, n_customers - first)
+        with span('customers', rows=size):
+            chunk = generate(size, first_customer_id=first + 1)
+        writer.write(chunk)
+    report_table("Customers", n_customers, time.perf_counter() - started)
+
+
+def write_order_chunks(orders_writer, items_writer, first_order_id, n_orders, first_item_id, n_customers,
+                       base_date, price_index, rng, chunk_size, counts_rng=None):
+    """Generate a contiguous order_id range in chunks, writing both tables as it goes.
+
+    Returns (n_items, orders_seconds, items_seconds). When counts_rng is given,
+    items-per-order is drawn from it instead of rng (see count_shard_items).
+    """
+    orders_seconds = 0.0
+    items_seconds = 0.0
+    next_item_id = first_item_id
+    # at least one (possibly empty) chunk, so both tables always get their header
+    for offset in range(0, max(n_orders, 1), chunk_size):
+        size = min(chunk_size, n_orders - offset)
+
+        started = time.perf_counter()
+        with span('orders', rows=size):
+            chunk = generate_orders_chunk(first_order_id + offset, size, n_customers, base_date, rng)
+        orders_writer.write(chunk)
+        orders_seconds += time.perf_counter() - started
+
+        started = time.perf_counter()
+        with span('order_items') as stage:
+            items_per_order = counts_rng.integers(1, 6, size=size) if counts_rng is not None else None
+            items = generate_order_items(chunk['order_id'].to_numpy(), price_index, rng,
+                                         first_item_id=next_item_id, items_per_order=items_per_order)
+            stage.add_rows(len(items))
+        items_writer.write(items)
+        next_item_id += len(items)
+        items_seconds += time.perf_counter() - started
+
+    return next_item_id - first_item_id, orders_seconds, items_seconds
+
+
+def stream_orders_and_items(output_dir, n_orders, n_customers, price_index, rng, chunk_size,
+                            end_date=None, formats=('csv',), partition_by_month=False):
+    """Generate orders and order_items in fixed-size chunks of orders.
+
+    Each chunk is appended to disk and dropped before the next one is drawn, so
+    peak memory depends on chunk_size rather than on n_orders.
+    """
+    with table_writer(output_dir, 'orders', formats, partition_by_month) as orders_writer, \
+            table_writer(output_dir, 'order_items', formats, partition_by_month) as items_writer:
+        n_items, orders_seconds, items_seconds = write_order_chunks(
+            orders_writer, items_writer, 1, n_orders, 1, n_customers, order_base_date(end_date),
+            price_index, rng, chunk_size)
+
+    # orders and order_items are produced in lockstep, so each table is
+    # reported with the time spent on its own chunks
+    report_table("Orders", n_orders, orders_seconds)
+    report_table("Order Items", n_items, items_seconds)
+    return n_items
+
+
+def shard_ranges(n_orders, shards):
+    """Split 1..n_orders into `shards` contiguous (first_order_id, n_orders) ranges"""
+    base, extra = divmod(n_orders, shards)
+    ranges = []
+    first = 1
+    for shard in range(shards):
+        size = base + (1 if shard < extra else 0)
+        ranges.append((first, size))
+        first += size
+    return ranges
+
+
+def count_shard_items(counts_seed, n_orders, chunk_size):
+    """Total order items a shard will produce.
+
+    Replays the shard's items-per-order stream with the same chunking the
+    worker uses, so order_item_id offsets are known before any shard runs.
+    """
+    rng = np.random.default_rng(counts_seed)
+    total = 0
+    for offset in range(0, n_orders, chunk_size):
+        total += int(rng.integers(1, 6, size=min(chunk_size, n_orders - offset)).sum())
+    return total
+
+
+def _shard_writer(output_dir, table, shard, formats, partition_by_month):
+    """Writer for one shard's part files; partitioned datasets are shared by all shards"""
+    part_name = f'part-{shard:05d}'
+    return TableWriter(os.path.join(output_dir, table, part_name), formats, TABLE_CATEGORIES[table],
+                       TABLE_PARTITION_DATES.get(table) if partition_by_month else None,
+                       part_name=part_name, dataset_base=os.path.join(output_dir, table), overwrite=False)
+
+
+def _generate_shard(task):
+    """Process-pool worker: write one shard's orders and order_items part files"""
+    (output_dir, shard, formats, partition_by_month, first_order_id, n_orders, first_item_id, n_customers,
+     base_date, price_index, counts_seed, data_seed, chunk_size) = task
+    with _shard_writer(output_dir, 'orders', shard, formats, partition_by_month) as orders_writer, \
+            _shard_writer(output_dir, 'order_items', shard, formats, partition_by_month) as items_writer:
+        n_items, orders_seconds, items_seconds = write_order_chunks(
+            orders_writer, items_writer, first_order_id, n_orders, first_item_id, n_customers, base_date,
+            price_index, np.random.default_rng(data_seed), chunk_size,
+            counts_rng=np.random.default_rng(counts_seed))
+    return n_items, orders_seconds, items_seconds, peak_rss_mb()
+
+
+def merge_parts(part_paths, output_path):
+    """Concatenate CSV part files into output_path, keeping only the first header"""
+    with open(output_path, 'wb') as out:
+        for index, part_path in enumerate(part_paths):
+            with open(part_path, 'rb') as part:
+                if index > 0:
+                    part.readline()
+                shutil.copyfileobj(part, out, 1024 * 1024)
+            os.remove(part_path)
+
+
+def remove_parts(output_dir):
+    """Delete shard part files left in orders/ and order_items/, and the directories once empty"""
+    for table in ('orders', 'order_items'):
+        parts_dir = os.path.join(output_dir, table)
+        if not os.path.isdir(parts_dir):
+            continue
+        for entry in os.scandir(parts_dir):
+            if entry.name.startswith('part-'):
+                remove_output(entry.path)
+        if not os.listdir(parts_dir):
+            os.rmdir(parts_dir)
+
+
+def shard_orders_and_items(output_dir, n_orders, n_customers, price_index, seed, shards, chunk_size,
+                           workers=None, keep_parts=False, end_date=None, formats=('csv',),
+                           partition_by_month=False):
+    """Generate orders and order_items with a process pool, one order_id range per shard.
+
+    Every shard draws from its own stream derived from `seed` with
+    SeedSequence.spawn, and order_item_id offsets are computed up front, so the
+    part files carry final, contiguous ids. The same seed, shard count, chunk
+    size and end date always produce byte-identical files.
+
+    Shards write orders/part-NNNNN.* and order_items/part-NNNNN.*; CSV parts
+    are merged unless keep_parts is set, columnar parts stay as a dataset
+    directory (or go to the shared month-partitioned dataset). There are never
+    more shards than orders, so every shard writes its part files.
+    """
+    shards = max(min(shards, n_orders), 1)
+    base_date = order_base_date(end_date)
+    shard_seeds = [child.spawn(2) for child in np.random.SeedSequence(seed).spawn(shards)]
+    for table in ('orders', 'order_items'):
+        os.makedirs(os.path.join(output_dir, table), exist_ok=True)
+        if partition_by_month:
+            for fmt in formats:
+                if fmt != 'csv':
+                    remove_output(os.path.join(output_dir, f'{table}.{fmt}'))
+
+    tasks = []
+    next_item_id = 1
+    for shard, ((first_order_id, size), (counts_seed, data_seed)) in enumerate(zip(shard_ranges(n_orders, shards),
+                                                                                     shard_seeds)):
+        tasks.append((output_dir, shard, formats, partition_by_month, first_order_id, size, next_item_id,
+                      n_customers, base_date, price_index, counts_seed, data_seed, chunk_size))
+        next_item_id += count_shard_items(counts_seed, size, chunk_size)
+
+    started = time.perf_counter()
+    try:
+        # shard workers run in other processes; the profiler sees the pool as one span
+        with span('orders + order_items shards', rows=n_orders), \
+                ProcessPoolExecutor(max_workers=workers or min(shards, os.cpu_count() or 1)) as pool:
+            results = list(pool.map(_generate_shard, tasks))
+    except BaseException:
+        remove_parts(output_dir)
+        raise
+    elapsed = time.perf_counter() - started
+
+    n_items = sum(result[0] for result in results)
+    orders_share = sum(result[1] for result in results) / max(sum(r[1] + r[2] for r in results), 1e-9)
+    shard_peak = max((result[3] for result in results if result[3] is not None), default=None)
+    # shards write both tables in lockstep; split the pool wall time by the
+    # share of worker time spent on each table
+    report_table("Orders", n_orders, elapsed * orders_share, peak=shard_peak)
+    report_table("Order Items", n_items, elapsed * (1 - orders_share), peak=shard_peak)
+
+    if 'csv' in formats and not keep_parts:
+        try:
+            for table in ('orders', 'order_items'):
+                parts_dir = os.path.join(output_dir, table)
+                with span(f'merge {table} parts'):
+                    merge_parts([os.path.join(parts_dir, f'part-{shard:05d}.csv') for shard in range(shards)],
+                                os.path.join(output_dir, f'{table}.csv'))
+                if not os.listdir(parts_dir):
+                    os.rmdir(parts_dir)
+        except BaseException:
+            remove_parts(output_dir)
+            raise
+    return n_items
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the sales star schema CSV files")
+    parser.add_argument('--products-per-item', type=int, default=120,
+                        help="products generated per catalogue item (default: 120, ~5,000 products)")
+    parser.add_argument('--customers', type=int, default=5000,
+                        help="number of customers (default: 5000)")
+    parser.add_argument('--orders', type=int, default=15000,
+                        help="number of orders (default: 15000)")
+    parser.add_argument('--output-dir', default='.',
+                        help="directory the CSV files are written to (default: current directory)")
+    parser.add_argument('--stream', action='store_true',
+                        help="write customers, orders and order_items in fixed-size chunks with bounded memory")
+    parser.add_argument('--chunk-size', type=int, default=250000,
+                        help="rows per chunk in --stream mode (default: 250000); the output depends on it")
+    parser.add_argument('--shards', type=int, default=0,
+                        help="generate orders and order_items in this many order_id shards on a process pool")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="process pool size for --shards (default: min(shards, CPU count))")
+    parser.add_argument('--keep-parts', action='store_true',
+                        help="leave sharded output as orders/part-*.csv and order_items/part-*.csv instead of merging")
+    parser.add_argument('--end-date', type=date.fromisoformat, default=None,
+                        help="last day of the two-year order window, YYYY-MM-DD (default: today); "
+                             "pin it for byte-identical reruns")
+    parser.add_argument('--faker-pool', type=int, default=0, metavar='SIZE',
+                        help="sample customer and product-name Faker values from pools of SIZE values "
+                             "instead of calling Faker per row (default: 0, per-row Faker)")
+    parser.add_argument('--pool-cache', default=faker_pool.DEFAULT_CACHE_DIR,
+                        help=f"directory the Faker pools are cached in (default: {faker_pool.DEFAULT_CACHE_DIR})")
+    parser.add_argument('--unique-emails', action='store_true',
+                        help="with --faker-pool, make every customer email unique")
+    parser.add_argument('--unique-phones', action='store_true',
+                        help="with --faker-pool, make every customer phone number unique")
+    add_output_arguments(parser)
+    add_profile_argument(parser, 'sales')
+    parser.add_argument('--engine', choices=['vectorized', 'legacy'], default='vectorized',
+                        help="order_items generator to use (default: vectorized)")
+    parser.add_argument('--seed', type=int, default=SEED,
+                        help="seed for every random stream: Faker, product prices, orders and order_items")
+    parser.add_argument('--compare-engines', action='store_true',
+                        help="also run the other order_items engine with the same seed and verify identical output")
+    args = parser.parse_args(argv)
+    if (args.stream or args.shards) and (args.engine != 'vectorized' or args.compare_engines):
+        parser.error("--stream and --shards only support the vectorized engine")
+    if args.customers < 0 or args.orders < 0:
+        parser.error("--customers and --orders must not be negative")
+    if args.orders and not args.customers:
+        parser.error("--orders needs at least one customer")
+    if args.shards < 0:
+        parser.error("--shards must not be negative")
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be positive")
+    if (args.unique_emails or args.unique_phones) and not args.faker_pool:
+        parser.error("--unique-emails and --unique-phones require --faker-pool")
+    return args
+
+
+def generate(args):
+    """Generate and write the four tables as configured by parse_args"""
+    os.makedirs(args.output_dir, exist_ok=True)
+    output = {'formats': args.formats, 'partition_by_month': args.partition_by_month}
+
+    seed_generators(args.seed)
+    generate_customers_fn = partial(generate_customers, end_date=args.end_date)
+    word_pool = pool_rng = None
+    if args.faker_pool:
+        print(f"Loading Faker pools ({args.faker_pool:,} values per field)...")
+        started = time.perf_counter()
+        with span('faker pools'):
+            pools = faker_pool.load_pools(['name', 'email', 'phone_number', 'word'], args.faker_pool,
+                                          locale='en_IN', seed=args.seed, cache_dir=args.pool_cache)
+        print(f"Faker pools ready in {time.perf_counter() - started:.2f}s")
+        # separate from the order streams, which use default_rng(seed) and its spawned children
+        pool_rng = np.random.default_rng([args.seed, 1])
+        word_pool = pools['word']
+        generate_customers_fn = partial(generate_customers_pooled, pools=pools, rng=pool_rng,
+                                        unique_emails=args.unique_emails, unique_phones=args.unique_phones,
+                                        end_date=args.end_date)
+
+    # Generate Products (1000s)
+    print("Generating Products...")
+    started = time.perf_counter()
+    with span('products') as stage:
+        df_products = generate_products(args.products_per_item, word_pool, pool_rng)
+        stage.add_rows(len(df_products))
+    with table_writer(args.output_dir, 'products', **output) as writer:
+        writer.write(df_products)
+    report_table("Products", len(df_products), time.perf_counter() - started)
+
+    if args.stream or args.shards:
+        print(f"Generating Customers (streaming, {args.chunk_size:,} rows per chunk)...")
+        with table_writer(args.output_dir, 'customers', **output) as writer:
+            stream_customers(writer, args.customers, args.chunk_size, generate_customers_fn)
+
+        if args.shards:
+            print(f"Generating Orders and Order Items ({args.shards} shards, "
+                  f"{args.chunk_size:,} orders per chunk, seed={args.seed})...")
+            n_items = shard_orders_and_items(args.output_dir, args.orders, args.customers,
+                                             build_price_index(df_products), args.seed, args.shards,
+                                             args.chunk_size, workers=args.workers, keep_parts=args.keep_parts,
+                                             end_date=args.end_date, **output)
+        else:
+            print(f"Generating Orders and Order Items (streaming, {args.chunk_size:,} orders per chunk, "
+                  f"seed={args.seed})...")
+            n_items = stream_orders_and_items(args.output_dir, args.orders, args.customers,
+                                              build_price_index(df_products), np.random.default_rng(args.seed),
+                                              args.chunk_size, end_date=args.end_date, **output)
+        print(f"\n✓ All 4 tables created successfully! ({', '.join(args.formats)})")
+        print(f"  - products: {len(df_products)} products")
+        print(f"  - customers: {args.customers} customers")
+        print(f"  - orders: {args.orders} orders")
+        print(f"  - order_items: {n_items} order items")
+        return
+
+    # Generate Customers (1000s)
+    print("Generating Customers...")
+    started = time.perf_counter()
+    with span('customers', rows=args.customers):
+        df_customers = generate_customers_fn(args.customers)
+    with table_writer(args.output_dir, 'customers', **output) as writer:
+        writer.write(df_customers)
+    report_table("Customers", len(df_customers), time.perf_counter() - started)
+
+    # Generate Orders (10000s)
+    print("Generating Orders...")
+    started = time.perf_counter()
+    with span('orders', rows=args.orders):
+        df_orders = generate_orders(args.orders, args.customers, end_date=args.end_date)
+    with table_writer(args.output_dir, 'orders', **output) as writer:
+        writer.write(df_orders)
+    report_table("Orders", len(df_orders), time.perf_counter() - started)
+
+    # Generate Order Items (Lakhs - 100s of 1000s)
+    print(f"Generating Order Items ({args.engine} engine, seed={args.seed})...")
+    started = time.perf_counter()
+    order_ids = df_orders['order_id'].to_numpy()
+    with span(f'order_items ({args.engine})') as stage:
+        if args.engine == 'vectorized':
+            df_order_items = generate_order_items(order_ids, build_price_index(df_products),
+                                                  np.random.default_rng(args.seed))
+        else:
+            df_order_items = generate_order_items_legacy(order_ids, df_products,
+                                                         np.random.default_rng(args.seed))
+        stage.add_rows(len(df_order_items))
+    with table_writer(args.output_dir, 'order_items', **output) as writer:
+        writer.write(df_order_items)
+    report_table("Order Items", len(df_order_items), time.perf_counter() - started)
+
+    if args.compare_engines:
+        if args.engine == 'vectorized':
+            df_other = generate_order_items_legacy(order_ids, df_products, np.random.default_rng(args.seed))
+        else:
+            df_other = generate_order_items(order_ids, build_price_index(df_products),
+                                            np.random.default_rng(args.seed))
+        same = df_order_items.to_csv(index=False) == df_other.to_csv(index=False)
+        print(f"Engine comparison (seed={args.seed}): {'identical' if same else 'MISMATCH'}")
+        if not same:
+            raise SystemExit(1)
+
+    print(f"\n✓ All 4 tables created successfully! ({', '.join(args.formats)})")
+    print(f"  - products: {len(df_products)} products")
+    print(f"  - customers: {len(df_customers)} customers")
+    print(f"  - orders: {len(df_orders)} orders")
+    print(f"  - order_items: {len(df_order_items)} order items")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with profiling(args.profile, 'sales'):
+        generate(args)
 
-df_order_items = pd.DataFrame(order_items)
-df_order_items.to_csv('order_items.csv', index=False)
-print(f"Order Items: {len(df_order_items)} records created")
 
-print("\n✓ All 4 CSV files created successfully!")
-print(f"  - products.csv: {len(df_products)} products")
-print(f"  - customers.csv: {len(df_customers)} customers")
-print(f"  - orders.csv: {len(df_orders)} orders")
-print(f"  - order_items.csv: {len(df_order_items)} order items")
\ No newline at end of file
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+"""Named stage spans for the generators and the dashboard build, with Chrome-trace output.
+
+Code marks its stages with ``span``:
+
+    with span('customers', rows=n_customers):
+        df_customers = generate_customers(n_customers)
+
+Spans nest, and a span can add rows as it goes (``stage.add_rows(len(chunk))``).
+Without an active profiler, span() returns one shared no-op object, so a
+disabled span costs a global lookup and two empty method calls. That is why
+spans go around chunks and whole stages, never around single rows.
+
+Each entry point gets a ``--profile [TRACE]`` switch from add_profile_argument
+and runs its body inside ``profiling(args.profile, name)``. When the switch is
+given, every span records wall time, CPU time, rows and the change in
+resident memory. At exit the run is written to TRACE as Chrome trace JSON
+(open it in chrome://tracing or https://ui.perfetto.dev), and a per-stage
+summary is printed.
+
+Only the profiled process is traced. Work handed to process pools (sales.py
+--shards, build_dashboard.py chart workers) shows up as the span around the
+pool, not per task.
+
+Usage:
+    python sales.py --orders 100000 --profile
+    python stage_profiler.py sales_profile.json      # summary of a saved trace
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+_active = None
+
+
+def current_rss_mb():
+    """Resident memory of this process in MB (the peak where the current value is unavailable)"""
+    try:
+        with open('/proc/self/statm', 'rb') as handle:
+            return int(handle.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        return 0.0
+
+
+class _NullSpan:
+    # Returned by span() while profiling is off
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def add_rows(self, rows):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('profiler', 'name', 'rows', 'start_ns', 'cpu_ns', 'rss_mb', 'path')
+
+    def __init__(self, profiler, name, rows):
+        self.profiler = profiler
+        self.name = name
+        self.rows = rows
+
+    def add_rows(self, rows):
+        self.rows += rows
+
+    def __enter__(self):
+        stack = self.profiler.stack
+        self.path = f'{stack[-1].path} > {self.name}' if stack else self.name
+        stack.append(self)
+        self.rss_mb = current_rss_mb()
+        self.cpu_ns = time.process_time_ns()
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end_ns = time.perf_counter_ns()
+        cpu_ns = time.process_time_ns() - self.cpu_ns
+        self.profiler.stack.pop()
+        self.profiler.record(self, end_ns, cpu_ns, current_rss_mb())
+        return False
+
+
+class Profiler:
+    # Completed spans of one process, in the order they closed
+    def __init__(self, name):
+        self.name = name
+        self.pid = os.getpid()
+        self.origin_ns = time.perf_counter_ns()
+        self.stack = []
+        self.spans = []
+
+    def record(self, span, end_ns, cpu_ns, rss_mb):
+        self.spans.append({
+            'name': span.name,
+            'path': span.path,
+            'depth': span.path.count(' > '),
+            'start_us': (span.start_ns - self.origin_ns) / 1000,
+            'wall_us': (end_ns - span.start_ns) / 1000,
+            'cpu_us': cpu_ns / 1000,
+            'rows': span.rows,
+            'rss_mb': rss_mb,
+            'rss_delta_mb': rss_mb - span.rss_mb,
+            'thread': threading.get_ident(),
+        })
+
+    def trace(self):
+        """The recorded spans as a Chrome trace (JSON object format)"""
+        threads = {}
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': self.pid, 'tid': 0, 'args': {'name': self.name}}]
+        for span in sorted(self.spans, key=lambda span: span['start_us']):
+            tid = threads.setdefault(span['thread'], len(threads) + 1)
+            events.append({
+                'name': span['name'], 'cat': 'stage', 'ph': 'X', 'pid': self.pid, 'tid': tid,
+                'ts': round(span['start_us'], 3), 'dur': round(span['wall_us'], 3),
+                'args': {'path': span['path'], 'rows': span['rows'], 'cpu_ms': round(span['cpu_us'] / 1000, 3),
+                         'rss_delta_mb': round(span['rss_delta_mb'], 2)},
+            })
+            events.append({'name': 'RSS', 'ph': 'C', 'pid': self.pid, 'tid': tid,
+                           'ts': round(span['start_us'] + span['wall_us'], 3),
+                           'args': {'MB': round(span['rss_mb'], 1)}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms', 'otherData': {'name': self.name}}
+
+    def write_trace(self, path):
+        with open(path, 'w', encoding='utf-8') as handle:
+            json.dump(self.trace(), handle)
+
+
+def span(name, rows=0):
+    """Context manager timing the named stage; a shared no-op when profiling is off"""
+    if _active is None:
+        return NULL_SPAN
+    return _Span(_active, name, rows)
+
+
+def summarize(spans):
+    """Per-stage totals (calls, wall, CPU, rows, RSS delta) in first-start order"""
+    stages = {}
+    for span in sorted(spans, key=lambda span: span['start_us']):
+        stage = stages.setdefault(span['path'], {'name': span['name'], 'depth': span['depth'], 'calls': 0,
+                                                 'wall_s': 0.0, 'cpu_s': 0.0, 'rows': 0, 'rss_delta_mb': 0.0})
+        stage['calls'] += 1
+        stage['wall_s'] += span['wall_us'] / 1e6
+        stage['cpu_s'] += span['cpu_us'] / 1e6
+        stage['rows'] += span['rows']
+        stage['rss_delta_mb'] += span['rss_delta_mb']
+    return list(stages.values())
+
+
+def print_summary(spans, file=None):
+    stages = summarize(spans)
+    if not stages:
+        return
+    total = max(stage['wall_s'] for stage in stages if stage['depth'] == 0)
+    width = max(2 * stage['depth'] + len(stage['name']) for stage in stages)
+    print(f"\n{'stage':<{width}} {'calls':>6} {'wall s':>9} {'%':>6} {'cpu s':>9} {'rows':>12} "
+          f"{'rows/s':>12} {'RSS Δ MB':>9}", file=file)
+    for stage in stages:
+        label = '  ' * stage['depth'] + stage['name']
+        rate = f"{stage['rows'] / stage['wall_s']:,.0f}" if stage['rows'] and stage['wall_s'] else '-'
+        rows = f"{stage['rows']:,}" if stage['rows'] else '-'
+        print(f"{label:<{width}} {stage['calls']:>6} {stage['wall_s']:>9.3f} {stage['wall_s'] / total:>6.1%} "
+              f"{stage['cpu_s']:>9.3f} {rows:>12} {rate:>12} {stage['rss_delta_mb']:>+9.1f}", file=file)
+
+
+@contextmanager
+def profiling(trace_path, name):
+    """Profile the enclosed run as one top-level span named `name` if trace_path is set"""
+    global _active
+    if not trace_path:
+        yield None
+        return
+    profiler = Profiler(name)
+    _active = profiler
+    try:
+        with span(name):
+            yield profiler
+    finally:
+        _active = None
+        profiler.write_trace(trace_path)
+        print_summary(profiler.spans)
+        print(f"Trace written to {trace_path}")
+
+
+def add_profile_argument(parser, name):
+    """Add --profile [TRACE] (default TRACE: <name>_profile.json) to an argparse parser"""
+    parser.add_argument('--profile', nargs='?', const=f'{name}_profile.json', default=None, metavar='TRACE',
+                        help=f"record stage timings and write a Chrome trace (default: {name}_profile.json)")
+    return parser
+
+
+def load_spans(trace_path):
+    """Spans back from a trace written by Profiler.write_trace"""
+    with open(trace_path, encoding='utf-8') as handle:
+        events = json.load(handle)['traceEvents']
+    return [{'name': event['name'], 'path': event['args']['path'], 'depth': event['args']['path'].count(' > '),
+             'start_us': event['ts'], 'wall_us': event['dur'], 'cpu_us': event['args']['cpu_ms'] * 1000,
+             'rows': event['args']['rows'], 'rss_delta_mb': event['args']['rss_delta_mb']}
+            for event in events if event.get('ph') == 'X']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print the stage summary of a saved profile trace")
+    parser.add_argument('trace')
+    args = parser.parse_args(argv)
+    print_summary(load_spans(args.trace))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+"""Pre-aggregated (City, Year, Month) cube for the weather datasets.
+
+For every metric the cube keeps count, sum, sum of squares, min and max, plus
+one count column per Weather_Condition. Means, standard deviations, totals and
+extremes for any City x Month / Season / Year pivot can then be derived from
+a few hundred cube rows instead of rescanning the raw data.
+
+The cube is persisted next to its CSV (``<name>_cube.csv`` plus a
+``<name>_cube.json`` sidecar recording how many bytes of the CSV it covers),
+so when new days are appended to the CSV only the new tail is read.
+
+Usage:
+    python weather_cube.py indian_weather_2021_2025.csv [--rebuild]
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+KEYS = ['City', 'Year', 'Month']
+METRICS = ['Temperature_Min_C', 'Temperature_Max_C', 'Avg_Temp', 'Temperature_C',
+           'Humidity_Percent', 'Rainfall_mm', 'Wind_Speed_kmh']
+CONDITION_PREFIX = 'Condition_'
+
+SEASONS = {12: 'Winter', 1: 'Winter', 2: 'Winter',
+           3: 'Summer', 4: 'Summer', 5: 'Summer',
+           6: 'Monsoon', 7: 'Monsoon', 8: 'Monsoon', 9: 'Monsoon',
+           10: 'Autumn', 11: 'Autumn'}
+SEASON_ORDER = ['Winter', 'Summer', 'Monsoon', 'Autumn']
+
+HEAD_BYTES = 65536
+
+
+def aggregate(df):
+    """Aggregate raw weather rows into cube rows keyed by (City, Year, Month)"""
+    dates = pd.to_datetime(df['Date'])
+    frame = pd.DataFrame({'City': df['City'].astype(str).to_numpy(),
+                          'Year': dates.dt.year.to_numpy(),
+                          'Month': dates.dt.month.to_numpy()})
+    if 'Temperature_Min_C' in df and 'Temperature_Max_C' in df:
+        df = df.assign(Avg_Temp=(df['Temperature_Min_C'] + df['Temperature_Max_C']) / 2)
+
+    for metric in METRICS:
+        if metric in df:
+            values = df[metric].to_numpy(dtype=float)
+            frame[f'{metric}_count'] = ~np.isnan(values)
+            frame[f'{metric}_sum'] = np.nan_to_num(values)
+            frame[f'{metric}_sumsq'] = np.nan_to_num(values) ** 2
+            frame[f'{metric}_min'] = values
+            frame[f'{metric}_max'] = values
+    if 'Weather_Condition' in df:
+        conditions = pd.get_dummies(df['Weather_Condition'].astype(str), prefix=CONDITION_PREFIX, prefix_sep='')
+        frame = pd.concat([frame, conditions.set_index(frame.index)], axis=1)
+    return _reduce(frame)
+
+
+def _reduce(frame, keys=KEYS):
+    """Group cube-shaped rows by keys, combining each column with its own rule"""
+    rules = {column: ('min' if column.endswith('_min') else 'max' if column.endswith('_max') else 'sum')
+             for column in frame.columns if column not in keys}
+    cube = frame.groupby(keys, sort=True).agg(rules)
+    for column in cube.columns:
+        if column.endswith('_count') or column.startswith(CONDITION_PREFIX):
+            cube[column] = cube[column].astype(np.int64)
+    return cube
+
+
+def merge(cube, other):
+    """Combine two cubes (e.g. the stored cube and an aggregate of new rows)"""
+    if cube is None or cube.empty:
+        return other
+    combined = pd.concat([cube.reset_index(), other.reset_index()], ignore_index=True)
+    condition_columns = [column for column in combined if column.startswith(CONDITION_PREFIX)]
+    combined[condition_columns] = combined[condition_columns].fillna(0)
+    return _reduce(combined)
+
+
+def metrics(cube):
+    return [metric for metric in METRICS if f'{metric}_count' in cube]
+
+
+def conditions(cube):
+    return [column[len(CONDITION_PREFIX):] for column in cube if column.startswith(CONDITION_PREFIX)]
+
+
+def _rollup(cube, by):
+    """Re-group the cube by City and one of Month / Season / Year (or City only)"""
+    frame = cube.reset_index()
+    if by == 'Season':
+        frame['Season'] = frame['Month'].map(SEASONS)
+    keys = ['City'] if by is None else ['City', by]
+    return _reduce(frame.drop(columns=[key for key in KEYS if key not in keys]), keys)
+
+
+def statistic(rolled, metric, stat):
+    """mean / std / sum / count / min / max of a metric from rolled-up cube rows"""
+    count = rolled[f'{metric}_count']
+    total = rolled[f'{metric}_sum']
+    if stat == 'mean':
+        return total / count
+    if stat == 'std':
+        variance = (rolled[f'{metric}_sumsq'] - total ** 2 / count) / (count - 1)
+        return np.sqrt(variance.clip(lower=0))
+    if stat in ('sum', 'count', 'min', 'max'):
+        return rolled[f'{metric}_{stat}']
+    raise ValueError(f"Unknown statistic {stat!r}")
+
+
+def pivot(cube, metric, by='Month', stat='mean'):
+    """City x Month / Season / Year table, e.g. pivot(cube, 'Avg_Temp', 'Season')"""
+    table = statistic(_rollup(cube, by), metric, stat).unstack()
+    if by == 'Season':
+        table = table[[season for season in SEASON_ORDER if season in table.columns]]
+    return table
+
+
+def city_stats(cube, columns, stats=('min', 'mean', 'max')):
+    """Per-city statistics with the same layout as df.groupby('City').agg({...})"""
+    rolled = _rollup(cube, None)
+    return pd.DataFrame({(column, stat): statistic(rolled, column, stat) for column in columns for stat in stats})
+
+
+def city_totals(cube, metric):
+    """Per-city total of a metric, e.g. total rainfall"""
+    return statistic(_rollup(cube, None), metric, 'sum').rename(metric)
+
+
+def condition_counts(cube):
+    """Weather_Condition distribution, like df['Weather_Condition'].value_counts()"""
+    columns = [CONDITION_PREFIX + condition for condition in conditions(cube)]
+    counts = cube[columns].sum()
+    counts.index = [column[len(CONDITION_PREFIX):] for column in counts.index]
+    return counts.sort_values(ascending=False).rename('count').rename_axis('Weather_Condition')
+
+
+def cube_paths(csv_path):
+    base = os.path.splitext(csv_path)[0]
+    return f'{base}_cube.csv', f'{base}_cube.json'
+
+
+def _head_digest(csv_path, length):
+    with open(csv_path, 'rb') as handle:
+        return hashlib.sha1(handle.read(min(length, HEAD_BYTES))).hexdigest()
+
+
+def save_cube(cube, csv_path, offset=None):
+    """Persist the cube next to csv_path, recording that it covers `offset` bytes"""
+    cube_path, meta_path = cube_paths(csv_path)
+    cube.to_csv(cube_path)
+    offset = os.path.getsize(csv_path) if offset is None else offset
+    with open(csv_path, 'rb') as handle:
+        header = handle.readline().decode('utf-8').rstrip('\r\n')
+    meta = {'source': os.path.basename(csv_path), 'offset': offset, 'header': header,
+            'head_sha1': _head_digest(csv_path, offset), 'rows': int(cube.filter(like='_count').iloc[:, 0].sum())}
+    with open(meta_path, 'w', encoding='utf-8') as handle:
+        json.dump(meta, handle, indent=2)
+
+
+def load_cube(csv_path):
+    """Load a persisted cube and its metadata, or (None, None) if there is none"""
+    cube_path, meta_path = cube_paths(csv_path)
+    if not (os.path.exists(cube_path) and os.path.exists(meta_path)):
+        return None, None
+    with open(meta_path, encoding='utf-8') as handle:
+        meta = json.load(handle)
+    return pd.read_csv(cube_path, index_col=KEYS), meta
+
+
+def _aggregate_csv(handle, names=None, chunksize=500000):
+    cube = None
+    reader = pd.read_csv(handle, chunksize=chunksize, header=None if names else 'infer', names=names)
+    for chunk in reader:
+        cube = merge(cube, aggregate(chunk))
+    return cube
+
+
+def refresh_cube(csv_path, rebuild=False, chunksize=500000):
+    """Bring the persisted cube up to date with csv_path and return it.
+
+    If the CSV only grew since the last refresh, just the appended bytes are
+    read and folded into the stored cube. A rewritten file (different header
+    or leading bytes, or a shorter file) triggers a full rebuild.
+    """
+    cube, meta = (None, None) if rebuild else load_cube(csv_path)
+    size = os.path.getsize(csv_path)
+    if meta is not None:
+        valid = (meta['offset'] <= size
+                 and _head_digest(csv_path, meta['offset']) == meta['head_sha1'])
+        if valid and meta['offset'] == size:
+            return cube
+        if valid:
+            with open(csv_path, 'rb') as handle:
+                handle.seek(meta['offset'])
+                new_rows = _aggregate_csv(handle, names=meta['header'].split(','), chunksize=chunksize)
+            if new_rows is not None:
+                cube = merge(cube, new_rows)
+            save_cube(cube, csv_path, size)
+            return cube
+
+    with open(csv_path, 'rb') as handle:
+        cube = _aggregate_csv(handle, chunksize=chunksize)
+    save_cube(cube, csv_path, size)
+    return cube
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or refresh the weather aggregate cube for a CSV")
+    parser.add_argument('csv', nargs='?', default='indian_weather_2021_2025.csv')
+    parser.add_argument('--rebuild', action='store_true', help="ignore the stored cube and rescan the CSV")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    cube = refresh_cube(args.csv, rebuild=args.rebuild)
+    print(f"Cube for {args.csv}: {len(cube):,} (City, Year, Month) rows, refreshed in "
+          f"{time.perf_counter() - started:.3f}s")
+
+    started = time.perf_counter()
+    temp_pivot = pivot(cube, 'Avg_Temp' if 'Avg_Temp_count' in cube else 'Temperature_C', 'Month')
+    season_pivot = pivot(cube, 'Rainfall_mm', 'Season')
+    elapsed = time.perf_counter() - started
+    print("\nAverage Temperature (City x Month):")
+    print(temp_pivot.round(1))
+    print("\nAverage Rainfall (City x Season):")
+    print(season_pivot.round(1))
+    print(f"\nPivots computed from the cube in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""Vectorized calendar and temperature features for the weather datasets.
+
+weatheranalytics.ipynb adds Year, Month, Month_Name, Week, Day_of_Year,
+Season and Avg_Temp in separate passes, with ``strftime('%B')`` for month
+names and ``Month.apply(get_season)`` (one Python call per row) for seasons.
+add_features() derives all of them from one conversion of the Date column to
+day numbers, using integer arithmetic for the calendar fields and lookup
+tables indexed by month for Month_Name and Season (both categoricals).
+
+Values match the notebook; dtypes are compact (int16/int8 integers,
+categoricals instead of strings).
+
+iter_features() / write_features() apply it chunk by chunk, so multi-decade,
+multi-station CSVs never have to fit in memory.
+
+Usage:
+    python weather_features.py indian_weather_2021_2025.csv --output weather_features [--format csv parquet]
+"""
+import argparse
+import calendar
+import time
+
+import numpy as np
+import pandas as pd
+
+from dataset_writer import TableWriter, add_output_arguments
+from weather_cube import SEASON_ORDER, SEASONS
+
+FEATURES = ['Year', 'Month', 'Month_Name', 'Week', 'Day_of_Year', 'Season', 'Avg_Temp']
+MONTH_NAMES = list(calendar.month_name)[1:]
+MONTH_NAME_DTYPE = pd.CategoricalDtype(MONTH_NAMES, ordered=True)
+SEASON_DTYPE = pd.CategoricalDtype(SEASON_ORDER, ordered=True)
+# Season code for each month, indexed by month - 1
+SEASON_CODES = np.array([SEASON_ORDER.index(SEASONS[month]) for month in range(1, 13)], dtype=np.int8)
+
+
+def parse_dates(values):
+    """Dates as datetime64[ns]; ISO strings (daily or hourly) take the fixed-format fast path"""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return pd.Series(values)
+    return pd.to_datetime(values, format='ISO8601', cache=True)
+
+
+def calendar_fields(dates):
+    """Year, month, ISO week and day of year for an array of datetime64 values"""
+    days = np.asarray(dates, dtype='datetime64[D]')
+    months = days.astype('datetime64[M]')
+    years = days.astype('datetime64[Y]')
+    year = years.astype(np.int64) + 1970
+    month = months.astype(np.int64) % 12 + 1
+    day_of_year = (days - years).astype(np.int64) + 1
+
+    # ISO week: the week belongs to the year of its Thursday (1970-01-01 was a Thursday)
+    day_number = days.astype(np.int64)
+    weekday = (day_number + 3) % 7
+    thursday = (day_number - weekday + 3).astype('datetime64[D]')
+    week = (thursday - thursday.astype('datetime64[Y]')).astype(np.int64) // 7 + 1
+    return year, month, week, day_of_year
+
+
+def add_features(df, date_column='Date'):
+    """Return df with Date parsed and the notebook's derived columns added"""
+    df = df.copy(deep=False)
+    dates = parse_dates(df[date_column])
+    df[date_column] = dates
+    year, month, week, day_of_year = calendar_fields(dates.to_numpy())
+    month_codes = (month - 1).astype(np.int8)
+
+    df['Year'] = year.astype(np.int16)
+    df['Month'] = month.astype(np.int8)
+    df['Month_Name'] = pd.Categorical.from_codes(month_codes, dtype=MONTH_NAME_DTYPE)
+    df['Week'] = week.astype(np.int8)
+    df['Day_of_Year'] = day_of_year.astype(np.int16)
+    df['Season'] = pd.Categorical.from_codes(SEASON_CODES[month_codes], dtype=SEASON_DTYPE)
+    if 'Temperature_Min_C' in df and 'Temperature_Max_C' in df:
+        df['Avg_Temp'] = (df['Temperature_Min_C'].to_numpy() + df['Temperature_Max_C'].to_numpy()) / 2
+    return df
+
+
+def iter_features(csv_path, chunksize=1_000_000, date_column='Date'):
+    """Yield feature-enriched chunks of a weather CSV"""
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        yield add_features(chunk, date_column)
+
+
+def write_features(csv_path, output_base, formats=('csv',), chunksize=1_000_000, partition_by_month=False):
+    """Write csv_path with the derived columns to output_base.<format>, chunk by chunk"""
+    categories = {'Month_Name': MONTH_NAMES, 'Season': SEASON_ORDER}
+    with TableWriter(output_base, formats, categories=categories,
+                     partition_date='Date' if partition_by_month else None) as writer:
+        for chunk in iter_features(csv_path, chunksize):
+            writer.write(chunk)
+    return writer.rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Add calendar, season and Avg_Temp features to a weather CSV")
+    parser.add_argument('csv', nargs='?', default='indian_weather_2021_2025.csv')
+    parser.add_argument('--output', default='weather_features', help="output path without extension")
+    parser.add_argument('--chunk-size', type=int, default=1_000_000)
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    rows = write_features(args.csv, args.output, args.formats, args.chunk_size, args.partition_by_month)
+    print(f"Wrote {rows:,} rows with {', '.join(FEATURES)} to {args.output}.{{{','.join(args.formats)}}} "
+          f"in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
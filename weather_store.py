@@ -0,0 +1,244 @@
+"""Memory-mapped columnar store for the weather datasets, indexed by city.
+
+The CSV written by generate_weather_data.py is converted once into a directory
+``<name>.store/`` holding one ``.npy`` file per column, with rows sorted by
+(City, Date), and an ``index.json`` with the row range of every city.
+Weather_Condition is stored as int8 codes; City lives only in the index.
+
+Columns are opened with ``np.load(mmap_mode='r')``, so nothing is parsed at
+query time. A (city, date range, columns) query looks up the city's row range,
+binary-searches its sorted dates and slices just those rows from the wanted
+columns; the OS reads only the pages they occupy.
+
+The build makes two chunked passes over the CSV (count rows per city, then
+scatter each chunk into its cities' slots), so the source never has to fit in
+memory. load_store() rebuilds the store when the CSV's size or mtime changed.
+
+Usage:
+    python weather_store.py indian_weather_2021_2025.csv [--rebuild]
+    python weather_store.py indian_weather_2021_2025.csv --city Leh --start 2024-12-01 --end 2025-02-28 \\
+        --columns Temperature_Min_C
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+STORE_VERSION = 1
+DATE_COLUMN = 'Date'
+CITY_COLUMN = 'City'
+CODED_COLUMNS = ['Weather_Condition']
+
+
+def store_path(csv_path):
+    return f'{os.path.splitext(csv_path)[0]}.store'
+
+
+def _date_unit(sample):
+    # daily files hold YYYY-MM-DD, hourly ones a time of day as well
+    return 'D' if sample.astype(str).str.len().max() <= 10 else 's'
+
+
+def _scan_source(csv_path, chunksize):
+    """First pass: rows per city, coded column categories, column order and date unit"""
+    header = pd.read_csv(csv_path, nrows=1000)
+    columns = [column for column in header.columns if column != CITY_COLUMN]
+    coded = [column for column in CODED_COLUMNS if column in columns]
+    counts = pd.Series(dtype=np.int64)
+    categories = {column: set() for column in coded}
+    for chunk in pd.read_csv(csv_path, usecols=[CITY_COLUMN] + coded, chunksize=chunksize):
+        counts = counts.add(chunk[CITY_COLUMN].value_counts(), fill_value=0)
+        for column in coded:
+            categories[column].update(chunk[column].dropna().unique())
+    counts = counts.sort_index().astype(np.int64)
+    return columns, counts, {column: sorted(values) for column, values in categories.items()}, \
+        _date_unit(header[DATE_COLUMN])
+
+
+def build_store(csv_path, path=None, chunksize=1_000_000):
+    """Convert csv_path into a (City, Date)-sorted, memory-mappable store and return its path"""
+    path = path or store_path(csv_path)
+    stat = os.stat(csv_path)
+    columns, counts, categories, unit = _scan_source(csv_path, chunksize)
+    cities = counts.index.tolist()
+    starts = np.concatenate([[0], np.cumsum(counts.to_numpy())])
+    n_rows = int(starts[-1])
+
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    os.makedirs(path)
+    dtypes = {DATE_COLUMN: f'datetime64[{unit}]'}
+    dtypes.update((column, np.int8 if len(categories[column]) < 128 else np.int16) for column in categories)
+    arrays = {}
+    for column in columns:
+        dtype = dtypes.get(column, np.float64)
+        arrays[column] = np.lib.format.open_memmap(os.path.join(path, f'{column}.npy'), mode='w+',
+                                                   dtype=dtype, shape=(n_rows,))
+
+    # second pass: each row goes to its city's next free slot
+    city_codes = {city: code for code, city in enumerate(cities)}
+    written = np.zeros(len(cities), dtype=np.int64)
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        codes = chunk[CITY_COLUMN].map(city_codes).to_numpy(dtype=np.int64)
+        order = np.argsort(codes, kind='stable')
+        sorted_codes = codes[order]
+        group_start = np.searchsorted(sorted_codes, sorted_codes, side='left')
+        rank = np.arange(len(order)) - group_start
+        destination = np.empty(len(order), dtype=np.int64)
+        destination[order] = starts[sorted_codes] + written[sorted_codes] + rank
+        written += np.bincount(codes, minlength=len(cities))
+
+        for column in columns:
+            if column == DATE_COLUMN:
+                values = pd.to_datetime(chunk[column]).to_numpy().astype(dtypes[DATE_COLUMN])
+            elif column in categories:
+                values = pd.Categorical(chunk[column], categories=categories[column]).codes
+            else:
+                values = chunk[column].to_numpy(dtype=np.float64)
+            arrays[column][destination] = values
+
+    # rows arrive in date order per city for generator output; sort any city that did not
+    dates = arrays[DATE_COLUMN]
+    for code in range(len(cities)):
+        start, end = starts[code], starts[code + 1]
+        if (np.diff(dates[start:end].astype(np.int64)) < 0).any():
+            order = np.argsort(dates[start:end], kind='stable')
+            for array in arrays.values():
+                array[start:end] = array[start:end][order]
+    for array in arrays.values():
+        array.flush()
+
+    index = {
+        'version': STORE_VERSION,
+        'source': {'path': os.path.abspath(csv_path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns},
+        'rows': n_rows,
+        'columns': columns,
+        'categories': categories,
+        'cities': {city: [int(starts[code]), int(starts[code + 1])] for code, city in enumerate(cities)},
+    }
+    with open(os.path.join(path, 'index.json'), 'w', encoding='utf-8') as handle:
+        json.dump(index, handle, indent=2)
+    return path
+
+
+class WeatherStore:
+    # Read side of a store directory: the index plus lazily memory-mapped columns
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'index.json'), encoding='utf-8') as handle:
+            self.index = json.load(handle)
+        self.columns = self.index['columns']
+        self.categories = self.index['categories']
+        self.ranges = self.index['cities']
+        self._arrays = {}
+
+    def __len__(self):
+        return self.index['rows']
+
+    def cities(self):
+        return list(self.ranges)
+
+    def column(self, name):
+        if name not in self._arrays:
+            if name not in self.columns:
+                raise KeyError(name)
+            self._arrays[name] = np.load(os.path.join(self.path, f'{name}.npy'), mmap_mode='r')
+        return self._arrays[name]
+
+    def rows(self, city, start=None, end=None):
+        """Row range [first, last) of city between start and end dates (both inclusive)"""
+        if city not in self.ranges:
+            raise KeyError(city)
+        first, last = self.ranges[city]
+        dates = self.column(DATE_COLUMN)
+        if start is not None:
+            first += int(np.searchsorted(dates[first:last], np.datetime64(pd.Timestamp(start)), side='left'))
+        if end is not None:
+            # an end date covers the whole day, also for hourly stores
+            end = np.datetime64(pd.Timestamp(end).normalize() + pd.Timedelta(days=1))
+            last = self.ranges[city][0] + int(np.searchsorted(dates[self.ranges[city][0]:last], end, side='left'))
+        return first, max(first, last)
+
+    def _frame(self, slices, columns):
+        columns = self.columns if columns is None else list(columns)
+        data = {}
+        for name in columns:
+            if name == CITY_COLUMN:
+                cities = sorted(self.ranges)
+                codes = np.concatenate([np.full(last - first, cities.index(city), dtype=np.int16)
+                                        for city, first, last in slices]) if slices else []
+                data[name] = pd.Categorical.from_codes(codes, cities)
+                continue
+            array = self.column(name)
+            values = np.concatenate([array[first:last] for _, first, last in slices]) if slices else array[:0]
+            if name in self.categories:
+                values = pd.Categorical.from_codes(values, self.categories[name])
+            elif name == DATE_COLUMN:
+                values = values.astype('datetime64[ns]')
+            data[name] = values
+        return pd.DataFrame(data)
+
+    def query(self, city, start=None, end=None, columns=None):
+        """Rows of one city between start and end (inclusive), with Date and `columns`"""
+        first, last = self.rows(city, start, end)
+        wanted = [DATE_COLUMN] + [name for name in (columns or self.columns) if name != DATE_COLUMN]
+        return self._frame([(city, first, last)], wanted)
+
+    def point(self, city, date, columns=None):
+        """The row(s) of one city on one date"""
+        return self.query(city, date, date, columns)
+
+    def scan(self, columns=None, cities=None):
+        """Every row of the given cities (default: all), in (City, Date) order"""
+        cities = self.cities() if cities is None else list(cities)
+        return self._frame([(city, *self.ranges[city]) for city in cities], columns)
+
+
+def is_current(path, csv_path):
+    index_path = os.path.join(path, 'index.json')
+    if not os.path.exists(index_path):
+        return False
+    with open(index_path, encoding='utf-8') as handle:
+        index = json.load(handle)
+    stat = os.stat(csv_path)
+    return (index.get('version') == STORE_VERSION and index['source']['size'] == stat.st_size
+            and index['source']['mtime_ns'] == stat.st_mtime_ns)
+
+
+def load_store(csv_path, path=None, rebuild=False, chunksize=1_000_000):
+    """Open the store for csv_path, building it first if it is missing or stale"""
+    path = path or store_path(csv_path)
+    if rebuild or not is_current(path, csv_path):
+        build_store(csv_path, path, chunksize)
+    return WeatherStore(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the memory-mapped weather store for a CSV")
+    parser.add_argument('csv', nargs='?', default='indian_weather_2021_2025.csv')
+    parser.add_argument('--rebuild', action='store_true', help="rebuild the store even if it is current")
+    parser.add_argument('--chunk-size', type=int, default=1_000_000)
+    parser.add_argument('--city', help="query one city (default: only build and summarise)")
+    parser.add_argument('--start', help="first date, YYYY-MM-DD")
+    parser.add_argument('--end', help="last date, YYYY-MM-DD (inclusive)")
+    parser.add_argument('--columns', nargs='+', help="columns to return (default: all)")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    store = load_store(args.csv, rebuild=args.rebuild, chunksize=args.chunk_size)
+    print(f"Store {store.path}: {len(store):,} rows, {len(store.cities())} cities, "
+          f"ready in {time.perf_counter() - started:.3f}s")
+    if args.city:
+        started = time.perf_counter()
+        result = store.query(args.city, args.start, args.end, args.columns)
+        elapsed = time.perf_counter() - started
+        print(result.to_string(index=False) if len(result) <= 60 else result.describe().to_string())
+        print(f"\n{len(result):,} rows in {elapsed * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()